@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 import json
 import customtkinter as ctk
 import cell_time_mapping
+import timer_wheel
 from plyer import notification
 import win32com.client as win32
 import pythoncom
@@ -17,6 +18,9 @@ import csv
 ctk.set_appearance_mode("System")  # 系统主题
 ctk.set_default_color_theme("blue")  # 蓝色主题
 
+# 整5分钟时上一个窗口还没关闭，在该时段的前30秒内每隔几秒重试一次（与原先每秒检查一致）
+WINDOW_RETRY_SECONDS = 1
+
 class DayNightTableLogger:
     def __init__(self, test_mode=False):
         self.config = self.load_config()
@@ -28,6 +32,7 @@ class DayNightTableLogger:
         self.excel = None  # Excel应用程序实例
         self.activity_types = self.load_activity_types()  # 加载活动类型
         self.last_activity_type = None  # 记录上次选择的活动类型
+        self.scheduler = None
 
     def load_config(self):
         """读取配置文件"""
@@ -608,6 +613,14 @@ class DayNightTableLogger:
                     return True  # 返回True表示已创建窗口
         
         return False  # 返回False表示未创建窗口
+
+    def check_window_slot(self):
+        """由时间轮在每个整5分钟调用；上一个窗口还开着时，在本时段的前30秒内稍后重试"""
+        if self.check_and_show_window():
+            return
+        now = datetime.now()
+        if self.window is not None and now.minute % 5 == 0 and now.second < 30:
+            self.scheduler.call_later(WINDOW_RETRY_SECONDS, self.check_window_slot, name='昼夜表记录窗口重试')
     
     def run(self):
         """运行主循环"""
@@ -627,26 +640,24 @@ class DayNightTableLogger:
             time.sleep(2)
             return
         
-        # 记录上次创建窗口的时间
-        last_window_time = None
+        # 每个整5分钟（包括22:00）由时间轮触发一次检查，不再每秒醒来
+        self.scheduler = timer_wheel.get_default_wheel(
+            on_error=lambda job, e: print(f"定时任务 {job.name} 出错: {e}")
+        )
+        job = self.scheduler.call_every(
+            300, self.check_window_slot, name='昼夜表记录窗口', anchor=datetime.min.time()
+        )
         
         try:
             while self.running:
-                now = datetime.now()
-                
-                # 只有当前分钟与上次创建窗口的分钟不同时，才检查是否需要创建窗口
-                current_minute = (now.hour, now.minute)
-                if last_window_time != current_minute:
-                    if self.check_and_show_window():
-                        last_window_time = current_minute
-                
-                # 短暂休眠，避免CPU占用过高
-                time.sleep(1)
+                # 主线程只等待退出（time.sleep 可被 Ctrl+C 打断）
+                time.sleep(60)
         except KeyboardInterrupt:
             print("程序已手动停止")
         except Exception as e:
             print(f"运行时出错: {e}")
         finally:
+            job.cancel()
             print("昼夜表自动记录工具已关闭")
             # 确保Excel应用程序被关闭
             try:
@@ -0,0 +1,124 @@
+"""
+悬浮按钮共享数据状态模块
+
+floating_button_data.json 由主程序写入，悬浮按钮和33娘读取。
+原先主程序在 save_record、音乐更新和阶段变化三处各自"读取-合并-重写"一次，
+一个半小时事件最多重写三次，读取方也可能读到写了一半的文件。
+
+此模块在内存中持有这份数据，各处只更新内存，每个主循环周期最多落盘一次；
+落盘时先写临时文件再原子替换，读取方只会看到完整的旧文件或新文件。
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def atomic_write_text(path, text, encoding='utf-8', retries=5, retry_delay=0.05):
+    """
+    原子写入文本文件：写入同目录下的临时文件后用 os.replace 替换目标文件
+
+    Windows 上目标文件正被其他进程打开时替换会失败，此时稍等后重试。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(retries):
+            try:
+                os.replace(tmp_path, path)
+                return
+            except PermissionError:
+                if attempt == retries - 1:
+                    raise
+                time.sleep(retry_delay)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path, data, retries=5, retry_delay=0.05):
+    """原子写入 JSON 文件"""
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=2), retries=retries, retry_delay=retry_delay)
+
+
+class ButtonDataState:
+    """
+    floating_button_data.json 的内存副本
+
+    参数:
+        path: JSON 文件路径
+        on_error: 读取或写入出错时的回调，参数为 (说明, 异常)
+    """
+
+    def __init__(self, path, on_error=None):
+        self.path = path
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._data = {}
+        self._dirty = False
+        self.flush_count = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            # 文件损坏时从空数据开始，下一次落盘会覆盖它
+            self._data = {}
+            if self.on_error:
+                self.on_error("floating_button_data.json 文件格式错误，将使用默认值", e)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def snapshot(self):
+        """返回当前数据的副本"""
+        with self._lock:
+            return dict(self._data)
+
+    def update(self, payload):
+        """合并更新内存中的数据，只有内容确实变化时才标记为需要落盘"""
+        with self._lock:
+            for key, value in payload.items():
+                if key not in self._data or self._data[key] != value:
+                    self._data[key] = value
+                    self._dirty = True
+
+    @property
+    def dirty(self):
+        with self._lock:
+            return self._dirty
+
+    def flush(self):
+        """
+        将未落盘的修改原子写入文件
+
+        返回:
+            dict 或 None: 写入的数据；没有修改或写入失败时返回 None
+        """
+        with self._lock:
+            if not self._dirty:
+                return None
+            data = dict(self._data)
+            self._dirty = False
+        try:
+            atomic_write_json(self.path, data)
+        except Exception as e:
+            with self._lock:
+                self._dirty = True
+            if self.on_error:
+                self.on_error("写入 floating_button_data.json 时出错", e)
+            return None
+        self.flush_count += 1
+        return data
@@ -0,0 +1,333 @@
+"""
+音频元数据缓存模块
+
+主程序的 get_music_duration / 播放线程、歌单管理器的播放器（进度条、拖动定位）
+每次都用 mutagen 重新打开音频文件读取时长和标签。
+此模块把每个文件的时长和常用标签缓存在 statistics/audio_metadata_cache.json 中，
+以 (路径, 修改时间, 文件大小) 为键：文件未变化时直接使用缓存，变化后自动重新读取。
+
+启动时可用 prescan 在线程池中扫描整个 music_library 预热缓存；
+歌单管理器复制、移动、删除歌曲时调用 on_files_added / on_file_moved / on_file_removed 更新缓存。
+多个进程共用同一个缓存文件，保存时会合并其他进程写入的条目。
+
+独立运行时统计冷 / 热缓存下扫描整个曲库的耗时：
+    python audio_metadata.py music_library --workers 8
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mutagen import File
+
+from app_state import atomic_write_json
+
+# 默认缓存文件
+CACHE_PATH = os.path.join('statistics', 'audio_metadata_cache.json')
+
+# 缓存格式版本，格式变化时旧缓存整体作废
+CACHE_VERSION = 1
+
+# 支持的音乐文件扩展名
+MUSIC_EXTENSIONS = ('.mp3', '.flac')
+
+# 缓存的标签
+TAG_KEYS = ('title', 'artist', 'album')
+
+DEFAULT_WORKERS = 8
+
+
+def read_metadata(path):
+    """
+    用 mutagen 读取音频时长（秒）和常用标签
+
+    无法识别的文件时长为 0；文件不存在或损坏时抛出 mutagen 的异常。
+    """
+    audio = File(path, easy=True)
+    if audio is None or audio.info is None:
+        return {'duration': 0, 'tags': {}}
+    tags = {}
+    if audio.tags is not None:
+        for key in TAG_KEYS:
+            values = audio.tags.get(key)
+            if values:
+                tags[key] = str(values[0])
+    return {'duration': audio.info.length, 'tags': tags}
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def iter_music_files(root):
+    """递归列出 root 下的所有音乐文件"""
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.lower().endswith(MUSIC_EXTENSIONS):
+                yield os.path.join(directory, filename)
+
+
+class AudioMetadataCache:
+    """
+    以 (路径, 修改时间, 文件大小) 为键的音频元数据缓存
+
+    参数:
+        cache_path: 缓存文件路径，为 None 时只缓存在内存中
+        reader: 读取单个文件元数据的函数
+    """
+
+    def __init__(self, cache_path=CACHE_PATH, reader=read_metadata):
+        self.cache_path = cache_path
+        self.reader = reader
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._removed = set()
+        self._dirty = False
+        self._disk_signature = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _read_disk(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # 缓存损坏时当作空缓存，下次保存会覆盖
+            return {}
+        if data.get('version') != CACHE_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    def _load(self):
+        self._entries = self._read_disk()
+        self._disk_signature = _file_signature(self.cache_path) if self.cache_path else None
+
+    def get(self, path):
+        """
+        返回文件的元数据 {'duration': 秒, 'tags': {...}}，文件未变化时使用缓存
+
+        异常:
+            OSError / mutagen.MutagenError: 文件不存在或无法读取
+        """
+        key = _key(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                self.hits += 1
+                return entry
+
+        # 在锁外读取文件，预扫描时多个线程可以并行
+        metadata = self.reader(path)
+        entry = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'duration': metadata['duration'],
+            'tags': metadata['tags'],
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._removed.discard(key)
+            self._dirty = True
+            self.misses += 1
+        return entry
+
+    def duration(self, path):
+        """音频时长（秒），无法识别的文件为 0"""
+        return self.get(path)['duration']
+
+    def invalidate(self, path):
+        """丢弃某个文件的缓存"""
+        key = _key(path)
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._removed.add(key)
+                self._dirty = True
+
+    def move(self, src_path, dst_path):
+        """文件被移动或改名：沿用原来的缓存条目（修改时间和大小不变时仍然有效）"""
+        src, dst = _key(src_path), _key(dst_path)
+        with self._lock:
+            entry = self._entries.pop(src, None)
+            if entry is None:
+                return
+            self._removed.add(src)
+            self._removed.discard(dst)
+            self._entries[dst] = entry
+            self._dirty = True
+
+    def prune(self):
+        """移除已不存在的文件的缓存，返回移除的条数"""
+        with self._lock:
+            missing = [key for key in self._entries if not os.path.exists(key)]
+            for key in missing:
+                del self._entries[key]
+                self._removed.add(key)
+            if missing:
+                self._dirty = True
+        return len(missing)
+
+    @property
+    def dirty(self):
+        with self._lock:
+            return self._dirty
+
+    def save(self):
+        """
+        将缓存原子写入文件；缓存文件被其他进程更新过时，先合并对方新增的条目
+
+        返回:
+            bool: 是否写入了文件
+        """
+        if not self.cache_path:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return False
+            if _file_signature(self.cache_path) != self._disk_signature:
+                for key, entry in self._read_disk().items():
+                    if key not in self._entries and key not in self._removed:
+                        self._entries[key] = entry
+            data = {'version': CACHE_VERSION, 'entries': dict(self._entries)}
+            self._dirty = False
+            self._removed = set()
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            atomic_write_json(self.cache_path, data)
+        except Exception:
+            with self._lock:
+                self._dirty = True
+            raise
+        with self._lock:
+            self._disk_signature = _file_signature(self.cache_path)
+        return True
+
+    def prescan(self, root, workers=DEFAULT_WORKERS, save=True):
+        """
+        在线程池中读取 root 下所有音乐文件的元数据，预热缓存
+
+        返回:
+            dict: files 文件数, hits 命中数, misses 重新读取数, errors 读取失败数, seconds 耗时
+        """
+        start = time.perf_counter()
+        hits, misses = self.hits, self.misses
+        paths = list(iter_music_files(root))
+        errors = 0
+
+        def load(path):
+            try:
+                self.get(path)
+                return True
+            except Exception:
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for ok in executor.map(load, paths):
+                if not ok:
+                    errors += 1
+
+        self.prune()
+        if save:
+            self.save()
+        return {
+            'files': len(paths),
+            'hits': self.hits - hits,
+            'misses': self.misses - misses,
+            'errors': errors,
+            'seconds': time.perf_counter() - start,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """同一进程内共用的缓存实例（使用默认缓存文件）"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AudioMetadataCache()
+        return _default_cache
+
+
+def on_files_added(paths):
+    """歌单中新增了文件：丢弃同路径的旧缓存并保存"""
+    cache = get_default_cache()
+    for path in paths:
+        cache.invalidate(path)
+    cache.save()
+
+
+def on_file_moved(src_path, dst_path):
+    """歌曲在歌单之间移动：缓存条目随文件移动并保存"""
+    cache = get_default_cache()
+    cache.move(src_path, dst_path)
+    cache.save()
+
+
+def on_file_removed(path):
+    """歌曲被删除：丢弃缓存并保存"""
+    cache = get_default_cache()
+    cache.invalidate(path)
+    cache.save()
+
+
+def benchmark(root, workers=DEFAULT_WORKERS):
+    """
+    统计冷缓存（全部重新读取）与热缓存（全部命中）下扫描 root 的耗时
+
+    返回:
+        dict: cold / warm 两次 prescan 的统计，以及逐个文件直接用 mutagen 读取的耗时
+    """
+    import tempfile
+
+    paths = list(iter_music_files(root))
+    start = time.perf_counter()
+    for path in paths:
+        try:
+            read_metadata(path)
+        except Exception:
+            pass
+    direct = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, 'audio_metadata_cache.json')
+        cold = AudioMetadataCache(cache_path).prescan(root, workers)
+        # 新实例从磁盘加载缓存，模拟程序重启后的热启动
+        warm = AudioMetadataCache(cache_path).prescan(root, workers)
+    return {'files': len(paths), 'direct_seconds': direct, 'cold': cold, 'warm': warm}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='音频元数据缓存冷 / 热扫描耗时')
+    parser.add_argument('root', nargs='?', default='music_library', help='曲库目录')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='线程数')
+    args = parser.parse_args()
+
+    result = benchmark(args.root, args.workers)
+    print(f"曲库文件数: {result['files']}")
+    print(f"逐个读取（原方式）: {result['direct_seconds'] * 1000:.1f} ms")
+    for name, label in (('cold', '冷缓存并行预扫描'), ('warm', '热缓存预扫描')):
+        stats = result[name]
+        print(
+            f"{label}: {stats['seconds'] * 1000:.1f} ms "
+            f"(命中 {stats['hits']}, 读取 {stats['misses']}, 失败 {stats['errors']})"
+        )
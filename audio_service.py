@@ -0,0 +1,407 @@
+"""
+音频服务模块
+
+主程序的 play_music / play_effect_sound / play_music_signal_thread、33娘的 playAudio、
+配置编辑器的 play_sound 原先各自在临时线程中调用 pygame.mixer.init 并加载音频，
+等待音乐结束的循环还以 pygame.time.Clock().tick(10) 每秒唤醒 10 次检查 get_busy()。
+
+此模块在每个进程中只启动一个持有 mixer 的服务线程：
+    - 播放 / 暂停 / 恢复 / 停止 / 音量等指令放入指令队列，由服务线程依次执行，调用方不阻塞
+    - 音乐结束由 mixer 的结束事件（pygame.mixer.music.set_endevent）通知，播放期间不再轮询；
+      无法使用事件队列时，按曲目时长计算唤醒时间，只在预计结束时检查一次
+    - 两个通道：music 为流式播放的音乐（同一时间一首），effect 为可叠加的短音效，
+      音效解码后缓存，重复播放不再读取文件
+    - 回调（开始播放、播放结束、出错）在单独的回调线程中按顺序执行，
+      回调中的文件写入、OBS 快捷键等耗时操作不会拖住音频线程
+
+pygame 在服务线程初始化 mixer 时才导入，导入本模块不会拖慢调用方的启动。
+
+独立运行时统计指令从提交到执行的延迟，以及音乐播放期间服务线程的唤醒次数：
+    python audio_service.py 音频文件 --seconds 5
+"""
+
+import importlib.util
+import io
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+# 服务线程启动后由 _import_pygame() 导入
+pygame = None
+MUSIC_END_EVENT = None
+COMMAND_EVENT = None
+
+# 缓存的已解码音效数量
+EFFECT_CACHE_SIZE = 16
+
+# 无法使用结束事件时，预计结束后仍在播放的复查间隔（秒）
+FALLBACK_RECHECK_INTERVAL = 0.5
+
+
+
+def is_available():
+    """pygame 是否已安装（不导入）"""
+    return pygame is not None or importlib.util.find_spec('pygame') is not None
+
+
+def _import_pygame():
+    global pygame, MUSIC_END_EVENT, COMMAND_EVENT
+    if pygame is None:
+        import pygame as module
+        MUSIC_END_EVENT = module.USEREVENT + 1
+        COMMAND_EVENT = module.USEREVENT + 2
+        pygame = module
+    return pygame
+
+
+def _load_music(path, data=None):
+    """加载音乐：有预加载的文件内容时直接从内存加载"""
+    if data is not None:
+        try:
+            pygame.mixer.music.load(io.BytesIO(data), os.path.splitext(path)[1][1:])
+            return
+        except (TypeError, pygame.error):
+            # 旧版 pygame 不支持 namehint，改为从文件加载
+            pass
+    pygame.mixer.music.load(path)
+
+
+class _MusicTrack:
+    """音乐通道上正在播放的曲目"""
+
+    def __init__(self, path, duration, on_end):
+        self.path = path
+        self.duration = duration
+        self.on_end = on_end
+        self.paused = False
+        self.deadline = None    # 无结束事件时预计结束的 time.monotonic()
+
+    def schedule_deadline(self):
+        if self.duration:
+            elapsed = max(pygame.mixer.music.get_pos(), 0) / 1000
+            self.deadline = time.monotonic() + max(self.duration - elapsed, 0)
+        else:
+            self.deadline = time.monotonic() + FALLBACK_RECHECK_INTERVAL
+
+
+class AudioService:
+    """
+    持有 pygame.mixer 的音频服务线程，所有方法都只是把指令放入队列，可在任意线程调用
+
+    参数:
+        on_error: 初始化或指令执行出错、且指令本身没有 on_error 时的回调，参数为异常
+        use_events: 是否使用 pygame 事件队列等待音乐结束；为 False 时按曲目时长定时检查
+    """
+
+    def __init__(self, on_error=None, use_events=True):
+        self.on_error = on_error
+        self.use_events = use_events
+        self._commands = queue.Queue()
+        self._callbacks = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._events_enabled = False
+        self._track = None
+        self._music_volume = 1.0
+        self._effects = OrderedDict()
+        self._closed = False
+        self.wakeups = 0
+
+    # ---- 调用方接口 ----
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='AudioService', daemon=True)
+                self._thread.start()
+                threading.Thread(target=self._callback_loop, name='AudioServiceCallbacks', daemon=True).start()
+        return self
+
+    def play_music(self, path, data=None, volume=None, duration=None, on_start=None, on_end=None, on_error=None):
+        """
+        在音乐通道播放，替换当前音乐
+
+        参数:
+            data: 预加载的音频文件内容，为 None 时从 path 读取
+            volume: 音乐通道音量，为 None 时沿用当前音量
+            duration: 曲目时长（秒），无法使用结束事件时用于计算检查时间
+            on_start: 开始播放后的回调
+            on_end: 音乐自然播放完毕后的回调（被停止或被替换时不调用）
+            on_error: 加载或播放失败时的回调，参数为异常
+        """
+        self._submit('play_music', path, data, volume, duration, on_start, on_end, on_error)
+
+    def pause(self):
+        self._submit('pause')
+
+    def resume(self):
+        self._submit('resume')
+
+    def stop(self):
+        """停止音乐通道"""
+        self._submit('stop')
+
+    def set_music_volume(self, volume):
+        self._submit('set_music_volume', volume)
+
+    def play_effect(self, path, volume=1.0, on_error=None):
+        """在音效通道播放，可与音乐及其他音效叠加"""
+        self._submit('play_effect', path, volume, on_error)
+
+    def stop_effects(self):
+        self._submit('stop_effects')
+
+    def call(self, func):
+        """在服务线程中执行 func（例如需要读取 mixer 状态时），返回 concurrent.futures.Future"""
+        from concurrent.futures import Future
+        future = Future()
+        self._submit('call', func, future)
+        return future
+
+    def close(self):
+        """停止播放并结束服务线程"""
+        self._submit('close')
+
+    # ---- 服务线程 ----
+
+    def _submit(self, name, *args):
+        self.start()
+        self._commands.put((name, args))
+        if self._events_enabled:
+            try:
+                pygame.event.post(pygame.event.Event(COMMAND_EVENT))
+            except pygame.error:
+                pass
+
+    def _report(self, callback, *args):
+        if callback is not None:
+            self._callbacks.put((callback, args))
+
+    def _report_error(self, error, on_error=None):
+        self._report(on_error or self.on_error, error)
+
+    def _callback_loop(self):
+        while True:
+            callback, args = self._callbacks.get()
+            try:
+                callback(*args)
+            except Exception as e:
+                if self.on_error and callback is not self.on_error:
+                    try:
+                        self.on_error(e)
+                    except Exception:
+                        pass
+
+    def _init_mixer(self):
+        try:
+            _import_pygame()
+        except ImportError:
+            raise RuntimeError("pygame 模块不可用")
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        if self.use_events:
+            try:
+                # 事件队列依附于 display 子系统，只初始化、不创建窗口
+                pygame.display.init()
+                pygame.event.set_allowed([MUSIC_END_EVENT, COMMAND_EVENT])
+                pygame.mixer.music.set_endevent(MUSIC_END_EVENT)
+                self._events_enabled = True
+            except pygame.error:
+                self._events_enabled = False
+
+    def _run(self):
+        try:
+            self._init_mixer()
+        except Exception as e:
+            self._report_error(e)
+            # mixer 不可用时仍然消费指令，只报告错误
+            while True:
+                name, args = self._commands.get()
+                if name == 'close':
+                    return
+                if name == 'call':
+                    args[1].set_exception(e)
+
+        # 先处理启动前提交的指令：它们提交时事件队列尚未就绪，没有对应的唤醒事件
+        self._drain_commands()
+        while not self._closed:
+            self._wait()
+            self._drain_commands()
+
+    def _wait(self):
+        """阻塞到有指令或音乐结束"""
+        if self._events_enabled:
+            event = pygame.event.wait()
+            self.wakeups += 1
+            # 同时到达的事件一并处理
+            events = [event] + pygame.event.get()
+            if any(e.type == MUSIC_END_EVENT for e in events):
+                self._check_music_end()
+            return
+
+        track = self._track
+        timeout = None
+        if track is not None and not track.paused:
+            timeout = max(track.deadline - time.monotonic(), 0)
+        try:
+            command = self._commands.get(timeout=timeout)
+        except queue.Empty:
+            self.wakeups += 1
+            self._check_music_end()
+            return
+        self.wakeups += 1
+        self._execute(command)
+
+    def _drain_commands(self):
+        while not self._closed:
+            try:
+                command = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            self._execute(command)
+
+    def _execute(self, command):
+        name, args = command
+        try:
+            getattr(self, '_do_' + name)(*args)
+        except Exception as e:
+            on_error = args[-1] if name in ('play_music', 'play_effect') else None
+            if name == 'play_music':
+                self._track = None
+            self._report_error(e, on_error)
+
+    def _check_music_end(self):
+        track = self._track
+        if track is None or track.paused:
+            return
+        if pygame.mixer.music.get_busy():
+            # 停止或替换曲目时 mixer 也会发送结束事件；仍在播放说明不是当前曲目结束
+            if not self._events_enabled:
+                track.deadline = time.monotonic() + FALLBACK_RECHECK_INTERVAL
+            return
+        self._track = None
+        self._report(track.on_end)
+
+    def _do_play_music(self, path, data, volume, duration, on_start, on_end, on_error):
+        self._track = None
+        _load_music(path, data)
+        if volume is not None:
+            self._music_volume = volume
+        pygame.mixer.music.set_volume(self._music_volume)
+        pygame.mixer.music.play()
+        track = _MusicTrack(path, duration, on_end)
+        if not self._events_enabled:
+            track.schedule_deadline()
+        self._track = track
+        self._report(on_start)
+
+    def _do_pause(self):
+        if self._track is not None and not self._track.paused:
+            pygame.mixer.music.pause()
+            self._track.paused = True
+
+    def _do_resume(self):
+        if self._track is not None and self._track.paused:
+            pygame.mixer.music.unpause()
+            self._track.paused = False
+            if not self._events_enabled:
+                self._track.schedule_deadline()
+
+    def _do_stop(self):
+        self._track = None
+        pygame.mixer.music.stop()
+
+    def _do_set_music_volume(self, volume):
+        self._music_volume = volume
+        pygame.mixer.music.set_volume(volume)
+
+    def _do_play_effect(self, path, volume, on_error):
+        sound = self._effects.get(path)
+        if sound is None:
+            sound = pygame.mixer.Sound(path)
+            self._effects[path] = sound
+            if len(self._effects) > EFFECT_CACHE_SIZE:
+                self._effects.popitem(last=False)
+        else:
+            self._effects.move_to_end(path)
+        channel = pygame.mixer.find_channel(True)
+        channel.set_volume(volume)
+        channel.play(sound)
+
+    def _do_stop_effects(self):
+        for index in range(pygame.mixer.get_num_channels()):
+            pygame.mixer.Channel(index).stop()
+
+    def _do_call(self, func, future):
+        try:
+            future.set_result(func())
+        except Exception as e:
+            future.set_exception(e)
+
+    def _do_close(self):
+        self._track = None
+        pygame.mixer.music.stop()
+        self._closed = True
+
+
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def get_audio_service(on_error=None):
+    """同一进程内共用的音频服务（首次调用时启动）"""
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            _shared_service = AudioService(on_error=on_error).start()
+        return _shared_service
+
+
+def benchmark(path, seconds=5.0, use_events=True):
+    """
+    播放 path 约 seconds 秒，统计指令延迟和服务线程唤醒次数，并与 tick(10) 轮询方式对比
+
+    返回:
+        dict: command_ms 指令提交到执行的平均延迟, wakeups 服务线程唤醒次数,
+              polling_wakeups 同样时长内 tick(10) 轮询的唤醒次数
+    """
+    service = AudioService(use_events=use_events).start()
+    latencies = []
+    for _ in range(20):
+        start = time.perf_counter()
+        service.call(lambda: None).result(5)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    finished = threading.Event()
+    errors = []
+    service.play_music(path, on_end=finished.set, on_error=errors.append)
+    wakeups = service.wakeups
+    finished.wait(seconds)
+    wakeups = service.wakeups - wakeups
+    service.close()
+    if errors:
+        raise errors[0]
+
+    return {
+        'command_ms': sum(latencies) / len(latencies),
+        'wakeups': wakeups,
+        'events': service._events_enabled,
+        'polling_wakeups': int(seconds * 10),
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='音频服务指令延迟与唤醒次数')
+    parser.add_argument('path', help='用于测试的音频文件')
+    parser.add_argument('--seconds', type=float, default=5.0, help='播放时长（秒）')
+    parser.add_argument('--no-events', action='store_true', help='不使用结束事件，改为按时长定时检查')
+    args = parser.parse_args()
+
+    result = benchmark(args.path, args.seconds, not args.no_events)
+    print(f"指令延迟: 平均 {result['command_ms']:.3f} ms")
+    print(f"播放 {args.seconds} 秒期间服务线程唤醒 {result['wakeups']} 次"
+          f"（{'结束事件' if result['events'] else '定时检查'}），tick(10) 轮询为 {result['polling_wakeups']} 次")
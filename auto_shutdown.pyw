@@ -4,9 +4,10 @@ from datetime import datetime, timedelta
 import os
 from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QLabel
 from PyQt6.QtGui import QIcon, QAction
-from PyQt6.QtCore import QTimer, Qt, QPoint
+from PyQt6.QtCore import Qt, QPoint, QObject, pyqtSignal, pyqtSlot
 import subprocess
 import ctypes
+import timer_wheel
 
 # ===== 配置部分 =====
 SHUTDOWN_HOUR = 22    # 关机时间：小时（24小时制）
@@ -17,6 +18,26 @@ SHUTDOWN_MINUTE = 10  # 关机时间：分钟
 if sys.platform == 'win32':
     ctypes.windll.user32.ShowWindow(ctypes.windll.kernel32.GetConsoleWindow(), 0)
 
+class UiDispatcher(QObject):
+    """把时间轮调度线程上触发的回调转交给界面线程执行"""
+    call = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.call.connect(self.run)
+
+    @pyqtSlot(object)
+    def run(self, func):
+        func()
+
+    def wrap(self, func):
+        return lambda: self.call.emit(func)
+
+def minutes_before(hour, minute, minutes):
+    """hour:minute 之前 minutes 分钟的时刻 (小时, 分钟)"""
+    total = (hour * 60 + minute - minutes) % (24 * 60)
+    return divmod(total, 60)
+
 class AutoShutdown:
     def __init__(self):
         self.app = QApplication(sys.argv)
@@ -68,10 +89,28 @@ class AutoShutdown:
             }
         """)
         
-        # 创建定时器，每秒更新倒计时
-        self.countdown_timer = QTimer()
-        self.countdown_timer.timeout.connect(self.update_countdown)
-        self.countdown_timer.start(1000)  # 1000毫秒 = 1秒
+        # 定时任务注册到时间轮：倒计时在每个整秒刷新，提醒和关机在各自的时刻精确触发
+        self.ui_dispatcher = UiDispatcher()
+        self.scheduler = timer_wheel.get_default_wheel(
+            on_error=lambda job, e: print(f"定时任务 {job.name} 出错: {e}")
+        )
+        self.scheduler.call_every(
+            1, self.ui_dispatcher.wrap(self.update_countdown), name='关机倒计时', anchor=datetime.min.time()
+        )
+        for minutes, title, icon in (
+            (10, "注意", QSystemTrayIcon.MessageIcon.Information),
+            (3, "警告", QSystemTrayIcon.MessageIcon.Warning),
+            (1, "警告", QSystemTrayIcon.MessageIcon.Critical),
+        ):
+            hour, minute = minutes_before(SHUTDOWN_HOUR, SHUTDOWN_MINUTE, minutes)
+            self.scheduler.call_at(
+                hour, minute,
+                self.ui_dispatcher.wrap(lambda title=title, minutes=minutes, icon=icon: self.tray.showMessage(
+                    title, f"距离关机还有{minutes}分钟！", icon, 5000
+                )),
+                name=f'关机前{minutes}分钟提醒'
+            )
+        self.scheduler.call_at(SHUTDOWN_HOUR, SHUTDOWN_MINUTE, self.ui_dispatcher.wrap(self.shutdown), name='定时关机')
         
         # 显示启动通知
         self.tray.showMessage(
@@ -111,12 +150,6 @@ class AutoShutdown:
                         font-weight: bold;
                     }
                 """)
-                if minutes == 3 and seconds == 0:
-                    self.tray.showMessage("警告", "距离关机还有3分钟！", 
-                                        QSystemTrayIcon.MessageIcon.Warning, 5000)
-                elif minutes == 1 and seconds == 0:
-                    self.tray.showMessage("警告", "距离关机还有1分钟！", 
-                                        QSystemTrayIcon.MessageIcon.Critical, 5000)
             elif minutes <= 10:  # 10分钟内显示橙色警告
                 self.countdown_label.setStyleSheet("""
                     QLabel {
@@ -128,9 +161,6 @@ class AutoShutdown:
                         font-weight: bold;
                     }
                 """)
-                if minutes == 10 and seconds == 0:
-                    self.tray.showMessage("注意", "距离关机还有10分钟！", 
-                                        QSystemTrayIcon.MessageIcon.Information, 5000)
             else:  # 其他时间显示正常样式
                 self.countdown_label.setStyleSheet("""
                     QLabel {
@@ -150,26 +180,24 @@ class AutoShutdown:
         label_width = self.countdown_label.sizeHint().width()
         self.countdown_label.move(screen.width() - label_width - 20, 20)
         self.countdown_label.show()
-        
-        # 检查是否到达关机时间
-        if (current_time.hour == SHUTDOWN_HOUR and 
-            current_time.minute == SHUTDOWN_MINUTE and 
-            current_time.second == 0):
-            self.tray.showMessage(
-                "系统即将关机",
-                f"已到达预定时间({SHUTDOWN_HOUR:02d}:{SHUTDOWN_MINUTE:02d})，系统将在1分钟后关机",
-                QSystemTrayIcon.MessageIcon.Critical,
-                5000
-            )
-            try:
-                # 先尝试取消任何现有的关机计划
-                subprocess.run(['shutdown', '/a'], shell=True)
-                time.sleep(1)  # 等待一秒确保前一个命令执行完成
-                # 执行新的关机命令
-                subprocess.run(['shutdown', '/s', '/t', '60', '/f'], shell=True)
-            except Exception as e:
-                print(f"关机命令执行错误: {e}")
-            self.quit()
+
+    def shutdown(self):
+        """到达关机时间（由时间轮在 SHUTDOWN_HOUR:SHUTDOWN_MINUTE 触发）"""
+        self.tray.showMessage(
+            "系统即将关机",
+            f"已到达预定时间({SHUTDOWN_HOUR:02d}:{SHUTDOWN_MINUTE:02d})，系统将在1分钟后关机",
+            QSystemTrayIcon.MessageIcon.Critical,
+            5000
+        )
+        try:
+            # 先尝试取消任何现有的关机计划
+            subprocess.run(['shutdown', '/a'], shell=True)
+            time.sleep(1)  # 等待一秒确保前一个命令执行完成
+            # 执行新的关机命令
+            subprocess.run(['shutdown', '/s', '/t', '60', '/f'], shell=True)
+        except Exception as e:
+            print(f"关机命令执行错误: {e}")
+        self.quit()
 
     def quit(self):
         try:
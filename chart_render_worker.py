@@ -0,0 +1,154 @@
+"""
+学习时长图表后台渲染模块
+
+原先每保存一条学习记录都会启动一次 study_log_chart.py 子进程，
+每次都要重新启动解释器并导入 pandas 和 plotly，而且会阻塞主循环。
+此模块在常驻线程中渲染图表：pandas / plotly 只导入一次，
+短时间内的多次请求会被合并，同一天的图表在 min_interval 秒内最多生成一次。
+
+mode 为 'live' 时改用 study_log_chart_live：每天只写一次静态页面，
+之后每次请求只把新增的记录追加到数据文件，耗时与当天记录数无关。
+"""
+
+import threading
+import time
+from datetime import datetime
+
+
+class ChartRenderWorker(threading.Thread):
+    """
+    常驻的图表渲染线程
+
+    参数:
+        min_interval: 两次渲染之间的最短间隔（秒）
+        on_rendered: 渲染完成后的回调，参数为 (日期, 输出路径, 本次统计信息)
+        on_error: 渲染出错时的回调，参数为 (日期, 异常)
+        mode: 'full' 每次生成完整的 HTML，'live' 只追加数据到实时图表
+    """
+
+    def __init__(self, min_interval=30.0, on_rendered=None, on_error=None, mode='full'):
+        super().__init__(name='ChartRenderWorker', daemon=True)
+        if mode not in ('full', 'live'):
+            raise ValueError(f"未知的图表模式: {mode}")
+        self.min_interval = min_interval
+        self.mode = mode
+        self.on_rendered = on_rendered
+        self.on_error = on_error
+        self._condition = threading.Condition()
+        self._pending = {}  # 日期 -> (首次请求时间, 合并的请求次数)
+        self._stopped = False
+        self._last_render = float('-inf')
+        self._renderer = None
+
+        # 统计信息
+        self.requests = 0
+        self.renders = 0
+        self.failures = 0
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._total_latency_ms = 0.0
+
+    def request(self, current_date=None):
+        """
+        请求重新生成图表，立即返回；同一日期尚未处理的请求会被合并
+
+        参数:
+            current_date: 'YYYY-MM-DD'，默认今天
+        """
+        if current_date is None:
+            current_date = datetime.now().strftime('%Y-%m-%d')
+        with self._condition:
+            first_time, count = self._pending.get(current_date, (time.monotonic(), 0))
+            self._pending[current_date] = (first_time, count + 1)
+            self.requests += 1
+            self._condition.notify()
+
+    @property
+    def queue_depth(self):
+        """尚未渲染的请求数（包括将被合并的请求）"""
+        with self._condition:
+            return sum(count for _, count in self._pending.values())
+
+    def stats(self):
+        """返回渲染统计信息"""
+        with self._condition:
+            return {
+                'requests': self.requests,
+                'renders': self.renders,
+                'failures': self.failures,
+                'queue_depth': sum(count for _, count in self._pending.values()),
+                'last_latency_ms': self.last_latency_ms,
+                'avg_latency_ms': self._total_latency_ms / self.renders if self.renders else 0.0,
+                'max_latency_ms': self.max_latency_ms,
+            }
+
+    def stop(self, timeout=None):
+        """停止渲染线程，未处理的请求会被丢弃"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self.is_alive():
+            self.join(timeout)
+
+    def _next_job(self):
+        """等待到可以渲染的时刻，取出一个待处理日期"""
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                if self._pending:
+                    delay = self._last_render + self.min_interval - time.monotonic()
+                    if delay <= 0:
+                        current_date = min(self._pending)
+                        first_time, count = self._pending.pop(current_date)
+                        return current_date, first_time, count
+                    self._condition.wait(delay)
+                else:
+                    self._condition.wait()
+
+    def _render(self, current_date):
+        if self._renderer is None:
+            # 在渲染线程中导入一次，之后常驻内存
+            if self.mode == 'live':
+                import study_log_chart_live
+                self._renderer = study_log_chart_live.render_live_chart
+            else:
+                import study_log_chart
+                self._renderer = study_log_chart.render_chart
+        return self._renderer(current_date)
+
+    def run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            current_date, first_time, count = job
+
+            start = time.monotonic()
+            try:
+                output_path = self._render(current_date)
+            except Exception as e:
+                with self._condition:
+                    self.failures += 1
+                    self._last_render = time.monotonic()
+                if self.on_error:
+                    self.on_error(current_date, e)
+                continue
+
+            end = time.monotonic()
+            latency_ms = (end - start) * 1000
+            with self._condition:
+                self._last_render = end
+                self.renders += 1
+                self.last_latency_ms = latency_ms
+                self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+                self._total_latency_ms += latency_ms
+                queue_depth = sum(c for _, c in self._pending.values())
+
+            if self.on_rendered:
+                self.on_rendered(current_date, output_path, {
+                    'latency_ms': latency_ms,
+                    'wait_ms': (start - first_time) * 1000,
+                    'coalesced': count,
+                    'queue_depth': queue_depth,
+                })
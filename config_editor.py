@@ -4,8 +4,7 @@ import json
 import os
 from tkinter import filedialog, messagebox
 import sys
-from pygame import mixer
-import threading
+import audio_service
 import re
 import tkinter as tk
 from tkinter import font
@@ -14,9 +13,8 @@ class LevelManager(ctk.CTkFrame):
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
         
-        # 初始化音频播放器
-        from pygame import mixer
-        mixer.init()
+        # 音效试听交给进程内共用的音频服务线程
+        self.audio_player = audio_service.get_audio_service()
         
         # 先加载配置文件以获取字体
         try:
@@ -877,16 +875,15 @@ class LevelManager(ctk.CTkFrame):
 
     def play_sound(self, sound_path):
         """播放音效"""
-        def play():
-            try:
-                # 确保使用完整路径
-                full_path = os.path.join("music_library", "音效", sound_path)
-                mixer.music.load(full_path)
-                mixer.music.play()
-            except Exception as e:
-                messagebox.showerror("错误", f"播放音效失败: {str(e)}")
-        
-        threading.Thread(target=play, daemon=True).start()
+        # 确保使用完整路径
+        full_path = os.path.join("music_library", "音效", sound_path)
+        if not os.path.exists(full_path):
+            messagebox.showerror("错误", f"播放音效失败: 文件不存在 {full_path}")
+            return
+        # 试听在音乐通道播放，新的试听会替换上一个
+        self.audio_player.play_music(
+            full_path, on_error=lambda e: print(f"播放音效失败: {str(e)}")
+        )
 
     def browse_font(self):
         """浏览选择字体"""
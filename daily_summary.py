@@ -0,0 +1,224 @@
+"""
+每日学习汇总索引模块
+
+多日趋势图需要每天的最终学习时长、目标和达到的级别。逐个读取几百个
+学习记录_<日期>.csv 要解析每个文件的每一行，一年的数据需要好几秒。
+
+此模块维护一份小的汇总索引 statistics/daily_summary.csv，每天一行：
+    日期, 学习时长（分钟）, 目标学习时长（分钟）, 达成率, 记录条数, 开始时间, 结束时间, 文件大小, 修改时间
+    - update_day():  某天的学习记录写完后（主程序跨日时）只汇总这一天
+    - refresh():     对比每个学习记录的大小和修改时间，只重新汇总新增或变化的文件
+    - load():        读取索引，一年只有 365 行
+
+索引用 atomic_write_text 原子替换，读取方不会读到写了一半的文件。
+每天达到的级别不写入索引，由 load() 按共用的级别表计算，修改级别配置后无需重建索引。
+
+独立运行时刷新索引并打印统计：
+    python daily_summary.py
+"""
+
+import csv
+import io
+import os
+import re
+import threading
+import time
+
+from app_state import atomic_write_text
+from level_table import get_level_table
+from study_time_parser import parse_minutes, parse_target_minutes
+
+DEFAULT_LOGS_FOLDER = os.path.join('statistics', 'study_time_logs')
+DEFAULT_INDEX_PATH = os.path.join('statistics', 'daily_summary.csv')
+
+COLUMNS = ['日期', '学习时长', '目标学习时长', '达成率', '记录条数', '开始时间', '结束时间', '文件大小', '修改时间']
+
+_LOG_NAME_PATTERN = re.compile(r'^学习记录_(\d{4}-\d{2}-\d{2})\.csv$')
+
+
+def summarize_log(csv_file_path):
+    """
+    汇总一天的学习记录
+
+    返回:
+        dict: COLUMNS 中除日期外的各项，没有有效记录时返回 None
+    """
+    stat = os.stat(csv_file_path)
+    count = 0
+    first_time = last_time = None
+    studied = target = None
+    with open(csv_file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            minutes = parse_minutes(row.get('目前已学习时长') or '')
+            if minutes is None:
+                continue
+            count += 1
+            current_time = row.get('现在时间')
+            if first_time is None:
+                first_time = current_time
+            last_time = current_time
+            # 记录按时间追加，以最后一条为当天的最终结果
+            studied = minutes
+            row_target = parse_target_minutes(row.get('目标学习时长') or '')
+            if row_target is not None:
+                target = row_target
+    if not count:
+        return None
+    return {
+        '学习时长': studied,
+        '目标学习时长': target,
+        '达成率': round(studied / target, 4) if target else None,
+        '记录条数': count,
+        '开始时间': first_time,
+        '结束时间': last_time,
+        '文件大小': stat.st_size,
+        '修改时间': stat.st_mtime_ns,
+    }
+
+
+class DailySummaryIndex:
+    """
+    每日学习汇总索引
+
+    参数:
+        index_path: 索引 CSV 路径
+        logs_folder: 学习记录目录
+    """
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH, logs_folder=DEFAULT_LOGS_FOLDER):
+        self.index_path = index_path
+        self.logs_folder = logs_folder
+        self._lock = threading.Lock()
+        self._rows = None  # 日期 -> 行
+
+        # 统计信息
+        self.last_refresh_ms = 0.0
+        self.last_refreshed_days = 0
+
+    def log_path(self, date):
+        return os.path.join(self.logs_folder, f'学习记录_{date}.csv')
+
+    def _load_rows(self):
+        if self._rows is not None:
+            return self._rows
+        rows = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8-sig', newline='') as f:
+                for row in csv.DictReader(f):
+                    rows[row['日期']] = row
+        self._rows = rows
+        return rows
+
+    def _save(self):
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        for date in sorted(self._rows):
+            writer.writerow(self._rows[date])
+        atomic_write_text(self.index_path, '\ufeff' + buffer.getvalue())
+
+    def _summarize(self, date):
+        summary = summarize_log(self.log_path(date))
+        if summary is None:
+            self._rows.pop(date, None)
+            return
+        row = {'日期': date}
+        row.update({key: '' if value is None else value for key, value in summary.items()})
+        self._rows[date] = {key: str(value) for key, value in row.items()}
+
+    def update_day(self, date):
+        """
+        重新汇总某一天（'YYYY-MM-DD'，或 date / datetime）并写回索引
+
+        当天的学习记录不存在时从索引中删除这一天。
+        """
+        if not isinstance(date, str):
+            date = date.strftime('%Y-%m-%d')
+        with self._lock:
+            self._load_rows()
+            if os.path.exists(self.log_path(date)):
+                self._summarize(date)
+            else:
+                self._rows.pop(date, None)
+            self._save()
+
+    def refresh(self):
+        """
+        只重新汇总新增、修改过或已删除的学习记录
+
+        返回:
+            int: 重新汇总的天数
+        """
+        start = time.perf_counter()
+        with self._lock:
+            rows = self._load_rows()
+            seen = set()
+            changed = []
+            if os.path.isdir(self.logs_folder):
+                for entry in os.scandir(self.logs_folder):
+                    match = _LOG_NAME_PATTERN.match(entry.name)
+                    if not match:
+                        continue
+                    date = match.group(1)
+                    seen.add(date)
+                    stat = entry.stat()
+                    row = rows.get(date)
+                    if row is None or row['文件大小'] != str(stat.st_size) or row['修改时间'] != str(stat.st_mtime_ns):
+                        changed.append(date)
+            removed = [date for date in rows if date not in seen]
+            if changed or removed:
+                for date in changed:
+                    self._summarize(date)
+                for date in removed:
+                    rows.pop(date)
+                self._save()
+            self.last_refreshed_days = len(changed) + len(removed)
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+        return self.last_refreshed_days
+
+    def load(self):
+        """
+        返回按日期排序的汇总行
+
+        返回:
+            list: [dict]，数值列已转换为 int / float，空值为 None；另有当天达到的 '级别'（未达到任何级别时为 None）
+        """
+        with self._lock:
+            rows = [dict(self._load_rows()[date]) for date in sorted(self._load_rows())]
+        level_table = get_level_table()
+        for row in rows:
+            for key in ('学习时长', '目标学习时长', '记录条数'):
+                row[key] = int(row[key]) if row[key] else None
+            row['达成率'] = float(row['达成率']) if row['达成率'] else None
+            row['级别'] = level_table.level_for_minutes(row['学习时长']) if row['学习时长'] is not None else None
+        return rows
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_index():
+    """主程序和趋势图共用的汇总索引"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DailySummaryIndex()
+        return _default_index
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='刷新每日学习汇总索引')
+    parser.add_argument('--logs', default=DEFAULT_LOGS_FOLDER, help='学习记录目录')
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='索引文件')
+    args = parser.parse_args()
+
+    index = DailySummaryIndex(args.index, args.logs)
+    refreshed = index.refresh()
+    rows = index.load()
+    print(f"索引共 {len(rows)} 天，本次重新汇总 {refreshed} 天，耗时 {index.last_refresh_ms:.0f} ms")
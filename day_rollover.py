@@ -0,0 +1,91 @@
+"""
+跨日轮换模块
+
+主程序启动时就确定了当天的学习记录 CSV、终端日志文件和当周的昼夜表，
+已奖励的半小时节点、当前级别等状态也只在启动时初始化一次。
+连续运行过零点或跨周后，仍然向前一天的文件写入，内存中的状态也不断累积。
+
+此模块在调用方的线程中检测日期变化，并按顺序执行注册的处理函数：
+    - on_day:   每天零点之后第一次检查时调用，用于轮换当天的文件路径、清空每日状态
+    - on_week:  按 week_start 计算的周数变化时调用（在 on_day 之后），用于切换当周昼夜表
+处理函数的参数为 (新日期, 旧日期)，均为 datetime.date。
+某个处理函数出错时交给 on_error，其余处理函数照常执行。
+
+用法:
+    rollover = DayRollover(week_start=start_date)
+    rollover.on_day(rotate_study_log)
+    rollover.on_week(switch_week_file)
+    ...
+    if rollover.check():          # 主循环每轮开始时调用
+        watcher.update_paths(get_watched_paths())
+"""
+
+import time
+from datetime import datetime
+
+
+class DayRollover:
+    """
+    日期变化检测与每日状态轮换
+
+    参数:
+        week_start: 第 1 周的第一天（datetime 或 date），为 None 时按 ISO 周计算
+        on_error: 处理函数出错时的回调，参数为 (处理函数, 异常)
+        clock: 返回当前 datetime 的函数
+    """
+
+    def __init__(self, week_start=None, on_error=None, clock=datetime.now):
+        if isinstance(week_start, datetime):
+            week_start = week_start.date()
+        self.week_start = week_start
+        self.on_error = on_error
+        self.clock = clock
+        self.current_day = clock().date()
+        self._handlers = {'day': [], 'week': []}
+
+        # 统计信息
+        self.rollovers = 0
+        self.last_rollover_ms = 0.0
+
+    def on_day(self, func):
+        self._handlers['day'].append(func)
+        return func
+
+    def on_week(self, func):
+        self._handlers['week'].append(func)
+        return func
+
+    def week_number(self, day):
+        """day 所在的周数，与主程序查找昼夜表文件时的计算方式一致"""
+        if self.week_start is None:
+            year, week, _ = day.isocalendar()
+            return (year, week)
+        return (day - self.week_start).days // 7 + 1
+
+    def check(self):
+        """
+        检查日期是否变化，变化时依次执行处理函数
+
+        返回:
+            bool: 本次是否发生了轮换
+        """
+        today = self.clock().date()
+        if today == self.current_day:
+            return False
+
+        start = time.perf_counter()
+        previous, self.current_day = self.current_day, today
+        kinds = ['day']
+        if self.week_number(today) != self.week_number(previous):
+            kinds.append('week')
+        for kind in kinds:
+            for func in self._handlers[kind]:
+                try:
+                    func(today, previous)
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(func, e)
+        self.rollovers += 1
+        self.last_rollover_ms = (time.perf_counter() - start) * 1000
+        return True
+
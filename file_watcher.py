@@ -0,0 +1,186 @@
+"""
+文件变化监听模块
+
+主循环原先每 2 秒醒来一次检查昼夜表和各个信号文件。
+此模块在 Linux 上使用 inotify（通过 ctypes 调用，无需额外依赖）监听文件所在目录，
+只有被监听的文件真正被写入或替换时才唤醒调用方；其他平台退回到轮询文件状态。
+
+用法:
+    watcher = create_watcher([excel_file, signal_path])
+    changed = watcher.wait(timeout=300)   # 返回发生变化的文件路径集合，超时返回空集合
+"""
+
+import os
+import select
+import struct
+import sys
+import time
+from datetime import datetime, timedelta
+
+# inotify 事件掩码
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+
+# 只关心写入完成和重命名替换（Excel、原子写入都会先写临时文件再改名）
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _normalize(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class PollingWatcher:
+    """通过定期比较文件修改时间和大小检测变化，适用于所有平台"""
+
+    def __init__(self, paths, interval=1.0):
+        self.interval = interval
+        self._snapshots = {}
+        self.update_paths(paths)
+
+    def _snapshot(self, path):
+        try:
+            stat = os.stat(path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def update_paths(self, paths):
+        """替换监听的文件列表，新文件以当前状态为基准"""
+        snapshots = {}
+        for path in paths:
+            key = _normalize(path)
+            snapshots[key] = self._snapshots.get(key, self._snapshot(key))
+        self._snapshots = snapshots
+
+    def _changed(self):
+        changed = set()
+        for path, old in self._snapshots.items():
+            new = self._snapshot(path)
+            if new != old:
+                self._snapshots[path] = new
+                # 文件被删除（如信号处理完毕）不算需要处理的变化
+                if new is not None:
+                    changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        """阻塞直到有文件变化或超时，返回发生变化的文件路径集合"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self._changed()
+            if changed:
+                return changed
+            if deadline is None:
+                time.sleep(self.interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        self._snapshots = {}
+
+
+class InotifyWatcher:
+    """基于 Linux inotify 的监听器，监听文件所在目录并按文件名过滤事件"""
+
+    def __init__(self, paths):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._dir_by_wd = {}
+        self._wd_by_dir = {}
+        self._paths = set()
+        self.update_paths(paths)
+
+    def _add_dir(self, directory):
+        if directory in self._wd_by_dir:
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            # 目录不存在时暂不监听，文件出现后由调用方重新 update_paths
+            return
+        self._wd_by_dir[directory] = wd
+        self._dir_by_wd[wd] = directory
+
+    def update_paths(self, paths):
+        """替换监听的文件列表，按需增删目录监听"""
+        self._paths = {_normalize(path) for path in paths}
+        wanted_dirs = {os.path.dirname(path) for path in self._paths}
+        for directory in list(self._wd_by_dir):
+            if directory not in wanted_dirs:
+                wd = self._wd_by_dir.pop(directory)
+                self._dir_by_wd.pop(wd, None)
+                self._libc.inotify_rm_watch(self._fd, wd)
+        for directory in wanted_dirs:
+            self._add_dir(directory)
+
+    def _read_events(self):
+        changed = set()
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buffer):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # 事件队列溢出，无法确定哪些文件变化，全部视为已变化
+                    changed.update(self._paths)
+                    continue
+                directory = self._dir_by_wd.get(wd)
+                if directory is None or not name:
+                    continue
+                path = _normalize(os.path.join(directory, os.fsdecode(name)))
+                if path in self._paths:
+                    changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        """阻塞直到有文件变化或超时，返回发生变化的文件路径集合"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(paths, poll_interval=1.0):
+    """创建当前平台可用的监听器：Linux 使用 inotify，其余平台使用轮询"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, poll_interval)
+
+
+def seconds_until(hour, minute, now=None):
+    """距离下一个 hour:minute 的秒数（今天已过则为明天）"""
+    now = now or datetime.now()
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
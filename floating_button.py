@@ -9,10 +9,13 @@ import threading
 import time
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLabel, 
                             QHBoxLayout, QGraphicsDropShadowEffect, QMenu, QAction)
-from PyQt5.QtCore import Qt, QPoint, QTimer, QPropertyAnimation, QEasingCurve, QRect, QRectF
+from PyQt5.QtCore import Qt, QPoint, QTimer, QPropertyAnimation, QEasingCurve, QRect, QRectF, QObject, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QCursor, QColor, QFont, QPainter, QLinearGradient, QRadialGradient, QPainterPath, QPen, QBrush
 import subprocess
 from datetime import datetime, timedelta
+import message_bus
+import timer_wheel
+from study_time_parser import parse_minutes
 
 # 导入33娘
 try:
@@ -26,6 +29,22 @@ except ImportError:
 app_instance = None
 button_instance = None
 
+class UiDispatcher(QObject):
+    """把时间轮调度线程上触发的回调转交给界面线程执行"""
+    call = pyqtSignal(object)
+    
+    def __init__(self):
+        super().__init__()
+        self.call.connect(self.run)
+    
+    @pyqtSlot(object)
+    def run(self, func):
+        func()
+    
+    def wrap(self, func):
+        """返回一个在任意线程调用、实际在界面线程执行 func 的函数"""
+        return lambda: self.call.emit(func)
+
 class ModernLabel(QLabel):
     """现代化标签，支持渐变文字和悬停效果"""
     def __init__(self, text, parent=None):
@@ -343,6 +362,11 @@ class FloatingButton(QWidget):
         self.neko33_enabled = True  # 默认显示
         self.neko33_pet = None
         
+        # 消息总线：优先通过总线发送控制指令并接收主程序广播的播放状态
+        self.bus_status = None
+        self.message_bus = message_bus.get_shared_client()
+        self.message_bus.subscribe(self.on_bus_status, message_bus.MSG_STATUS)
+        
         # 设置窗口属性
         self.setWindowFlags(
             Qt.FramelessWindowHint |  # 无边框
@@ -358,23 +382,24 @@ class FloatingButton(QWidget):
         self.dragging = False
         self.offset = QPoint()
         
-        # 设置定时器更新时间
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_time)
-        self.timer.start(1000)  # 每秒更新一次
+        # 定时任务注册到进程内共用的时间轮，回调转交给界面线程执行
+        self.ui_dispatcher = UiDispatcher()
+        self.scheduler = timer_wheel.get_default_wheel(
+            on_error=lambda job, e: print(f"定时任务 {job.name} 出错: {e}")
+        )
+        
+        # 在每个整秒更新时间
+        self.clock_job = self.scheduler.call_every(
+            1, self.ui_dispatcher.wrap(self.update_time), name='悬浮按钮时钟', anchor=datetime.min.time()
+        )
         
         # 添加提示信息
         self.setToolTip("双击打开昼夜表")
         
-        # 初始化热力图更新定时器
-        self.heatmap_timer = QTimer(self)
-        self.heatmap_timer.timeout.connect(self.update_heatmap)
-        self.heatmap_timer.start(300000)  # 每5分钟更新一次
-        
-        # 添加状态检查定时器
-        self.status_timer = QTimer(self)
-        self.status_timer.timeout.connect(self.check_status_updates)
-        self.status_timer.start(1000)  # 每秒检查一次
+        # 每5分钟更新一次热力图
+        self.heatmap_job = self.scheduler.call_every(
+            300, self.ui_dispatcher.wrap(self.update_heatmap), name='悬浮按钮热力图'
+        )
         
         # 初始化33娘（如果可用）
         if NEKO33_AVAILABLE:
@@ -532,15 +557,8 @@ class FloatingButton(QWidget):
             # 计算一天的总时间（分钟）
             total_day_minutes = (day_end - day_start).total_seconds() / 60
             
-            # 解析已学习时间
-            study_hours, study_minutes = 0, 0
-            if "时" in self.study_time and "分" in self.study_time:
-                parts = self.study_time.split("时")
-                study_hours = int(parts[0])
-                study_minutes = int(parts[1].replace("分", ""))
-            
-            # 计算已学习的总分钟数
-            study_total_minutes = study_hours * 60 + study_minutes
+            # 解析已学习时间，计算已学习的总分钟数
+            study_total_minutes = parse_minutes(self.study_time) or 0
             
             # 计算学习时间占比
             if elapsed_minutes > 0:
@@ -697,11 +715,7 @@ class FloatingButton(QWidget):
         # 检查是否暂停
         is_paused = False
         try:
-            status_path = self.get_music_status_path()
-            if os.path.exists(status_path):
-                with open(status_path, 'r', encoding='utf-8') as f:
-                    status = json.load(f)
-                is_paused = status.get('is_paused', False)
+            is_paused = self.get_music_status().get('is_paused', False)
         except:
             pass
         
@@ -976,8 +990,12 @@ class FloatingButton(QWidget):
             print(f"设置音量时出错: {e}")
     
     def send_volume_change_signal(self, volume):
-        """发送音量变更信号"""
+        """发送音量变更信号，消息总线不可用时写入信号文件"""
         try:
+            if self.message_bus.publish(message_bus.volume_message(volume)):
+                print(f"已通过消息总线发送音量变更: {int(volume * 100)}%")
+                return
+            
             signal_path = os.path.join(os.path.dirname(__file__), "volume_change_signal.json")
             signal_data = {
                 'volume': volume,
@@ -1120,23 +1138,27 @@ class FloatingButton(QWidget):
         """获取音乐播放状态文件路径"""
         return os.path.join(os.path.dirname(__file__), "music_playing_status.json")
     
-    def check_status_updates(self):
-        """定期检查状态更新"""
-        # 这里可以添加任何需要定期检查的逻辑
-        # 目前主要用于确保状态文件是最新的
-        pass
+    def on_bus_status(self, message):
+        """消息总线上的播放状态广播（在总线线程中调用，只保存最新状态）"""
+        self.bus_status = message
+    
+    def get_music_status(self):
+        """获取播放状态：已连接消息总线时使用广播的状态，否则读取状态文件"""
+        if self.message_bus.connected and self.bus_status is not None:
+            return self.bus_status
+        status_path = self.get_music_status_path()
+        if os.path.exists(status_path):
+            with open(status_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
     
     def get_current_streaming_mode(self):
         """获取当前是否为直播模式"""
         try:
-            # 首先尝试从状态文件读取
-            status_path = self.get_music_status_path()
-            if os.path.exists(status_path):
-                with open(status_path, 'r', encoding='utf-8') as f:
-                    status = json.load(f)
-                streaming_mode = status.get('streaming_mode')
-                if streaming_mode is not None:
-                    return streaming_mode
+            # 首先尝试从播放状态读取
+            streaming_mode = self.get_music_status().get('streaming_mode')
+            if streaming_mode is not None:
+                return streaming_mode
             
             # 如果状态文件中没有，从配置文件读取
             config = self.load_config()
@@ -1147,19 +1169,18 @@ class FloatingButton(QWidget):
     def is_music_playing(self):
         """检查音乐是否正在播放"""
         try:
-            status_path = self.get_music_status_path()
-            if os.path.exists(status_path):
-                with open(status_path, 'r', encoding='utf-8') as f:
-                    status = json.load(f)
-                return status.get('is_playing', False)
-            return False
+            return self.get_music_status().get('is_playing', False)
         except Exception as e:
             print(f"检查音乐播放状态时出错: {e}")
             return False
     
     def send_music_control_signal(self, action):
-        """发送音乐控制信号给主程序"""
+        """发送音乐控制信号给主程序，消息总线不可用时写入信号文件"""
         try:
+            if self.message_bus.publish(message_bus.control_message(action)):
+                print(f"已通过消息总线发送音乐控制信号: {action}")
+                return
+            
             signal_path = self.get_music_control_signal_path()
             signal_data = {
                 'action': action,  # 'play', 'pause', 'stop'
@@ -0,0 +1,98 @@
+"""
+动画帧缓存模块
+
+同一天的学习时长动画每次重新生成时，前面的帧与上次完全相同，只有新增记录对应的帧是新的。
+此模块按内容地址保存渲染好的 PNG 帧：
+    学习时长图表视频/帧缓存/<日期>/<键>.png
+键由调用方根据帧的全部输入计算（见 study_log_chart_frames.frame_keys），
+输入不变时键不变，直接读取缓存；样式或数据变化时键随之变化，旧文件在 prune 时清理。
+
+只保留最近 max_days 天的缓存目录，避免缓存无限增长。
+"""
+
+import os
+import re
+
+DEFAULT_CACHE_FOLDER = os.path.join('学习时长图表视频', '帧缓存')
+
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+class FrameCache:
+    """
+    一天的动画帧缓存
+
+    参数:
+        date: 'YYYY-MM-DD'
+        cache_folder: 缓存根目录，每天一个子目录
+        max_days: 保留缓存的天数（按日期取最近的几天）
+    """
+
+    def __init__(self, date, cache_folder=DEFAULT_CACHE_FOLDER, max_days=7):
+        self.date = date
+        self.cache_folder = cache_folder
+        self.folder = os.path.join(cache_folder, date)
+        self.max_days = max_days
+
+        # 统计信息
+        self.hits = 0
+        self.stored = 0
+        self.bytes_written = 0
+
+    def path(self, key):
+        return os.path.join(self.folder, f'{key}.png')
+
+    def contains(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        """读取缓存的帧，不存在时返回 None"""
+        try:
+            with open(self.path(key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """保存一帧；先写临时文件再替换，中途退出不会留下不完整的帧"""
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.stored += 1
+        self.bytes_written += len(data)
+
+    def prune(self, keep_keys):
+        """
+        删除当天不再使用的帧，以及最近 max_days 天以外的缓存目录
+
+        返回:
+            int: 删除的文件数
+        """
+        import shutil
+
+        removed = 0
+        keep = {f'{key}.png' for key in keep_keys}
+        if os.path.isdir(self.folder):
+            for entry in os.scandir(self.folder):
+                if entry.is_file() and entry.name not in keep:
+                    os.remove(entry.path)
+                    removed += 1
+
+        if os.path.isdir(self.cache_folder):
+            dates = sorted(
+                (entry.name for entry in os.scandir(self.cache_folder)
+                 if entry.is_dir() and _DATE_PATTERN.match(entry.name)),
+                reverse=True
+            )
+            for date in dates[self.max_days:]:
+                if date == self.date:
+                    continue
+                folder = os.path.join(self.cache_folder, date)
+                removed += len(os.listdir(folder))
+                shutil.rmtree(folder, ignore_errors=True)
+        return removed
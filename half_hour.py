@@ -1,6 +1,5 @@
 import sys
 import os
-import threading
 import time
 import signal
 from datetime import datetime, timedelta
@@ -17,7 +16,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QTime
 from PyQt5.QtGui import QIcon
-import pygame
+import audio_service
+import timer_wheel
 
 
 class TimeSetter(QWidget):
@@ -97,57 +97,44 @@ def show_time_setter(initial_time, initial_volume):
 class Scheduler:
     def __init__(self, sound_path, initial_volume=0.07):
         self.sound_path = sound_path
-        self.scheduler_thread = None
-        self.stop_event = threading.Event()
+        self.job = None
         self.start_time = None
         self.volume = initial_volume
-        pygame.mixer.init()
+        # 报时注册到时间轮，音效交给音频服务线程播放
+        self.wheel = timer_wheel.get_default_wheel(
+            on_error=lambda job, e: print(f"定时任务 {job.name} 出错: {e}")
+        )
+        self.audio_player = audio_service.get_audio_service(on_error=lambda e: print(f"播放音效时出错: {e}"))
 
     def set_start_time_and_volume(self, start_time, volume):
         self.start_time = start_time
         self.volume = volume
-        pygame.mixer.music.set_volume(self.volume)
+        self.audio_player.set_music_volume(self.volume)
         print(f"已成功设置起始时间为 {self.start_time.strftime('%H:%M')}，音量为 {int(self.volume * 100)}%")
 
     def start(self):
-        if self.scheduler_thread and self.scheduler_thread.is_alive():
-            self.stop()
-        self.stop_event.clear()
-        self.scheduler_thread = threading.Thread(target=self.run)
-        self.scheduler_thread.daemon = True
-        self.scheduler_thread.start()
+        self.stop()
+        if not self.start_time:
+            print("未设置起始时间。")
+            return
+        # 从起始时间起每30分钟报时一次（按墙上时间对齐，不会累积漂移）
+        self.job = self.wheel.call_every(
+            30 * 60, self.on_time_signal, name='半小时报时', anchor=self.start_time
+        )
+        next_time = timer_wheel.next_wall_time(self.start_time, 30 * 60, datetime.now() - timedelta(microseconds=1))
+        print(f"等待直到 {next_time.strftime('%H:%M')} 播放音效。")
 
     def stop(self):
-        self.stop_event.set()
-        if self.scheduler_thread and self.scheduler_thread.is_alive():
-            self.scheduler_thread.join()
-
-    def run(self):
-        while not self.stop_event.is_set():
-            now = datetime.now()
-            if not self.start_time:
-                print("未设置起始时间。")
-                time.sleep(1)
-                continue
-
-            # 计算下一个报时时间
-            next_time = now.replace(hour=self.start_time.hour, minute=self.start_time.minute, second=0, microsecond=0)
-            if next_time < now:
-                # 计算下一个符合30分钟间隔的时间点
-                delta_minutes = 30
-                intervals = ((now - next_time).seconds // (delta_minutes * 60)) + 1
-                next_time += timedelta(minutes=delta_minutes * intervals)
-
-            wait_seconds = (next_time - now).total_seconds()
-            print(f"等待直到 {next_time.strftime('%H:%M')} 播放音效。")
-            if self.stop_event.wait(timeout=wait_seconds):
-                break
-
-            # 播放音效
-            self.play_sound(next_time.strftime('%H:%M'))
-
-            # 设置下一个播放时间
-            self.start_time = (next_time + timedelta(minutes=30)).time()
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+
+    def on_time_signal(self):
+        current_time = self.job.wall_deadline - timedelta(minutes=30) if self.job else datetime.now()
+        self.play_sound(current_time.strftime('%H:%M'))
+
+        # 设置下一个播放时间
+        self.start_time = (current_time + timedelta(minutes=30)).time()
 
     def play_sound(self, current_time_str):
         next_time_dt = datetime.strptime(current_time_str, '%H:%M') + timedelta(minutes=30)
@@ -157,16 +144,7 @@ class Scheduler:
         if not os.path.exists(sound_path):
             print(f"音效文件未找到: {sound_path}")
             return
-        try:
-            pygame.mixer.music.load(sound_path)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                if self.stop_event.is_set():
-                    pygame.mixer.music.stop()
-                    break
-                time.sleep(0.1)
-        except Exception as e:
-            print(f"播放音效时出错: {e}")
+        self.audio_player.play_music(sound_path, volume=self.volume)
 
 
 def main():
@@ -206,7 +184,8 @@ def main():
 
     try:
         while True:
-            time.sleep(1)
+            # 报时由时间轮触发，主线程只等待 Ctrl+C（time.sleep 可被信号打断）
+            time.sleep(60)
     except KeyboardInterrupt:
         # 这个异常会被 signal_handler 处理
         pass
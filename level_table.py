@@ -0,0 +1,280 @@
+"""
+学习时长级别表模块
+
+config.json 中的级别区间原先在多处各自读取、各自逐个比较：主循环判断当前级别、
+33娘按学习时长选台词、歌单播放次数汇总计算每天的奖励次数、几个图表脚本生成色带。
+每处都要重新读取并解析一次 JSON，判断规则也各写各的。
+
+此模块把级别区间编译成按开始时间排序的数组，所有模块共用同一份：
+    - level_for_minutes / level_for_hours 用二分查找定位级别，O(log n)
+    - levels_for_array 对整列学习时长一次性查出级别下标（numpy.searchsorted）
+    - plays_for_hours 一次算出多天 × 各级别的奖励次数
+    - get_level_table() 按 config.json 的修改时间和大小缓存，文件被保存后自动重新编译
+
+区间为左闭右开 [start, end)，不在任何区间内的时长没有级别。
+
+独立运行时对比逐个比较与二分查找的耗时：
+    python level_table.py --samples 100000
+"""
+
+import bisect
+import json
+import os
+import threading
+
+CONFIG_FILE = 'config.json'
+
+
+def level_code(name):
+    """级别名称中的代号，如 'CC 梦想、梦境' -> 'CC'"""
+    return name.split()[0] if name else name
+
+
+class Level:
+    """一个级别：名称、开始 / 结束小时、随机首数和色带颜色"""
+
+    def __init__(self, name, start, end, random_count=0, color=None):
+        self.name = name
+        self.start = float(start)
+        self.end = float(end)
+        self.random_count = int(random_count)
+        self.color = color
+
+    @property
+    def code(self):
+        return level_code(self.name)
+
+
+class LevelTable:
+    """
+    编译后的级别表
+
+    参数:
+        levels: Level 列表，按开始时间排序后保存
+    """
+
+    def __init__(self, levels):
+        self.levels = sorted(levels, key=lambda level: level.start)
+        # 以分钟为单位的边界，学习时长按整分钟比较，避免小时小数的舍入误差
+        self._starts = [round(level.start * 60) for level in self.levels]
+        self._ends = [round(level.end * 60) for level in self.levels]
+        self._arrays = None
+
+    @classmethod
+    def from_config(cls, config):
+        """由 config.json 的内容编译"""
+        return cls([
+            Level(level['name'], level['start'], level['end'], level.get('random_count', 0), level.get('color'))
+            for level in config.get('levels', [])
+        ])
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __iter__(self):
+        return iter(self.levels)
+
+    @property
+    def names(self):
+        return [level.name for level in self.levels]
+
+    def index_for_minutes(self, total_minutes):
+        """学习分钟数所属级别的下标，不在任何级别范围内时返回 -1"""
+        index = bisect.bisect_right(self._starts, total_minutes) - 1
+        if index >= 0 and total_minutes < self._ends[index]:
+            return index
+        return -1
+
+    def level_for_minutes(self, total_minutes):
+        """学习分钟数所属的级别名称，不在任何级别范围内时返回 None"""
+        index = self.index_for_minutes(total_minutes)
+        return self.levels[index].name if index >= 0 else None
+
+    def level_for_hours(self, hours):
+        """学习小时数所属的级别名称，不在任何级别范围内时返回 None"""
+        return self.level_for_minutes(hours * 60)
+
+    def _get_arrays(self):
+        if self._arrays is None:
+            import numpy as np
+            self._arrays = (
+                np.array(self._starts, dtype=float),
+                np.array(self._ends, dtype=float),
+                np.array([level.start for level in self.levels], dtype=float),
+                np.array([level.random_count for level in self.levels], dtype=int),
+            )
+        return self._arrays
+
+    def levels_for_array(self, total_minutes):
+        """
+        对一组学习分钟数批量查找级别
+
+        参数:
+            total_minutes: 可转换为 numpy 数组的分钟数（NaN 视为没有级别）
+
+        返回:
+            numpy.ndarray: 每个元素所属级别的下标，没有级别时为 -1；
+            下标对应 self.levels，可用 numpy.array(self.names)[下标] 取名称
+        """
+        import numpy as np
+
+        starts, ends, _, _ = self._get_arrays()
+        minutes = np.asarray(total_minutes, dtype=float)
+        if not len(self.levels):
+            return np.full(minutes.shape, -1, dtype=int)
+        index = np.searchsorted(starts, minutes, side='right') - 1
+        valid = (index >= 0) & (minutes < ends[np.clip(index, 0, None)])
+        return np.where(valid, index, -1)
+
+    def plays_for_hours(self, hours):
+        """
+        学习 hours 小时的一天中，每个级别播放奖励音乐的次数
+
+        每个级别从开始时间起每半小时奖励一次，最多 random_count 次。
+
+        参数:
+            hours: 一天或多天的学习小时数
+
+        返回:
+            numpy.ndarray: 形状为 (天数, 级别数) 的整数数组，hours 为标量时为 (级别数,)
+        """
+        import numpy as np
+
+        _, _, level_starts, random_counts = self._get_arrays()
+        hours = np.asarray(hours, dtype=float)
+        effective = hours[..., None] - level_starts
+        plays = np.floor(effective / 0.5) + 1
+        plays = np.where(effective < 0, 0, np.minimum(plays, random_counts))
+        return plays.astype(int)
+
+    def color_ranges(self):
+        """图表色带：[(开始小时, 结束小时, 颜色, 名称)]"""
+        return [(level.start, level.end, level.color, level.name) for level in self.levels]
+
+    def level_config(self):
+        """主程序使用的 [(名称, 开始小时, 结束小时, 随机首数)]"""
+        return [(level.name, level.start, level.end, level.random_count) for level in self.levels]
+
+
+class LevelTableCache:
+    """按 config.json 的修改时间和大小缓存编译结果"""
+
+    def __init__(self, config_file=CONFIG_FILE):
+        self.config_file = config_file
+        self._lock = threading.Lock()
+        self._signature = None
+        self._table = None
+        self.loads = 0
+        self.last_error = None
+
+    def get(self):
+        """
+        返回当前配置的级别表，配置文件未变化时直接使用缓存
+
+        配置编辑器保存到一半时文件可能暂时无法解析：已有缓存时继续使用旧的级别表，
+        下次检查时再重新读取；从未成功加载过时抛出 OSError / ValueError / KeyError。
+        """
+        try:
+            stat = os.stat(self.config_file)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            with self._lock:
+                if signature == self._signature:
+                    return self._table
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                table = LevelTable.from_config(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            with self._lock:
+                self.last_error = e
+                if self._table is not None:
+                    return self._table
+            raise
+        with self._lock:
+            self._signature = signature
+            self._table = table
+            self.loads += 1
+        return table
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_level_table(config_file=CONFIG_FILE):
+    """各模块共用的级别表（同一配置文件只编译一次，文件修改后自动重新编译）"""
+    key = os.path.abspath(config_file)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = LevelTableCache(config_file)
+    return cache.get()
+
+
+def _linear_level_for_minutes(level_config, total_minutes):
+    """原先各处的逐个比较写法，用于基准测试对比"""
+    for level, start_hour, end_hour, _ in level_config:
+        if start_hour * 60 <= total_minutes < end_hour * 60:
+            return level
+    return None
+
+
+def benchmark(samples=100000, config_file=CONFIG_FILE, seed=0):
+    """
+    对比逐个比较、二分查找和批量查找的耗时，并确认三者结果一致
+
+    返回:
+        dict: linear_us / bisect_us 每次查找的平均耗时（微秒）, array_ms 批量查找总耗时（毫秒）,
+              cached_us 配置未变化时 get_level_table 的平均耗时（微秒）
+    """
+    import random
+    import time
+
+    import numpy as np
+
+    table = get_level_table(config_file)
+    level_config = table.level_config()
+    rng = random.Random(seed)
+    minutes = [rng.randint(0, 16 * 60) for _ in range(samples)]
+
+    start = time.perf_counter()
+    linear = [_linear_level_for_minutes(level_config, m) for m in minutes]
+    linear_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bisected = [table.level_for_minutes(m) for m in minutes]
+    bisect_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexes = table.levels_for_array(minutes)
+    array_s = time.perf_counter() - start
+
+    names = np.array(table.names + [None], dtype=object)
+    assert linear == bisected == list(names[indexes])
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        get_level_table(config_file)
+    cached_s = time.perf_counter() - start
+
+    return {
+        'levels': len(table),
+        'linear_us': linear_s * 1e6 / samples,
+        'bisect_us': bisect_s * 1e6 / samples,
+        'array_ms': array_s * 1000,
+        'cached_us': cached_s * 1e6 / 1000,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='级别查找耗时对比')
+    parser.add_argument('--samples', type=int, default=100000, help='查找次数')
+    parser.add_argument('--config', default=CONFIG_FILE, help='配置文件')
+    args = parser.parse_args()
+
+    result = benchmark(args.samples, args.config)
+    print(f"{result['levels']} 个级别，{args.samples} 次查找")
+    print(f"逐个比较:   平均 {result['linear_us']:.3f} us")
+    print(f"二分查找:   平均 {result['bisect_us']:.3f} us")
+    print(f"批量查找:   共 {result['array_ms']:.2f} ms")
+    print(f"读取缓存的级别表: 平均 {result['cached_us']:.2f} us（原先每次读取并解析 config.json）")
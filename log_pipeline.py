@@ -0,0 +1,167 @@
+"""
+终端日志输出模块
+
+原先的 log_and_print 每次调用都新建一个 Console(record=True)，
+用一个只增不减的 set 记录打印过的内容来去重，并在调用线程中同步写日志文件。
+连续运行多天后 set 持续增长，磁盘较慢时主循环也会被日志写入拖住。
+
+此模块:
+    - 用容量固定的 LRU 缓存去重，内存占用不随运行时间增长
+    - 复用同一个捕获用 Console 导出 rich 表格 / 面板的纯文本
+    - 日志记录先放入有界队列，由 QueueListener 的后台线程写入文件；
+      队列满时丢弃记录并计数，调用方永远不会因磁盘阻塞
+    - 跨日时用 switch_log_file 把写入切换到新的日志文件，不需要重建队列和监听线程
+"""
+
+import atexit
+import logging
+import os
+import logging.handlers
+import queue
+import threading
+from collections import OrderedDict
+
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+
+# 去重缓存保留的最近内容条数
+DEFAULT_DEDUP_SIZE = 4096
+
+# 等待写入文件的日志记录上限
+DEFAULT_QUEUE_SIZE = 10000
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class LRUSet:
+    """容量固定的集合，超出容量时淘汰最久未出现的元素"""
+
+    def __init__(self, maxsize=DEFAULT_DEDUP_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def add(self, item):
+        """
+        加入元素
+
+        返回:
+            bool: 元素此前不在集合中时返回 True
+        """
+        if item in self._items:
+            self._items.move_to_end(item)
+            return False
+        self._items[item] = None
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return True
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """队列已满时丢弃日志记录而不是阻塞或报错"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_file_logging(log_file_path, level=logging.INFO, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    配置根日志记录器：记录进入有界队列，由后台线程追加写入 log_file_path
+
+    返回:
+        (logger, listener): 根日志记录器和已启动的 QueueListener；
+        程序退出时会自动停止监听线程并写完队列中剩余的记录
+    """
+    file_handler = logging.FileHandler(log_file_path, mode='a', encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+
+    logger = logging.getLogger()
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return logger, listener
+
+
+def switch_log_file(listener, log_file_path):
+    """
+    把监听线程写入的日志文件切换为 log_file_path（追加写入），旧文件写完后关闭
+
+    切换在文件处理器的锁内完成，监听线程正在写的记录不会丢失或写入已关闭的文件。
+    """
+    for handler in listener.handlers:
+        if not isinstance(handler, logging.FileHandler):
+            continue
+        stream = open(log_file_path, 'a', encoding='utf-8')
+        handler.acquire()
+        try:
+            handler.baseFilename = os.path.abspath(log_file_path)
+            old_stream = handler.setStream(stream)
+        finally:
+            handler.release()
+        if old_stream is not None:
+            old_stream.close()
+
+
+class LogPrinter:
+    """
+    同时输出到控制台和日志文件，重复的内容只输出一次
+
+    参数:
+        console: 输出用的 rich 控制台
+        logger: 日志记录器
+        dedup_size: 去重缓存容量
+        capture_file: 显示 rich 对象（表格、面板）的输出文件，默认为标准输出
+    """
+
+    def __init__(self, console, logger, dedup_size=DEFAULT_DEDUP_SIZE, capture_file=None):
+        self.console = console
+        self.logger = logger
+        self.printed = LRUSet(dedup_size)
+        self._lock = threading.Lock()
+        # 显示 rich 对象并捕获其文本用的控制台，全程复用
+        self._capture = Console(file=capture_file, record=True, color_system='truecolor')
+
+    def __call__(self, *args, **kwargs):
+        rich_objects = []
+        for arg in args:
+            if isinstance(arg, (Table, Panel, Text)):
+                rich_objects.append(arg)
+                continue
+            text = str(arg)
+            with self._lock:
+                is_new = self.printed.add(text)
+            if is_new:
+                self.logger.info(text)
+                self.console.print(arg, **kwargs)
+
+        if not rich_objects:
+            return
+
+        # rich 对象照常显示，导出的纯文本只记录一次日志
+        with self._lock:
+            for obj in rich_objects:
+                self._capture.print(obj)
+            captured_text = self._capture.export_text(clear=True).strip()
+            is_new = bool(captured_text) and self.printed.add(captured_text)
+        if is_new:
+            self.logger.info(captured_text)
@@ -0,0 +1,470 @@
+"""
+本地消息总线模块
+
+悬浮按钮、33娘与主程序之间原先通过写 JSON 信号文件、再由对方轮询来通信，
+控制指令要等主循环下一次醒来才会生效。
+此模块提供一个本地发布/订阅总线：主程序作为服务端监听
+Unix 域套接字（Windows 上为命名管道），其他进程作为客户端连接，
+消息以 JSON 传输，毫秒级送达。
+
+消息类型:
+    control: 播放控制 {'action': 'play' | 'pause' | 'stop'}
+    volume:  音量变更 {'volume': 0.0 ~ 1.0}
+    status:  播放状态广播 {'is_playing', 'is_paused', 'is_finished', 'streaming_mode'}
+
+总线不可用时（主程序未启动、旧版本等）publish 返回 False，
+调用方继续使用原来的信号文件作为兼容方式。
+
+独立运行时对比总线与文件轮询的送达延迟：
+    python message_bus.py --count 200 --file-samples 5
+"""
+
+import json
+import os
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+MSG_CONTROL = 'control'
+MSG_VOLUME = 'volume'
+MSG_STATUS = 'status'
+
+CONTROL_ACTIONS = ('play', 'pause', 'stop')
+
+AUTHKEY = b'progressive-study-player-bus'
+
+# 服务端为每个客户端排队的消息上限，客户端长时间不读取、队列满时断开该客户端
+MAX_PENDING_MESSAGES = 64
+
+
+def default_address():
+    """总线地址：Windows 使用命名管道，其他平台使用临时目录下的 Unix 域套接字"""
+    if sys.platform == 'win32':
+        return r'\\.\pipe\progressive_study_player_bus'
+    return os.path.join(tempfile.gettempdir(), f'progressive_study_player_bus_{os.getuid()}.sock')
+
+
+def make_message(msg_type, **fields):
+    message = {'type': msg_type, 'timestamp': time.time()}
+    message.update(fields)
+    return message
+
+
+def control_message(action):
+    if action not in CONTROL_ACTIONS:
+        raise ValueError(f"未知的播放控制指令: {action}")
+    return make_message(MSG_CONTROL, action=action)
+
+
+def volume_message(volume):
+    return make_message(MSG_VOLUME, volume=float(volume))
+
+
+def status_message(is_playing, is_paused=False, is_finished=False, streaming_mode=False):
+    return make_message(
+        MSG_STATUS,
+        is_playing=is_playing,
+        is_paused=is_paused,
+        is_finished=is_finished,
+        streaming_mode=streaming_mode
+    )
+
+
+def _encode(message):
+    return json.dumps(message, ensure_ascii=False).encode('utf-8')
+
+
+def _decode(data):
+    message = json.loads(data.decode('utf-8'))
+    if not isinstance(message, dict) or 'type' not in message:
+        raise ValueError("无效的总线消息")
+    return message
+
+
+def _close_connection(conn):
+    """
+    关闭连接；Unix 域套接字先 shutdown，
+    使阻塞在 recv 上的线程和对端都能立即收到 EOF
+    """
+    if sys.platform != 'win32':
+        try:
+            sock = socket.socket(fileno=os.dup(conn.fileno()))
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            finally:
+                sock.close()
+        except (OSError, ValueError):
+            pass
+    try:
+        conn.close()
+    except OSError:
+        pass
+
+
+class _Subscribers:
+    """按消息类型分发的回调列表，msg_type 为 None 表示订阅全部消息"""
+
+    def __init__(self, on_error=None):
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.on_error = on_error
+
+    def add(self, callback, msg_type=None):
+        with self._lock:
+            self._callbacks.append((msg_type, callback))
+
+    def dispatch(self, message):
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for msg_type, callback in callbacks:
+            if msg_type is None or msg_type == message.get('type'):
+                try:
+                    callback(message)
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(e)
+
+
+class _ClientConnection:
+    """
+    服务端与一个客户端之间的连接
+
+    发给客户端的消息先放入有界队列，由该连接自己的发送线程在 send_lock 内写出，
+    多个线程同时广播时不会交错写入同一个连接；客户端不读取导致发送阻塞时，
+    publish 的调用方（主程序的主循环）也不会被卡住，队列满时 send 返回 False。
+    """
+
+    def __init__(self, conn, on_failed, max_pending=MAX_PENDING_MESSAGES):
+        self.conn = conn
+        self.on_failed = on_failed
+        self.send_lock = threading.Lock()
+        self._pending = queue.Queue(max_pending)
+        threading.Thread(target=self._send_loop, name='MessageBusSend', daemon=True).start()
+
+    def send(self, data):
+        """排队发送，不阻塞；队列已满时返回 False"""
+        try:
+            self._pending.put_nowait(data)
+            return True
+        except queue.Full:
+            return False
+
+    def _send_loop(self):
+        while True:
+            data = self._pending.get()
+            if data is None:
+                return
+            try:
+                with self.send_lock:
+                    self.conn.send_bytes(data)
+            except (OSError, ValueError):
+                self.on_failed(self)
+                return
+
+    def close(self):
+        _close_connection(self.conn)
+        try:
+            self._pending.put_nowait(None)
+        except queue.Full:
+            # 发送线程正阻塞在已关闭的连接上，写出失败后自行退出
+            pass
+
+
+class MessageBusServer:
+    """
+    总线服务端（由主程序持有）
+
+    收到客户端的消息后交给本地订阅者处理，并转发给其他客户端；
+    publish 发布的消息会广播给所有客户端。新客户端连接时会收到最近一次的状态广播。
+    每个客户端有自己的发送队列和发送线程，不读取消息、积压超过 MAX_PENDING_MESSAGES 条的客户端会被断开。
+    """
+
+    def __init__(self, address=None, authkey=AUTHKEY, on_error=None):
+        self.address = address or default_address()
+        self.authkey = authkey
+        self.on_error = on_error
+        self._subscribers = _Subscribers(on_error)
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        self._listener = None
+        self._closed = False
+        self._last_status = None
+
+    def subscribe(self, callback, msg_type=None):
+        self._subscribers.add(callback, msg_type)
+
+    def _remove_stale_socket(self):
+        if sys.platform == 'win32' or not os.path.exists(self.address):
+            return
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except (OSError, EOFError):
+            # 上次异常退出遗留的套接字文件
+            os.remove(self.address)
+        else:
+            raise OSError(f"消息总线已被其他进程占用: {self.address}")
+
+    def start(self):
+        self._remove_stale_socket()
+        self._listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._accept_loop, name='MessageBusAccept', daemon=True).start()
+        return self
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except Exception as e:
+                # 认证失败等单个连接的问题不影响继续监听
+                if self._closed:
+                    return
+                if self.on_error:
+                    self.on_error(e)
+                continue
+            client = _ClientConnection(conn, self._drop)
+            with self._clients_lock:
+                self._clients.append(client)
+                last_status = self._last_status
+            if last_status is not None:
+                self._send(client, last_status)
+            threading.Thread(target=self._serve, args=(client,), name='MessageBusClient', daemon=True).start()
+
+    def _serve(self, client):
+        try:
+            while not self._closed:
+                message = _decode(client.conn.recv_bytes())
+                self._subscribers.dispatch(message)
+                self._broadcast(message, exclude=client)
+        except (EOFError, OSError, ValueError, TypeError):
+            # TypeError: 连接已在其他线程中关闭
+            pass
+        finally:
+            self._drop(client)
+
+    def _send(self, client, message):
+        if client.send(_encode(message)):
+            return True
+        self._drop(client)
+        if self.on_error:
+            self.on_error(OSError("客户端长时间未读取消息，已断开连接"))
+        return False
+
+    def _drop(self, client):
+        with self._clients_lock:
+            if client in self._clients:
+                self._clients.remove(client)
+        client.close()
+
+    def _broadcast(self, message, exclude=None):
+        if message.get('type') == MSG_STATUS:
+            self._last_status = message
+        with self._clients_lock:
+            clients = [client for client in self._clients if client is not exclude]
+        for client in clients:
+            self._send(client, message)
+
+    def publish(self, message):
+        """向所有客户端及本地订阅者发布消息"""
+        self._broadcast(message)
+        self._subscribers.dispatch(message)
+        return True
+
+    @property
+    def client_count(self):
+        with self._clients_lock:
+            return len(self._clients)
+
+    def close(self):
+        self._closed = True
+        with self._clients_lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except OSError:
+                pass
+
+
+class MessageBusClient:
+    """
+    总线客户端（悬浮按钮、33娘等）
+
+    在后台线程中连接服务端并接收消息，断开后按 reconnect_interval 自动重连。
+    """
+
+    def __init__(self, address=None, authkey=AUTHKEY, reconnect_interval=2.0, on_error=None):
+        self.address = address or default_address()
+        self.authkey = authkey
+        self.reconnect_interval = reconnect_interval
+        self._subscribers = _Subscribers(on_error)
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._connected_event = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback, msg_type=None):
+        self._subscribers.add(callback, msg_type)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='MessageBusClient', daemon=True)
+            self._thread.start()
+        return self
+
+    @property
+    def connected(self):
+        return self._conn is not None
+
+    def wait_connected(self, timeout=None):
+        return self._connected_event.wait(timeout)
+
+    def _run(self):
+        while not self._closed:
+            try:
+                conn = Client(self.address, authkey=self.authkey)
+            except (OSError, EOFError):
+                time.sleep(self.reconnect_interval)
+                continue
+            self._conn = conn
+            self._connected_event.set()
+            try:
+                while not self._closed:
+                    self._subscribers.dispatch(_decode(conn.recv_bytes()))
+            except (EOFError, OSError, ValueError, TypeError):
+                pass
+            finally:
+                self._conn = None
+                self._connected_event.clear()
+                _close_connection(conn)
+
+    def publish(self, message):
+        """
+        发布消息，同时交给本进程内的订阅者
+
+        返回:
+            bool: 是否已送达总线；未连接时返回 False，调用方应改用信号文件
+        """
+        conn = self._conn
+        if conn is None:
+            return False
+        try:
+            with self._send_lock:
+                conn.send_bytes(_encode(message))
+        except (OSError, ValueError):
+            return False
+        self._subscribers.dispatch(message)
+        return True
+
+    def close(self):
+        self._closed = True
+        conn = self._conn
+        if conn is not None:
+            _close_connection(conn)
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client():
+    """同一进程内的组件（悬浮按钮、33娘）共用一个总线客户端"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = MessageBusClient().start()
+        return _shared_client
+
+
+def benchmark(count=200, file_samples=5, poll_interval=2.0):
+    """
+    测量总线与信号文件轮询的送达延迟
+
+    返回:
+        dict: 两种方式的平均 / 最大延迟（毫秒）
+    """
+    address = default_address()
+    if sys.platform == 'win32':
+        address += f'_bench_{os.getpid()}'
+    else:
+        address = os.path.join(tempfile.gettempdir(), f'progressive_study_player_bus_bench_{os.getpid()}.sock')
+
+    # 总线：客户端发布 -> 服务端订阅者收到
+    received = []
+    done = threading.Event()
+
+    def on_control(message):
+        received.append(time.perf_counter() - message['sent'])
+        if len(received) >= count:
+            done.set()
+
+    server = MessageBusServer(address).start()
+    server.subscribe(on_control, MSG_CONTROL)
+    client = MessageBusClient(address, reconnect_interval=0.05).start()
+    client.wait_connected(5)
+    for _ in range(count):
+        message = control_message('play')
+        message['sent'] = time.perf_counter()
+        client.publish(message)
+        time.sleep(0.001)
+    done.wait(10)
+    client.close()
+    server.close()
+    bus_latencies = [x * 1000 for x in received]
+
+    # 信号文件：写入文件 -> 按 poll_interval 轮询的读取方发现并读取
+    signal_dir = tempfile.mkdtemp()
+    signal_path = os.path.join(signal_dir, 'music_control_signal.json')
+    file_latencies = []
+    stop = threading.Event()
+
+    def poller():
+        while not stop.is_set():
+            if os.path.exists(signal_path):
+                with open(signal_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                file_latencies.append((time.perf_counter() - data['sent']) * 1000)
+                os.remove(signal_path)
+            stop.wait(poll_interval)
+
+    thread = threading.Thread(target=poller, daemon=True)
+    thread.start()
+    for i in range(file_samples):
+        # 错开写入时刻，使其均匀落在轮询周期内
+        time.sleep(poll_interval * (1 + (i + 0.5) / file_samples))
+        with open(signal_path, 'w', encoding='utf-8') as f:
+            json.dump({'action': 'play', 'sent': time.perf_counter()}, f)
+    time.sleep(poll_interval * 1.5)
+    stop.set()
+    thread.join()
+
+    def summary(values):
+        if not values:
+            return {'count': 0, 'avg_ms': None, 'max_ms': None}
+        return {'count': len(values), 'avg_ms': sum(values) / len(values), 'max_ms': max(values)}
+
+    return {'bus': summary(bus_latencies), 'file': summary(file_latencies)}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='消息总线与信号文件延迟对比')
+    parser.add_argument('--count', type=int, default=200, help='总线消息数')
+    parser.add_argument('--file-samples', type=int, default=5, help='信号文件样本数')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='信号文件轮询间隔（秒）')
+    args = parser.parse_args()
+
+    result = benchmark(args.count, args.file_samples, args.poll_interval)
+    for name, label in (('bus', '消息总线'), ('file', '信号文件轮询')):
+        stats = result[name]
+        if stats['count']:
+            print(f"{label}: {stats['count']} 条, 平均 {stats['avg_ms']:.3f} ms, 最大 {stats['max_ms']:.3f} ms")
+        else:
+            print(f"{label}: 没有收到消息")
@@ -5,17 +5,18 @@ import csv
 import time
 import threading
 from datetime import datetime
-try:
-    import pygame
-    pygame.mixer.init()
-    AUDIO_AVAILABLE = True
-    print("音频模块初始化成功")
-except ImportError:
+import message_bus
+import audio_metadata
+import audio_service
+from level_table import get_level_table, level_code
+from study_time_parser import parse_minutes
+# 音频由进程内共用的音频服务线程播放，mixer 在服务线程中初始化
+AUDIO_AVAILABLE = audio_service.is_available()
+if AUDIO_AVAILABLE:
+    audio_player = audio_service.get_audio_service(on_error=lambda e: print(f"音频播放失败: {e}"))
+    print("音频服务已启动")
+else:
     print("pygame模块不可用，音频功能将被禁用")
-    AUDIO_AVAILABLE = False
-except Exception as e:
-    print(f"音频初始化失败: {e}")
-    AUDIO_AVAILABLE = False
 
 from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QVBoxLayout, 
                             QHBoxLayout, QGraphicsDropShadowEffect)
@@ -237,6 +238,9 @@ class Neko33Pet(QWidget):
         # 加载音量设置
         self.current_volume = self.load_volume_setting()
         
+        # 通过消息总线接收音量变更（与悬浮按钮共用同一连接）
+        message_bus.get_shared_client().subscribe(self.on_bus_volume, message_bus.MSG_VOLUME)
+        
     def setupTimers(self):
         """设置定时器"""
         # 状态检查定时器
@@ -512,12 +516,9 @@ class Neko33Pet(QWidget):
                 study_time = data.get('study_time', '0时0分')
                 
                 # 解析时长
-                import re
-                match = re.match(r'(\d+)时(\d+)分', study_time)
-                if match:
-                    hours = int(match.group(1))
-                    minutes = int(match.group(2))
-                    return hours + minutes / 60.0
+                minutes = parse_minutes(study_time)
+                if minutes is not None:
+                    return minutes / 60.0
             return 0.0
         except Exception as e:
             print(f"获取学习时长失败: {e}")
@@ -537,14 +538,13 @@ class Neko33Pet(QWidget):
             return '0时0分'
     
     def getLevelByHours(self, hours):
-        """根据学习时长获取等级"""
-        if not self.speech_data or 'study_duration_levels' not in self.speech_data:
+        """根据学习时长获取等级（与主程序共用 config.json 的级别表，返回级别代号如 'CC'）"""
+        try:
+            level = get_level_table().level_for_hours(hours)
+        except Exception as e:
+            print(f"读取级别配置失败: {e}")
             return 'C'
-        
-        for level_info in self.speech_data['study_duration_levels']:
-            if level_info['range'][0] <= hours < level_info['range'][1]:
-                return level_info['level']
-        return 'C'
+        return level_code(level) if level else 'C'
     
     def handleStatusChange(self, status):
         """处理状态变化"""
@@ -623,7 +623,7 @@ class Neko33Pet(QWidget):
         """停止当前台词播放序列"""
         # 停止音频播放
         if self.audio_playing and AUDIO_AVAILABLE:
-            pygame.mixer.music.stop()
+            audio_player.stop()
             self.audio_playing = False
             print("强制停止音频播放")
         
@@ -732,21 +732,17 @@ class Neko33Pet(QWidget):
             if os.path.exists(audio_path):
                 # 停止当前正在播放的音频
                 if self.audio_playing:
-                    pygame.mixer.music.stop()
                     print("停止之前的音频播放")
                 
-                pygame.mixer.music.load(audio_path)
-                # 33娘台词音量为预设音量的3倍，但不超过1.0
+                # 获取音频文件时长（秒），文件未变化时使用元数据缓存
+                duration = audio_metadata.get_default_cache().duration(audio_path)
+                
+                # 33娘台词音量为预设音量的3倍，但不超过1.0；新台词会替换正在播放的台词
                 neko_volume = min(self.current_volume * 3.0, 1.0)
-                pygame.mixer.music.set_volume(neko_volume)
-                pygame.mixer.music.play()
+                audio_player.play_music(audio_path, volume=neko_volume, duration=duration)
                 self.audio_playing = True
                 print(f"播放音频: {audio_path}, 预设音量: {int(self.current_volume * 100)}%, 33娘音量: {int(neko_volume * 100)}%")
                 
-                # 获取音频文件时长（秒）
-                sound = pygame.mixer.Sound(audio_path)
-                duration = sound.get_length()
-                
                 # 设置音频播放完成的回调
                 def on_audio_finished():
                     self.audio_playing = False
@@ -998,17 +994,27 @@ class Neko33Pet(QWidget):
                 with open(signal_path, 'r', encoding='utf-8') as f:
                     signal_data = json.load(f)
                 
-                new_volume = signal_data.get('volume')
-                if new_volume is not None and new_volume != self.current_volume:
-                    self.current_volume = new_volume
-                    print(f"33娘音量已更新为: 预设音量 {int(self.current_volume * 100)}% (实际播放音量 {int(min(self.current_volume * 3.0, 1.0) * 100)}%)")
-                    
-                    # 如果当前正在播放音频，更新音量（三倍音量）
-                    if self.audio_playing and AUDIO_AVAILABLE:
-                        neko_volume = min(self.current_volume * 3.0, 1.0)
-                        pygame.mixer.music.set_volume(neko_volume)
+                self.apply_volume_change(signal_data.get('volume'))
         except Exception as e:
             print(f"检查33娘音量变更信号时出错: {e}")
+    
+    def on_bus_volume(self, message):
+        """消息总线上的音量变更"""
+        try:
+            self.apply_volume_change(message.get('volume'))
+        except Exception as e:
+            print(f"处理33娘音量变更消息时出错: {e}")
+    
+    def apply_volume_change(self, new_volume):
+        """应用新的预设音量"""
+        if new_volume is not None and new_volume != self.current_volume:
+            self.current_volume = new_volume
+            print(f"33娘音量已更新为: 预设音量 {int(self.current_volume * 100)}% (实际播放音量 {int(min(self.current_volume * 3.0, 1.0) * 100)}%)")
+            
+            # 如果当前正在播放音频，更新音量（三倍音量）
+            if self.audio_playing and AUDIO_AVAILABLE:
+                neko_volume = min(self.current_volume * 3.0, 1.0)
+                audio_player.set_music_volume(neko_volume)
 
 # 全局33娘实例
 neko33_pet = None
@@ -0,0 +1,632 @@
+"""
+歌曲播放次数索引模块
+
+select_music_file 原先每个半小时都要 os.listdir 一遍歌单文件夹、用 pandas 读取
+<级别>_play_count.csv，再过滤出播放次数最少的歌曲并构造集合；
+播放一首歌后 update_song_play_count 又把整个 CSV 读一遍再写回。
+
+此模块为每个级别在内存中维护一份索引：
+    - 按播放次数分桶，每个桶支持 O(1) 增删和随机抽取
+    - 用最小堆（惰性删除）维护当前存在的播放次数，O(log n) 得到最少播放次数
+    - 播放后原地更新计数，并把播放事件追加到 <级别>_play_count.journal；
+      后台线程在 compact_delay 秒内把日志合并（compact）进 CSV 并清空日志
+
+选歌规则与原实现一致：
+    - 优先从播放次数最少的歌曲中选
+    - 同一播放次数层级内不重复
+    - 该层级全部选过后进入下一层级，所有层级都没有可选歌曲时播放次数全部清零
+
+CSV 仍是其他程序（歌单管理器、播放次数汇总、壁纸匹配表生成）读取的唯一来源，
+合并时整体原子替换，读取方看到的总是某一时刻完整一致的播放次数，最多比内存晚 compact_delay 秒。
+CSV 被其他程序修改、或歌单文件夹有增删时，下次选歌（或合并）前自动重新加载，
+并把尚未合并的日志重新应用到新的 CSV 上。
+程序在写入 CSV 之后、清空日志之前异常退出时，重启后这部分播放次数会被重复计入一次。
+
+独立运行时对比新旧实现的选歌耗时：
+    python play_count_index.py --songs 10000 --picks 200
+"""
+
+import csv
+import heapq
+import io
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+from app_state import atomic_write_text
+
+# 支持的音乐文件扩展名
+MUSIC_EXTENSIONS = ('.mp3', '.flac')
+
+# CSV 的列（与 DataFrame.to_csv 写出的格式一致，首列为索引 序号）
+CSV_COLUMNS = ['序号', '歌单', '歌曲', '学习成就播放次数']
+
+# 播放日志中的事件：某首歌播放一次 / 所有播放次数清零
+EVENT_PLAY = 'play'
+EVENT_RESET = 'reset'
+
+
+def list_music_files(level_folder):
+    return [filename for filename in os.listdir(level_folder) if filename.endswith(MUSIC_EXTENSIONS)]
+
+
+def playlist_display_name(level):
+    return f"『{level}』渐进学习时长激励歌单"
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+class _IndexedSet:
+    """支持 O(1) 增删和随机抽取的集合"""
+
+    def __init__(self):
+        self._items = []
+        self._positions = {}
+
+    def add(self, item):
+        if item not in self._positions:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+
+    def discard(self, item):
+        position = self._positions.pop(item, None)
+        if position is None:
+            return
+        last = self._items.pop()
+        if position < len(self._items):
+            self._items[position] = last
+            self._positions[last] = position
+
+    def choice(self, rng):
+        return self._items[rng.randrange(len(self._items))]
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __len__(self):
+        return len(self._items)
+
+
+class PlayCountIndex:
+    """
+    单个级别的播放次数索引
+
+    参数:
+        level: 级别名称（歌单文件夹名）
+        level_folder: 歌单文件夹路径
+        csv_file: <级别>_play_count.csv 的路径
+        journal_file: 播放日志路径，默认与 CSV 同名、扩展名为 .journal
+        on_journal: 追加日志后的回调，参数为索引本身（用于安排合并）
+    """
+
+    def __init__(self, level, level_folder, csv_file, journal_file=None, on_journal=None):
+        self.level = level
+        self.level_folder = level_folder
+        self.csv_file = csv_file
+        self.journal_file = journal_file or os.path.splitext(csv_file)[0] + '.journal'
+        self.on_journal = on_journal
+        self._lock = threading.RLock()
+        self._rows = {}        # 歌曲 -> 歌单名称（保持 CSV 中的顺序）
+        self._counts = {}      # 歌曲 -> 播放次数
+        self._tally = {}       # 播放次数 -> 歌曲数量
+        self._heap = []        # 出现过的播放次数（惰性删除）
+        self._available = {}   # 播放次数 -> 本层级尚未选过的歌曲
+        self.played_songs = set()
+        self.current_min_count = None
+        self._csv_signature = None
+        self._folder_signature = None
+        self.pending = 0       # 尚未合并进 CSV 的日志条数
+        self.loads = 0
+        self.compactions = 0
+
+    # ---------- 加载与同步 ----------
+
+    def _read_csv(self):
+        rows = []
+        with open(self.csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                song = row.get('歌曲')
+                if not song:
+                    continue
+                try:
+                    count = int(float(row.get('学习成就播放次数') or 0))
+                except ValueError:
+                    count = 0
+                rows.append((song, row.get('歌单') or playlist_display_name(self.level), count))
+        return rows
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_file):
+            return []
+        events = []
+        with open(self.journal_file, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.reader(f):
+                # 异常退出时最后一行可能不完整，忽略无法识别的行
+                if len(row) >= 2 and row[1] in (EVENT_PLAY, EVENT_RESET):
+                    events.append((row[1], row[2] if len(row) > 2 else ''))
+        return events
+
+    def _read_rows(self):
+        """读取 CSV 并应用尚未合并的日志，返回 (行列表, 日志条数)"""
+        rows = self._read_csv() if os.path.exists(self.csv_file) else []
+        events = self._read_journal()
+        if events:
+            positions = {song: i for i, (song, _, _) in enumerate(rows)}
+            for event, song in events:
+                if event == EVENT_RESET:
+                    rows = [(s, playlist, 0) for s, playlist, _ in rows]
+                elif song in positions:
+                    s, playlist, count = rows[positions[song]]
+                    rows[positions[song]] = (s, playlist, count + 1)
+        return rows, len(events)
+
+    def _rebuild(self, rows, keep_played=False):
+        self._rows = {}
+        self._counts = {}
+        for song, playlist, count in rows:
+            if song not in self._counts:
+                self._rows[song] = playlist
+                self._counts[song] = count
+        self._tally = {}
+        self._available = {}
+        for song, count in self._counts.items():
+            self._tally[count] = self._tally.get(count, 0) + 1
+            self._available.setdefault(count, _IndexedSet()).add(song)
+        self._heap = list(self._tally)
+        heapq.heapify(self._heap)
+        if keep_played:
+            # 重新加载时保留本层级的选歌记录，已选过的歌曲不回到可选集合
+            self.played_songs = {song for song in self.played_songs if song in self._counts}
+            for song in self.played_songs:
+                self._available[self._counts[song]].discard(song)
+        else:
+            self.played_songs = set()
+            self.current_min_count = None
+
+    def sync(self, music_files=None):
+        """
+        按歌单文件夹同步歌曲列表（新增歌曲计数为 0，删除的歌曲移除），并立即合并写回 CSV
+
+        相当于原来的 update_play_count_csv；调用后本层级的选歌记录会被清空。
+        """
+        with self._lock:
+            if music_files is None:
+                music_files = list_music_files(self.level_folder)
+            self._folder_signature = _file_signature(self.level_folder)
+
+            if os.path.exists(self.csv_file):
+                rows, _ = self._read_rows()
+                existing = {song for song, _, _ in rows}
+                current = set(music_files)
+                rows = [row for row in rows if row[0] in current]
+                rows.extend(
+                    (song, playlist_display_name(self.level), 0)
+                    for song in music_files if song not in existing
+                )
+            else:
+                rows = [(song, playlist_display_name(self.level), 0) for song in music_files]
+
+            self._rebuild(rows)
+            self._csv_signature = None
+            self.compact()
+            self.loads += 1
+
+    def reload(self):
+        """从 CSV 和尚未合并的日志重新加载（CSV 不存在时按文件夹创建）"""
+        with self._lock:
+            if not os.path.exists(self.csv_file):
+                self.sync()
+                return
+            rows, self.pending = self._read_rows()
+            self._rebuild(rows, keep_played=self._csv_signature is not None)
+            self._csv_signature = _file_signature(self.csv_file)
+            self._folder_signature = _file_signature(self.level_folder)
+            self.loads += 1
+
+    def ensure_fresh(self):
+        """CSV 被外部修改或歌单文件夹有变化时重新加载"""
+        with self._lock:
+            if self._csv_signature is None:
+                self.reload()
+                return
+            if _file_signature(self.level_folder) != self._folder_signature:
+                self.sync()
+            elif _file_signature(self.csv_file) != self._csv_signature:
+                self.reload()
+
+    def compact(self):
+        """
+        把当前播放次数原子写回 CSV，然后清空播放日志
+
+        CSV 在上次合并后被其他程序修改过时，先重新加载（保留对方的修改并重放日志）再写回。
+        """
+        with self._lock:
+            if self._csv_signature is not None and _file_signature(self.csv_file) != self._csv_signature:
+                self.reload()
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator=os.linesep)
+            writer.writerow(CSV_COLUMNS)
+            for number, (song, playlist) in enumerate(self._rows.items()):
+                writer.writerow([number, playlist, song, self._counts[song]])
+            directory = os.path.dirname(self.csv_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            atomic_write_text(self.csv_file, buffer.getvalue())
+            self._csv_signature = _file_signature(self.csv_file)
+
+            if os.path.exists(self.journal_file):
+                open(self.journal_file, 'w').close()
+            self.pending = 0
+            self.compactions += 1
+
+    def _append_journal(self, event, song=''):
+        directory = os.path.dirname(self.journal_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_file, 'a', encoding='utf-8', newline='') as f:
+            csv.writer(f, lineterminator='\n').writerow([datetime.now().isoformat(timespec='seconds'), event, song])
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending += 1
+        if self.on_journal:
+            self.on_journal(self)
+
+    # ---------- 查询 ----------
+
+    @property
+    def songs(self):
+        return list(self._rows)
+
+    def count(self, song):
+        return self._counts.get(song)
+
+    def min_count(self):
+        """当前最少的播放次数，没有歌曲时返回 None"""
+        while self._heap and not self._tally.get(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    # ---------- 修改 ----------
+
+    def _move(self, song, old_count, new_count):
+        self._tally[old_count] -= 1
+        if not self._tally[old_count]:
+            del self._tally[old_count]
+        if new_count not in self._tally:
+            heapq.heappush(self._heap, new_count)
+        self._tally[new_count] = self._tally.get(new_count, 0) + 1
+        bucket = self._available.get(old_count)
+        if bucket is not None:
+            bucket.discard(song)
+        if song not in self.played_songs:
+            self._available.setdefault(new_count, _IndexedSet()).add(song)
+        self._counts[song] = new_count
+
+    def _reset_played(self):
+        """清空本层级的选歌记录，选过的歌曲重新变为可选"""
+        for song in self.played_songs:
+            count = self._counts.get(song)
+            if count is not None:
+                self._available.setdefault(count, _IndexedSet()).add(song)
+        self.played_songs = set()
+
+    def reset_counts(self):
+        """所有歌曲的播放次数清零"""
+        with self._lock:
+            self.played_songs = set()
+            self._available = {0: _IndexedSet()}
+            for song in self._counts:
+                self._counts[song] = 0
+                self._available[0].add(song)
+            self._tally = {0: len(self._counts)} if self._counts else {}
+            self._heap = [0]
+            self._append_journal(EVENT_RESET)
+
+    def pick(self, rng=random):
+        """
+        选出下一首歌曲并记为本层级已选
+
+        异常:
+            IndexError: 歌单中没有歌曲
+        """
+        with self._lock:
+            return self._pick(rng)
+
+    def _pick(self, rng):
+        min_play_count = self.min_count()
+
+        # 检查当前的播放次数级别是否发生变化
+        if self.current_min_count != min_play_count:
+            self._reset_played()
+            self.current_min_count = min_play_count
+
+        bucket = self._available.get(self.current_min_count)
+        if not bucket:
+            # 如果所有最小播放次数的歌曲都已播放，增加播放次数级别，重新选择
+            self._reset_played()
+            self.current_min_count = (self.current_min_count or 0) + 1
+            bucket = self._available.get(self.current_min_count)
+
+            if not bucket:
+                # 如果没有歌曲可以选择，重置播放次数
+                self.reset_counts()
+                self.current_min_count = 0
+                bucket = self._available.get(0)
+
+        if not bucket:
+            raise IndexError(f"歌单 {self.level} 中没有可播放的歌曲")
+
+        song = bucket.choice(rng)
+        bucket.discard(song)
+        self.played_songs.add(song)
+        return song
+
+    def unpick(self, song):
+        """撤销一次尚未播放的选歌（例如预加载的歌曲最终没有用上），歌曲重新变为本层级可选"""
+        with self._lock:
+            if song not in self.played_songs:
+                return
+            self.played_songs.discard(song)
+            count = self._counts.get(song)
+            if count is not None:
+                self._available.setdefault(count, _IndexedSet()).add(song)
+
+    def record_play(self, song, journal=True):
+        """
+        播放次数加一并追加到播放日志（批量导入时可传入 journal=False，之后调用 compact）
+
+        返回:
+            bool: 歌曲是否在索引中
+        """
+        with self._lock:
+            count = self._counts.get(song)
+            if count is None:
+                return False
+            self._move(song, count, count + 1)
+            if journal:
+                self._append_journal(EVENT_PLAY, song)
+            return True
+
+
+class JournalCompactor(threading.Thread):
+    """
+    后台合并播放日志的线程：索引追加日志后，最迟 delay 秒内合并进 CSV
+
+    参数:
+        delay: 第一条未合并日志出现后等待的秒数（期间的多次播放合并为一次写入）
+        on_error: 合并出错时的回调，参数为 (索引, 异常)
+    """
+
+    def __init__(self, delay=10.0, on_error=None):
+        super().__init__(name='PlayCountCompactor', daemon=True)
+        self.delay = delay
+        self.on_error = on_error
+        self._condition = threading.Condition()
+        self._pending = {}  # 索引 -> 首次请求时间
+        self._stopped = False
+
+    def request(self, index):
+        with self._condition:
+            self._pending.setdefault(index, time.monotonic())
+            self._condition.notify()
+
+    def _next_job(self):
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                if self._pending:
+                    index, first_time = min(self._pending.items(), key=lambda item: item[1])
+                    delay = first_time + self.delay - time.monotonic()
+                    if delay <= 0:
+                        del self._pending[index]
+                        return index
+                    self._condition.wait(delay)
+                else:
+                    self._condition.wait()
+
+    def _compact(self, index):
+        try:
+            index.compact()
+        except Exception as e:
+            if self.on_error:
+                self.on_error(index, e)
+
+    def run(self):
+        while True:
+            index = self._next_job()
+            if index is None:
+                return
+            self._compact(index)
+
+    def stop(self, timeout=None):
+        """停止线程，并立即合并所有尚未合并的日志"""
+        with self._condition:
+            self._stopped = True
+            pending, self._pending = list(self._pending), {}
+            self._condition.notify()
+        if self.is_alive():
+            self.join(timeout)
+        for index in pending:
+            self._compact(index)
+
+
+class PlayCountRegistry:
+    """
+    按级别管理播放次数索引，每个级别只加载一次
+
+    参数:
+        compact_delay: 播放日志合并进 CSV 的最长延迟（秒）；为 None 时每次播放后立即合并
+        on_error: 后台合并出错时的回调，参数为 (索引, 异常)
+    """
+
+    def __init__(self, music_folder, play_count_folder, compact_delay=None, on_error=None):
+        self.music_folder = music_folder
+        self.play_count_folder = play_count_folder
+        self._indexes = {}
+        self.compactor = None
+        if compact_delay is not None:
+            self.compactor = JournalCompactor(compact_delay, on_error)
+            self.compactor.start()
+
+    def csv_path(self, level):
+        return os.path.join(self.play_count_folder, f"{level}_play_count.csv")
+
+    def _on_journal(self, index):
+        if self.compactor is None:
+            index.compact()
+        else:
+            self.compactor.request(index)
+
+    def _index(self, level):
+        index = self._indexes.get(level)
+        if index is None:
+            index = PlayCountIndex(
+                level, os.path.join(self.music_folder, level), self.csv_path(level),
+                on_journal=self._on_journal
+            )
+            self._indexes[level] = index
+        return index
+
+    def get(self, level):
+        index = self._index(level)
+        index.ensure_fresh()
+        return index
+
+    def sync(self, level, music_files=None):
+        index = self._index(level)
+        index.sync(music_files)
+        return index
+
+    def invalidate(self, level=None):
+        """合并并丢弃缓存的索引，下次使用时重新加载"""
+        levels = list(self._indexes) if level is None else [level]
+        for name in levels:
+            index = self._indexes.pop(name, None)
+            if index is not None and index.pending:
+                index.compact()
+
+    def flush(self):
+        """立即合并所有级别尚未合并的播放日志"""
+        for index in list(self._indexes.values()):
+            if index.pending:
+                index.compact()
+
+    def close(self):
+        """停止后台合并线程并合并剩余日志（程序退出时调用）"""
+        if self.compactor is not None:
+            self.compactor.stop()
+        self.flush()
+
+
+def _legacy_pick(level_folder, csv_file, state, rng):
+    """原 select_music_file 的实现（pandas），仅用于基准对比"""
+    import pandas as pd
+
+    list_music_files(level_folder)
+    df = pd.read_csv(csv_file, index_col='序号')
+    min_play_count = df['学习成就播放次数'].min()
+    min_play_songs = df[df['学习成就播放次数'] == min_play_count]['歌曲'].tolist()
+    if state.get('current_min_count') != min_play_count:
+        state['played_songs'] = set()
+        state['current_min_count'] = min_play_count
+    unplayed_songs = list(set(min_play_songs) - state['played_songs'])
+    if not unplayed_songs:
+        state['played_songs'] = set()
+        state['current_min_count'] += 1
+        min_play_songs = df[df['学习成就播放次数'] == state['current_min_count']]['歌曲'].tolist()
+        unplayed_songs = list(set(min_play_songs))
+    selected = rng.choice(unplayed_songs)
+    state['played_songs'].add(selected)
+
+    # 原 update_song_play_count：再读一遍 CSV，加一后写回
+    df = pd.read_csv(csv_file, index_col='序号')
+    df.loc[df['歌曲'] == selected, '学习成就播放次数'] += 1
+    df.to_csv(csv_file)
+    return selected
+
+
+def benchmark(songs=10000, picks=200, seed=0):
+    """
+    在临时目录中生成 songs 首歌曲的歌单，比较新旧实现完成 picks 次"选歌 + 记录播放"的耗时
+
+    返回:
+        dict: 两种实现的总耗时和单次平均耗时（毫秒），以及最后一次合并日志的耗时
+    """
+    import tempfile
+
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as root:
+        level = '基准测试'
+        level_folder = os.path.join(root, 'music', level)
+        os.makedirs(level_folder)
+        music_files = []
+        for i in range(songs):
+            name = f"歌手{i % 97} - 歌曲{i}.mp3"
+            open(os.path.join(level_folder, name), 'wb').close()
+            music_files.append(name)
+        play_count_folder = os.path.join(root, 'play_count_logs')
+
+        # 后台合并的延迟足够长，测量的是播放时的写入路径（只追加日志）
+        registry = PlayCountRegistry(os.path.join(root, 'music'), play_count_folder, compact_delay=3600)
+        index = registry.sync(level, music_files)
+        # 预先制造不均匀的播放次数
+        for song in music_files[: songs // 2]:
+            index.record_play(song, journal=False)
+        index.compact()
+        csv_file = index.csv_file
+
+        start = time.perf_counter()
+        state = {'played_songs': set(), 'current_min_count': None}
+        for _ in range(picks):
+            _legacy_pick(level_folder, csv_file, state, rng)
+        legacy = time.perf_counter() - start
+
+        registry.invalidate()
+        pick_time = 0.0
+        start = time.perf_counter()
+        for _ in range(picks):
+            index = registry.get(level)
+            pick_start = time.perf_counter()
+            song = index.pick(rng)
+            pick_time += time.perf_counter() - pick_start
+            index.record_play(song)
+        indexed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        registry.close()
+        compact = time.perf_counter() - start
+
+    return {
+        'legacy_ms': legacy * 1000,
+        'indexed_ms': indexed * 1000,
+        'legacy_per_pick_ms': legacy * 1000 / picks,
+        'indexed_per_pick_ms': indexed * 1000 / picks,
+        'index_pick_only_ms': pick_time * 1000 / picks,
+        'compact_ms': compact * 1000,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='播放次数索引选歌基准测试')
+    parser.add_argument('--songs', type=int, default=10000, help='歌单中的歌曲数')
+    parser.add_argument('--picks', type=int, default=200, help='选歌次数')
+    args = parser.parse_args()
+
+    result = benchmark(args.songs, args.picks)
+    print(f"原实现（pandas）: 共 {result['legacy_ms']:.1f} ms, 每次 {result['legacy_per_pick_ms']:.3f} ms")
+    print(f"内存索引:         共 {result['indexed_ms']:.1f} ms, 每次 {result['indexed_per_pick_ms']:.3f} ms")
+    print(f"其中索引选歌本身每次 {result['index_pick_only_ms'] * 1000:.1f} us，其余为追加播放日志")
+    print(f"合并 {args.picks} 条播放日志进 CSV: {result['compact_ms']:.1f} ms")
+    print(f"加速比: {result['legacy_ms'] / result['indexed_ms']:.1f}x")
@@ -6,6 +6,7 @@ from tkinter import filedialog
 import customtkinter as ctk
 from PIL import Image
 import json
+import audio_metadata
 
 class PlaylistFileHandler:
     """音乐文件处理类"""
@@ -69,9 +70,13 @@ class PlaylistFileHandler:
             except Exception as e:
                 print(f"复制文件失败 {filename}: {str(e)}")
                 
-        # 更新播放统计
+        # 更新播放统计和音频元数据缓存
         if copied_files:
             self._update_play_count_csv(playlist_name, copied_files)
+            self._notify_metadata_cache(
+                audio_metadata.on_files_added,
+                [os.path.join(target_folder, filename) for filename, _ in copied_files]
+            )
             
         return [file[0] for file in copied_files]  # 只返回文件名列表
         
@@ -126,8 +131,20 @@ class PlaylistFileHandler:
             import traceback
             traceback.print_exc() 
 
+    def _notify_metadata_cache(self, hook, *args) -> None:
+        """通知音频元数据缓存文件有变化；缓存只用于加速，出错时不影响歌单操作"""
+        try:
+            hook(*args)
+        except Exception as e:
+            print(f"更新音频元数据缓存失败: {str(e)}")
+
     def move_song_between_playlists(self, song_name: str, from_playlist: str, to_playlist: str) -> None:
         """在歌单之间移动歌曲"""
+        self._notify_metadata_cache(
+            audio_metadata.on_file_moved,
+            os.path.join(self.music_folder, from_playlist, song_name),
+            os.path.join(self.music_folder, to_playlist, song_name)
+        )
         from_csv = os.path.join("statistics", "play_count_logs", f"{from_playlist}_play_count.csv")
         to_csv = os.path.join("statistics", "play_count_logs", f"{to_playlist}_play_count.csv")
         
@@ -226,6 +243,10 @@ class PlaylistFileHandler:
 
     def move_song_to_trash(self, song_name: str, from_playlist: str) -> None:
         """将歌曲移动到垃圾箱"""
+        self._notify_metadata_cache(
+            audio_metadata.on_file_removed,
+            os.path.join(self.music_folder, from_playlist, song_name)
+        )
         from_csv = os.path.join("statistics", "play_count_logs", f"{from_playlist}_play_count.csv")
         trash_csv = os.path.join("statistics", "play_count_logs", "trash.csv")
         
@@ -1,7 +1,6 @@
 import customtkinter as ctk
 import pygame
-from mutagen.mp3 import MP3
-from mutagen.flac import FLAC
+import audio_metadata
 import os
 import time
 from PIL import Image
@@ -323,15 +322,11 @@ class PlaylistPlayer(ctk.CTkFrame):
             # 停止当前播放
             pygame.mixer.music.stop()
             
-            # 获取音频时长
-            if music_path.lower().endswith('.mp3'):
-                audio = MP3(music_path)
-            elif music_path.lower().endswith('.flac'):
-                audio = FLAC(music_path)
-            else:
+            # 获取音频时长（文件未变化时使用元数据缓存）
+            if not music_path.lower().endswith(audio_metadata.MUSIC_EXTENSIONS):
                 raise ValueError("不支持的音频格式")
                 
-            self.total_length = audio.info.length
+            self.total_length = audio_metadata.get_default_cache().duration(music_path)
             
             # 加载并播放音乐
             pygame.mixer.music.load(music_path)
@@ -420,8 +415,7 @@ class PlaylistPlayer(ctk.CTkFrame):
             
             if self.is_playing:
                 music_path = os.path.join(self.current_playlist, self.current_playing)
-                audio = MP3(music_path)
-                total_length = audio.info.length
+                total_length = audio_metadata.get_default_cache().duration(music_path)
                 
                 # 计算目标位置（秒）
                 target_pos = (float(value) / 100) * total_length
@@ -2,7 +2,8 @@ import os
 import pandas as pd
 import customtkinter as ctk
 import json
-import math
+from level_table import get_level_table
+from study_time_parser import parse_minutes
 
 class PlaylistStatsViewer(ctk.CTkFrame):
     def __init__(self, master, **kwargs):
@@ -80,37 +81,19 @@ class PlaylistStatsViewer(ctk.CTkFrame):
         # 显示统计数据
         self.display_stats()
         
-    def calculate_playlist_plays(self, study_time_hours, level_config):
-        """计算某个等级歌单在指定学习时长下的播放次数"""
-        start_time = level_config['start']
-        random_count = level_config['random_count']
-        total_level_duration = random_count * 0.5  # 随机首数 × 30分钟（0.5小时）
-        
-        # 计算学习时长超过起始时间的部分
-        effective_time = study_time_hours - start_time
-        
-        if effective_time < 0:
-            return 0
-        elif effective_time >= total_level_duration:
-            return random_count
-        else:
-            return min(random_count, math.floor(effective_time / 0.5) + 1)
-
     def aggregate_play_counts(self):
         """汇总播放次数统计"""
         try:
-            # 读取配置文件获取排序顺序和随机首数
-            with open('config.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                # 创建等级名称和随机首数的映射，确保是整数
-                level_configs = {
-                    f"『{level['name']}』": {
-                        'start': float(level['start']),
-                        'random_count': int(level['random_count'])
-                    }
-                    for level in config['levels']
+            # 从共用的级别表获取排序顺序和随机首数
+            level_table = get_level_table()
+            level_configs = {
+                f"『{level.name}』": {
+                    'start': level.start,
+                    'random_count': level.random_count
                 }
-                playlist_order = list(level_configs.keys())
+                for level in level_table
+            }
+            playlist_order = list(level_configs.keys())
         except Exception as e:
             print(f"读取配置文件失败，使用默认配置: {str(e)}")
             return
@@ -141,8 +124,9 @@ class PlaylistStatsViewer(ctk.CTkFrame):
                         else:
                             歌单歌曲总播放次数[playlist] = play_count
 
-        # 遍历学习记录文件计算实际播放次数
+        # 遍历学习记录文件，读取每天的最终学习时长
         study_logs_dir = os.path.join("statistics", "study_time_logs")
+        daily_hours = []
         for filename in os.listdir(study_logs_dir):
             if filename.startswith("学习记录_") and filename.endswith(".csv"):
                 date = filename[5:-4]  # 提取日期
@@ -153,26 +137,25 @@ class PlaylistStatsViewer(ctk.CTkFrame):
                         if lines:
                             last_line = lines[-1].strip()
                             time_str = last_line.split(',')[1]  # "6时30分"格式
-                            hours = int(time_str.split('时')[0])
-                            minutes = int(time_str.split('时')[1].replace('分', ''))
-                            total_hours = hours + minutes/60
-                            
-                            # 打印日期标题
-                            print(f"\n{date}：")
-                            
-                            # 计算每个歌单实际播放次数
-                            for playlist, config in level_configs.items():
-                                plays = self.calculate_playlist_plays(total_hours, config)
-                                歌单总随机首数[playlist] += plays
-                                
-                                # 提取歌单名称（去掉『』）
-                                playlist_name = playlist.strip('『』')
-                                # 打印每个歌单的播放次数（只打印有播放的歌单）
-                                if plays > 0:
-                                    print(f"{playlist_name} 播放{plays}次")
+                            minutes = parse_minutes(time_str)
+                            if minutes is None:
+                                raise ValueError(f"无法解析学习时长: {time_str}")
+                            daily_hours.append((date, minutes / 60))
                 except Exception as e:
                     print(f"处理学习记录文件 {filename} 时出错: {str(e)}")
 
+        # 一次算出每天 × 每个歌单的实际播放次数（行：日期，列：级别表中的歌单顺序）
+        daily_plays = level_table.plays_for_hours([total_hours for _, total_hours in daily_hours])
+        for (date, _), plays_by_level in zip(daily_hours, daily_plays):
+            # 打印日期标题
+            print(f"\n{date}：")
+            for playlist, plays in zip(playlist_order, plays_by_level):
+                plays = int(plays)
+                歌单总随机首数[playlist] += plays
+                # 打印每个歌单的播放次数（只打印有播放的歌单），歌单名称去掉『』
+                if plays > 0:
+                    print(f"{playlist.strip('『』')} 播放{plays}次")
+
         # 转换为DataFrame并添加新列
         summary_df = pd.DataFrame([
             {"渐进学习时长激励歌单": playlist, 
@@ -240,14 +223,9 @@ class PlaylistStatsViewer(ctk.CTkFrame):
             if os.path.exists(csv_path):
                 df = pd.read_csv(csv_path)
                 
-                # 从配置文件获取随机首数信息
+                # 从共用的级别表获取随机首数信息
                 try:
-                    with open('config.json', 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-                        level_random_counts = {
-                            level['name'].split()[0]: int(level['random_count'])  # 使用int()确保是整数
-                            for level in config['levels']
-                        }
+                    level_random_counts = {level.code: level.random_count for level in get_level_table()}
                 except Exception as e:
                     print(f"读取配置文件失败: {str(e)}")
                     level_random_counts = {}
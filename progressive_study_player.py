@@ -1,19 +1,15 @@
 # ==== 发行版的时候搜索并去掉AUTO_SHUTDOWN相关 ====
-import pandas as pd
 import time
-import pygame
+
+# 开始导入本模块的时刻，用于统计启动到首次显示学习时长表格的耗时
+STARTUP_STARTED = time.perf_counter()
+
 import os
 import random
 import threading
 from datetime import datetime, timedelta
-from plyer import notification
-from mutagen import File  # 新增导入
-import tkinter as tk
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from datetime import time as dt_time
 import sys
-from PyQt5.QtWidgets import QApplication, QLabel
-from PyQt5.QtGui import QMovie
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QTimer
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
@@ -21,9 +17,26 @@ from rich.align import Align
 from rich.table import Table
 from rich import box
 import subprocess
-import logging
+import atexit
+import contextlib
 import json
-import pyautogui # 新增导入 pyautogui
+import study_cell_reader
+import file_watcher
+import message_bus
+import log_pipeline
+from study_cell_reader import get_study_cell
+from study_record_writer import StudyRecordWriter
+from chart_render_worker import ChartRenderWorker
+from app_state import ButtonDataState
+from play_count_index import PlayCountRegistry
+from audio_metadata import AudioMetadataCache
+from audio_service import get_audio_service
+from timer_wheel import get_default_wheel
+from reward_preloader import RewardPreloader, WallpaperLookup
+from level_table import get_level_table
+from study_time_parser import parse_minutes
+from day_rollover import DayRollover
+import daily_summary
 # ==== AUTO_SHUTDOWN ====
 from pathlib import Path
 # ==== AUTO_SHUTDOWN ====
@@ -31,18 +44,55 @@ from pathlib import Path
 # 在文件顶部导入argparse
 import argparse
 
+# pandas、tkinter、PIL、PyQt5、plyer、pyautogui 只在祝贺动画、通知、OBS 快捷键等功能
+# 第一次用到时才导入，不拖慢启动到首次显示学习时长表格的速度
+
+# 启动到首次显示学习时长表格的目标耗时（毫秒，不含等待输入的时间）
+FIRST_TABLE_TARGET_MS = 1000
+
 # 初始化 rich 控制台
 console = Console()
 
 # 音乐播放状态管理
-current_music_thread = None
 music_playing_status = False
 music_paused = False
 music_finished = False  # 新增：音乐是否播放完毕
 
-# 信号类用于线程间通信
-class Signal(QObject):
-    show_gif = pyqtSignal()
+# 启动时等待用户输入所花的时间（秒），不计入启动耗时
+startup_input_seconds = 0.0
+first_table_shown = False
+
+# 以下全局状态在 init_app() 中初始化，导入本模块时不做任何文件读写
+config = None
+log_and_print = None
+record_writer = None
+button_state = None
+chart_worker = None
+excel_file = None
+play_count_registry = None
+metadata_cache = None
+audio_player = None
+wallpaper_lookup = None
+reward_preloader = None
+scheduler = None
+rollover = None
+
+# 音量与运行模式在 main() 中读取配置、询问用户后设置
+volume = 0.04
+STREAMING_MODE = True
+WALLPAPER_ENGINE_MODE = True
+
+# 设置音乐文件夹路径
+music_folder = r'music_library'
+
+# 主数据文件夹
+base_data_folder = 'statistics'
+
+# 悬浮按钮数据、作品信息、播放状态和控制信号文件所在的文件夹（回放时换成临时目录）
+state_folder = os.path.dirname(__file__)
+
+# 定义播放次数统计文件夹
+play_count_folder = os.path.join(base_data_folder, 'play_count_logs')
 
 # 读取配置文件
 def load_config():
@@ -57,100 +107,212 @@ def load_config():
         log_and_print("[bold red]配置文件格式错误[/bold red]")
         sys.exit(1)
 
-# 加载配置
-config = load_config()
+def get_log_file_path(day):
+    """day 当天的终端日志文件路径，按照 YYYY-MM 格式建立子文件夹"""
+    log_folder = os.path.join(base_data_folder, 'terminal_logs', day.strftime('%Y-%m'))
+    if not os.path.exists(log_folder):
+        os.makedirs(log_folder)
+    return os.path.join(log_folder, f"print_logs_{day.strftime('%Y-%m-%d')}.txt")
 
-# 设置音乐文件夹路径
-music_folder = r'music_library'
+def get_study_log_path(day):
+    """day 当天的学习记录 CSV 文件路径"""
+    study_log_folder = os.path.join(base_data_folder, 'study_time_logs')
+    if not os.path.exists(study_log_folder):
+        os.makedirs(study_log_folder)
+    return os.path.join(study_log_folder, f"学习记录_{day.strftime('%Y-%m-%d')}.csv")
 
-# 从配置文件读取起始日期和音效设置
-start_date = datetime.strptime(config['start_date'], '%Y-%m-%d')
-half_hour_effect = config['half_hour_effect']
-level_up_effect = config['level_up_effect']
-five_minute_effect = config['five_minute_effect']
+def setup_logging():
+    """设置日志保存路径并创建 log_and_print"""
+    global logger, log_listener, log_and_print
 
-# 创建主数据文件夹
-base_data_folder = 'statistics'
-if not os.path.exists(base_data_folder):
-    os.makedirs(base_data_folder)
-
-# 设置日志保存路径，按照 YYYY-MM 格式建立子文件夹
-base_log_folder = os.path.join(base_data_folder, 'terminal_logs')
-current_date = datetime.now().strftime('%Y-%m')
-log_folder = os.path.join(base_log_folder, current_date)
-if not os.path.exists(log_folder):
-    os.makedirs(log_folder)
-
-# 设置日志文件路径
-log_file_path = os.path.join(log_folder, f"print_logs_{datetime.now().strftime('%Y-%m-%d')}.txt")
-
-# 设置日志记录器
-logging.basicConfig(
-    filename=log_file_path,
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filemode='a',  # 追加模式
-    encoding='utf-8'
-)
-logger = logging.getLogger()
-
-# 自定义的 log_and_print 函数，用于同时输出到控制台和日志文件
-# 消除重复打印的行为，保留颜色和样式信息，并减少空行
-
-printed_content = set()  # 用于跟踪已打印的内容
-
-def log_and_print(*args, **kwargs):
-    # 针对 rich 对象做特殊处理
-    console_capture = Console(record=True, color_system='truecolor')
-    for arg in args:
-        if isinstance(arg, (Table, Panel, Text)):
-            console_capture.print(arg)
-        else:
-            if str(arg) not in printed_content:  # 检查内容是否已打印过
-                printed_content.add(str(arg))
-                logger.info(str(arg))  # 直接记录日志
-                console.print(arg, **kwargs)  # 打印到控制台
-
-    # 如果存在 rich 对象，导出它们的文本并记录日志
-    captured_text = console_capture.export_text().strip()
-    if captured_text and captured_text not in printed_content:
-        printed_content.add(captured_text)
-        logger.info(captured_text)
-    # 打印捕获的富文本到控制台，保持样式，去除多余的空行
-    if captured_text and captured_text not in printed_content:
-        console.print(captured_text, **kwargs)
+    # 创建主数据文件夹
+    if not os.path.exists(base_data_folder):
+        os.makedirs(base_data_folder)
 
-# 定义播放次数统计文件夹
-play_count_folder = os.path.join(base_data_folder, 'play_count_logs')
-if not os.path.exists(play_count_folder):
-    os.makedirs(play_count_folder)
-
-# 创建用于存储学习记录的 DataFrame
-columns = [
-    "现在时间",
-    "目前已学习时长",
-    "预测今日学习时长",
-    "目标学习时长",
-    "剩余空闲时间"
-]
-record_df = pd.DataFrame(columns=columns)
-
-
-# 根据当前日期生成 CSV 文件路径
-current_date = datetime.now().strftime("%Y-%m-%d")
-log_folder = os.path.join(base_data_folder, 'study_time_logs')
-if not os.path.exists(log_folder):
-    os.makedirs(log_folder)
-csv_file_path = os.path.join(log_folder, f"学习记录_{current_date}.csv")
-
-# 如果 CSV 文件存在，则读取现有内容，并更新
-if os.path.exists(csv_file_path):
-    existing_df = pd.read_csv(csv_file_path)
-    record_df = pd.concat([existing_df, record_df], ignore_index=True)
-
-# 在主循环中，每次打印表格时，将数据追加到 DataFrame 中
+    # 设置日志文件路径
+    log_file_path = get_log_file_path(datetime.now())
+
+    # 设置日志记录器：日志先进入有界队列，由后台线程写入文件，主循环不会因磁盘阻塞
+    logger, log_listener = log_pipeline.setup_file_logging(log_file_path)
+
+    # 自定义的 log_and_print 函数，用于同时输出到控制台和日志文件
+    # 消除重复打印的行为（只记住最近的内容，内存占用固定），保留颜色和样式信息，并减少空行
+    log_and_print = log_pipeline.LogPrinter(console, logger)
+
+def init_app():
+    """
+    初始化配置、日志、学习记录、播放次数索引、元数据缓存和音频服务
+
+    导入本模块时不做这些工作，由 main() 在解析命令行参数后调用一次。
+    """
+    global config, start_date, half_hour_effect, level_up_effect, five_minute_effect
+    global current_date, csv_file_path, record_writer, button_state, chart_worker, excel_file
+    global played_songs, play_count_registry, metadata_cache, audio_player
+    global wallpaper_lookup, reward_preloader, rollover
+
+    setup_logging()
+
+    # 加载配置
+    config = load_config()
+
+    # 从配置文件读取起始日期和音效设置
+    start_date = datetime.strptime(config['start_date'], '%Y-%m-%d')
+    half_hour_effect = config['half_hour_effect']
+    level_up_effect = config['level_up_effect']
+    five_minute_effect = config['five_minute_effect']
+
+    if not os.path.exists(play_count_folder):
+        os.makedirs(play_count_folder)
+
+    # 根据当前日期生成 CSV 文件路径
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    csv_file_path = get_study_log_path(datetime.now())
+
+    # 学习记录逐行追加写入 CSV，内存中只保留最近的记录（当天已有的文件会继续追加）
+    record_writer = StudyRecordWriter(csv_file_path)
+
+    # 悬浮按钮数据只在内存中修改，每轮主循环结束时最多原子落盘一次
+    button_state = ButtonDataState(
+        os.path.join(state_folder, "floating_button_data.json"),
+        on_error=lambda message, e: log_and_print(f"[bold yellow]警告: {message}: {e}[/bold yellow]")
+    )
+
+    # 后台图表渲染线程，两次渲染之间至少间隔 chart_render_interval 秒
+    # chart_mode 为 'full'（默认）时每次生成完整的 HTML，设为 'live' 时只向实时图表追加新记录
+    chart_mode = config.get('chart_mode', 'full')
+    chart_worker = ChartRenderWorker(
+        min_interval=config.get('chart_render_interval', 2 if chart_mode == 'live' else 30),
+        on_rendered=on_chart_rendered,
+        on_error=on_chart_error,
+        mode=chart_mode
+    )
+    chart_worker.start()
+
+    # 设置 Excel 文件路径
+    excel_file = get_current_week_file()
+
+    # 等级设置由共用的级别表提供，config.json 被修改后自动重新编译
+    played_songs = {level: set() for level in get_level_table().names}
+
+    # 每个级别的播放次数索引（按播放次数分桶，记录当前层级已选过的歌曲），只加载一次
+    # 播放事件先追加到播放日志，后台线程在 play_count_compact_delay 秒内合并进 .csv 文件
+    play_count_registry = PlayCountRegistry(
+        music_folder,
+        play_count_folder,
+        compact_delay=config.get('play_count_compact_delay', 10),
+        on_error=lambda index, e: log_and_print(f"[bold red]合并 {index.level} 的播放次数日志时出错: {e}[/bold red]")
+    )
+    atexit.register(play_count_registry.close)
+
+    # 音频时长 / 标签缓存（按路径、修改时间和文件大小失效），启动时在后台预扫描曲库
+    metadata_cache = AudioMetadataCache()
+    atexit.register(metadata_cache.save)
+
+    # 进程内唯一持有 pygame.mixer 的音频服务线程：音乐与特效音都通过指令队列交给它播放
+    audio_player = get_audio_service(
+        on_error=lambda e: log_and_print(f"[bold red]音频服务出错: {e}[/bold red]")
+    )
+
+    # 下一个半小时节点的奖励音乐在后台提前选好、读入内存，并查好对应的壁纸
+    wallpaper_lookup = WallpaperLookup()
+    reward_preloader = RewardPreloader(
+        music_folder,
+        pick_song=lambda level: select_music_file(None, level),
+        release_song=lambda level, song: play_count_registry.get(level).unpick(song),
+        get_duration=get_music_duration,
+        wallpaper_lookup=wallpaper_lookup,
+        on_error=lambda level, half_hours, e: log_and_print(
+            f"[bold yellow]预加载 {level} 第 {half_hours} 个半小时的音乐时出错: {e}[/bold yellow]"
+        )
+    )
+
+    # 连续运行跨过零点 / 跨周时，由主循环轮换当天的文件并清空每日状态
+    rollover = DayRollover(
+        week_start=start_date,
+        on_error=lambda func, e: log_and_print(f"[bold red]跨日处理 {func.__name__} 时出错: {e}[/bold red]")
+    )
+    rollover.on_day(start_new_day)
+    rollover.on_week(switch_week_file)
+
+def start_new_day(day, previous_day):
+    """跨日：切换日志文件和学习记录 CSV，清空当天的奖励进度，释放前一天的状态"""
+    global current_date, csv_file_path, record_writer
+    global played_music, played_songs, current_level, previous_time, previous_target_time
+
+    log_pipeline.switch_log_file(log_listener, get_log_file_path(day))
+
+    # 前一天的学习记录写完后关闭，最后再生成一次前一天的图表
+    previous_date = current_date
+    record_writer.close()
+    current_date = day.strftime("%Y-%m-%d")
+    csv_file_path = get_study_log_path(day)
+    record_writer = StudyRecordWriter(csv_file_path)
+    chart_worker.request(previous_date)
+
+    # 前一天已经结束，把它的最终学习时长写入每日汇总索引（趋势图只读取这份索引）
+    try:
+        daily_summary.get_default_index().update_day(previous_date)
+    except Exception as e:
+        log_and_print(f"[bold red]更新 {previous_date} 的每日汇总时出错: {e}[/bold red]")
+
+    # 为前一天预加载的奖励音乐作废，每日状态重新开始
+    reward_preloader.discard()
+    played_music = set()
+    played_songs = {level: set() for level in get_level_table().names}
+    current_level = None
+    previous_time = None
+    previous_target_time = None
+    study_cell_reader.default_reader.invalidate()
+    # ==== AUTO_SHUTDOWN ====
+    AutoShutdown.shutdown_launched = False
+    # ==== AUTO_SHUTDOWN ====
+
+    log_and_print(f"[bold green]已进入新的一天 {current_date}，学习记录: {csv_file_path}[/bold green]")
+
+def switch_week_file(day, previous_day):
+    """跨周：切换到新一周的昼夜表"""
+    global excel_file
+    excel_file = get_current_week_file(datetime.combine(day, dt_time(0, 0)))
+
+def prompt_input(message):
+    """读取用户输入，等待输入的时间不计入启动耗时"""
+    global startup_input_seconds
+    start = time.perf_counter()
+    try:
+        return console.input(message)
+    finally:
+        startup_input_seconds += time.perf_counter() - start
+
+def report_first_table():
+    """首次显示学习时长表格时记录启动耗时，超过 FIRST_TABLE_TARGET_MS 时提示"""
+    global first_table_shown
+    if first_table_shown:
+        return
+    first_table_shown = True
+    elapsed_ms = (time.perf_counter() - STARTUP_STARTED - startup_input_seconds) * 1000
+    style = "cyan" if elapsed_ms <= FIRST_TABLE_TARGET_MS else "bold yellow"
+    log_and_print(f"[{style}]启动到首次显示表格: {elapsed_ms:.0f} ms（目标 {FIRST_TABLE_TARGET_MS} ms，不含等待输入）[/{style}]")
+
+def flush_button_state():
+    """将本轮对悬浮按钮数据的所有修改一次性写入文件"""
+    data = button_state.flush()
+    if data is not None:
+        log_and_print(f"[cyan]已更新悬浮按钮数据: {data}[/cyan]")
+
+# 图表渲染完成 / 出错时的回调
+def on_chart_rendered(chart_date, output_path, info):
+    log_and_print(
+        f"[magenta]已生成 {datetime.now().strftime('%H:%M:%S')} 的log图表 "
+        f"(渲染 {info['latency_ms']:.0f} ms, 等待 {info['wait_ms']:.0f} ms, "
+        f"合并 {info['coalesced']} 次请求, 队列 {info['queue_depth']})[/magenta]"
+    )
+
+def on_chart_error(chart_date, error):
+    log_and_print(f"[bold red]生成 {chart_date} 的log图表时出错: {error}[/bold red]")
+
+# 在主循环中，每次打印表格时，将数据追加到学习记录 CSV 中
 def save_record(current_time, formatted_cell_time, formatted_predicted_time, target_study_time_str, formatted_remaining_time):
-    global record_df, current_level
+    global current_level
 
     # 创建当前记录的字典
     current_record = {
@@ -161,72 +323,43 @@ def save_record(current_time, formatted_cell_time, formatted_predicted_time, tar
         "剩余空闲时间": formatted_remaining_time
     }
 
-    # 将当前记录追加到 DataFrame
-    record_df = pd.concat([record_df, pd.DataFrame([current_record])], ignore_index=True)
-
-    # 将 DataFrame 保存到 CSV 文件中
-    record_df.to_csv(csv_file_path, index=False, encoding='utf-8-sig')
-
-    # 保存后执行"渐进学习时长激励播放器log图表.py"脚本
+    # 将当前记录追加到 CSV 文件（只写一行并立即落盘）
     try:
-        script_path = os.path.join(os.path.dirname(__file__), "study_log_chart.py")
-        if os.path.exists(script_path):
-            log_and_print(f"[magenta]已生成 {current_time} 的log图表[/magenta]")
-            subprocess.run([sys.executable, script_path], check=True)
-        else:
-            log_and_print(f"[bold red]找不到脚本文件: {script_path}[/bold red]")
+        record_writer.append(current_record)
     except Exception as e:
-        log_and_print(f"[bold red]执行脚本时出错: {e}[/bold red]")
+        log_and_print(f"[bold red]保存学习记录时出错: {e}[/bold red]")
 
-    # 更新悬浮按钮数据
-    try:
-        json_path = os.path.join(os.path.dirname(__file__), "floating_button_data.json")
-        button_data_to_write = {}  # 初始化为空字典
-
-        # 尝试读取现有数据
-        if os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf-8') as f:
-                try:
-                    button_data_to_write = json.load(f)
-                except json.JSONDecodeError:
-                    log_and_print(f"[bold yellow]警告: floating_button_data.json 文件格式错误，将使用默认值或创建新的。[/bold yellow]")
-                    # 如果JSON解析失败，button_data_to_write 保持为空或根据需要设定初始结构
+    # 保存后通知后台线程重新生成 log 图表（短时间内的多次请求会被合并）
+    chart_worker.request(current_date)
 
+    # 更新悬浮按钮数据（只更新内存，由主循环在本轮结束时统一落盘）
+    try:
         # 确定 current_level_name
         determined_level_name = None
+        existing_level = button_state.get("current_level")
         if current_level:  # 全局 current_level 变量优先
             determined_level_name = f"『{current_level}』"
-            # log_and_print(f"[cyan]悬浮窗阶段更新来源 (save_record): 程序内 current_level ('{current_level}')[/cyan]")
-        elif "current_level" in button_data_to_write and button_data_to_write["current_level"] and button_data_to_write["current_level"] != "未知阶段":
-            determined_level_name = button_data_to_write["current_level"] # 使用文件中已有的有效值
-            # log_and_print(f"[cyan]悬浮窗阶段更新来源 (save_record): 文件内 current_level ('{determined_level_name}')[/cyan]")
+        elif existing_level and existing_level != "未知阶段":
+            determined_level_name = existing_level # 使用已有的有效值
         else:
             determined_level_name = "未知阶段" # 最后的回退
-            # log_and_print(f"[yellow]悬浮窗阶段更新来源 (save_record): 默认值 '未知阶段' (程序 current_level: {current_level}, 文件内容: {button_data_to_write.get('current_level')})[/yellow]")
-        
-        # 准备要更新的数据负载
-        update_payload = {
+
+        # 准备要更新的数据负载，不在负载中的键 (如 current_music) 会被保留
+        button_state.update({
             "current_level": determined_level_name,
             "study_time": formatted_cell_time,
             "target_time": f"{target_study_time_str}小时",
             "predicted_time": formatted_predicted_time,
             "remaining_time": formatted_remaining_time
-        }
-        
-        # 更新字典，这会保留 button_data_to_write 中不在 update_payload 的键 (如 current_music)
-        button_data_to_write.update(update_payload)
-        
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(button_data_to_write, f, ensure_ascii=False, indent=2)
-        log_and_print(f"[cyan]已更新悬浮按钮数据 (save_record): {button_data_to_write}[/cyan]")
-            
+        })
     except Exception as e:
         log_and_print(f"[bold red]更新悬浮按钮数据时出错 (save_record): {e}[/bold red]")
 
 # 计算当前周数和对应日期范围的函数
-def get_current_week_file():
-    # 获取当前日期
-    today = datetime.now()
+def get_current_week_file(today=None):
+    # 获取当前日期（跨周时传入新的日期）
+    if today is None:
+        today = datetime.now()
     
     # 计算从起始日期到当前日期的天数
     days_difference = (today - start_date).days
@@ -245,28 +378,29 @@ def get_current_week_file():
     log_and_print(f"[bold green]已读取文件:[/bold green] {file_path}")
     return file_path
 
-# 设置 Excel 文件路径
-excel_file = get_current_week_file()
-
-# 从配置文件加载等级设置
-level_config = [(level['name'], level['start'], level['end'], level['random_count']) 
-                for level in config['levels']]
-
 # 记录已经播放的音乐索引和之前的学习时长
 played_music = set()
-played_songs = {level: set() for level, _, _, _ in level_config}
+played_songs = {}
 current_level = None
 previous_time = None
 previous_target_time = None  # 新增：跟踪目标时间的变化
 
-# 新增：记录每个级别当前播放次数最低的歌曲集合
-level_played_counts = {}
+def prescan_music_library():
+    """在线程池中读取曲库所有音乐文件的元数据，预热缓存"""
+    try:
+        stats = metadata_cache.prescan(music_folder, workers=config.get('metadata_prescan_workers', 8))
+        log_and_print(
+            f"[cyan]曲库元数据预扫描完成: {stats['files']} 首, 命中 {stats['hits']}, "
+            f"读取 {stats['misses']}, 失败 {stats['errors']}, 耗时 {stats['seconds']:.2f} 秒[/cyan]"
+        )
+    except Exception as e:
+        log_and_print(f"[bold yellow]曲库元数据预扫描出错: {e}[/bold yellow]")
 
 # 设置OBS直播模式
 def get_streaming_mode():
     while True:
         try:
-            streaming_mode_input = console.input("[bold cyan]是否启用OBS直播模式（y/n，默认y）：[/bold cyan]").strip().lower()
+            streaming_mode_input = prompt_input("[bold cyan]是否启用OBS直播模式（y/n，默认y）：[/bold cyan]").strip().lower()
             if not streaming_mode_input or streaming_mode_input == 'y':
                 return True
             elif streaming_mode_input == 'n':
@@ -281,7 +415,7 @@ def get_streaming_mode():
 def get_wallpaper_engine_mode():
     while True:
         try:
-            wallpaper_mode_input = console.input("[bold cyan]是否启用壁纸引擎（y/n，默认y）：[/bold cyan]").strip().lower()
+            wallpaper_mode_input = prompt_input("[bold cyan]是否启用壁纸引擎（y/n，默认y）：[/bold cyan]").strip().lower()
             if not wallpaper_mode_input or wallpaper_mode_input == 'y':
                 return True
             elif wallpaper_mode_input == 'n':
@@ -308,7 +442,7 @@ def get_volume():
 def update_artwork_info(music_name, music_duration, wallpaper_id=None, wallpaper_name=None):
     """更新作品信息到单独的JSON文件"""
     try:
-        artwork_json_path = os.path.join(os.path.dirname(__file__), "artwork_display_info.json")
+        artwork_json_path = os.path.join(state_folder, "artwork_display_info.json")
         
         # 读取现有数据或创建新数据
         if os.path.exists(artwork_json_path):
@@ -343,6 +477,8 @@ def execute_obs_shortcut(shortcut_str):
     参数:
         shortcut_str: 要执行的快捷键组合，例如 "ctrl+alt+shift+q"
     """
+    import pyautogui
+
     keys = shortcut_str.lower().split('+')
     hold_duration = 0.6  # 按键保持按下的时长（秒）
 
@@ -378,149 +514,93 @@ def execute_obs_shortcut(shortcut_str):
             time.sleep(2)
 
 # 播放音乐
-def play_music(file_path):
-    def play():
-        try:
-            pygame.mixer.init()
-            
-            # 获取音乐时长
-            audio = File(file_path)
-            if audio is not None and audio.info is not None:
-                duration = audio.info.length  # 时长（秒）
-            else:
-                duration = 0  # 如果无法获取，设置为0
-            
-            # 获取音乐名称（去掉路径和扩展名）
-            music_name = os.path.basename(file_path)
-            
-            # 格式化音乐时长
-            minutes = int(duration // 60)
-            seconds = int(duration % 60)
-            formatted_duration = f"{minutes}:{seconds:02d}"
-            
-            # 更新到单独的作品信息JSON文件
-            update_artwork_info(music_name, formatted_duration)
-            
-            # 更新音乐播放状态
-            update_music_status(True, False)
-            
-            pygame.mixer.music.load(file_path)
-            
-            # 直播模式下设置音量为0（静音）
-            if STREAMING_MODE:
-                log_and_print("[cyan]直播模式：音乐静音播放[/cyan]")
-                pygame.mixer.music.set_volume(0)
-            else:
-                pygame.mixer.music.set_volume(volume)
-                
-            pygame.mixer.music.play()
-
-            # 等待音乐播放结束
-            while music_playing_status:
-                # 如果音乐播放完毕且不是暂停状态，则退出循环
-                if not pygame.mixer.music.get_busy() and not music_paused:
-                    break
-                
-                # 如果暂停了，等待恢复播放或停止
-                if music_paused:
-                    pygame.time.Clock().tick(10)
-                    continue
-                    
-                pygame.time.Clock().tick(10)
-            
-            # 检查音乐是否自然播放完毕
-            if music_playing_status and not music_paused and not pygame.mixer.music.get_busy():
-                # 音乐自然播放完毕
-                update_music_status(False, False, True)  # is_finished=True
-                log_and_print("[cyan]音乐播放完毕 - 状态: is_playing=False, is_paused=False, is_finished=True[/cyan]")
-            elif music_playing_status and not music_paused:
-                # 音乐被停止
-                update_music_status(False, False, False)  # is_finished=False
-                log_and_print("[cyan]音乐被停止 - 状态: is_playing=False, is_paused=False, is_finished=False[/cyan]")
-                
-        except pygame.error as e:
-            log_and_print(f"[bold red]无法播放文件 {file_path}: {e}[/bold red]")
-            update_music_status(False, False, False)
-        except Exception as e: # 增加一个通用的异常捕获，以防 pyautogui 出错等
-            log_and_print(f"[bold red]播放音乐时发生未知错误: {e}[/bold red]")
-            update_music_status(False, False, False)
-
-
-    music_thread = threading.Thread(target=play)
-    music_thread.start()
-
-# 获取音乐时长的函数
+def play_music(file_path, audio_data=None, threshold_time=None, audio=None):
+    """
+    交给音频服务线程播放音乐，立即返回
+
+    参数:
+        audio_data: 预加载的音频文件内容
+        threshold_time: 检测到半小时节点时的 time.perf_counter()，用于记录节点到音乐响起的延迟
+        audio: 音频后端，默认为 audio_player
+    """
+    try:
+        # 获取音乐时长（秒），无法识别时为 0
+        duration = get_music_duration(file_path)
+    except Exception as e:
+        log_and_print(f"[bold red]无法读取音乐时长 {file_path}: {e}[/bold red]")
+        duration = 0
+
+    def on_start():
+        if threshold_time is not None:
+            log_and_print(
+                f"[magenta]半小时节点到音乐开始播放: {(time.perf_counter() - threshold_time) * 1000:.1f} ms"
+                f"（{'已预加载' if audio_data is not None else '未预加载'}）[/magenta]"
+            )
+        if STREAMING_MODE:
+            log_and_print("[cyan]直播模式：音乐静音播放[/cyan]")
+        
+        # 获取音乐名称（去掉路径和扩展名）
+        music_name = os.path.basename(file_path)
+        
+        # 格式化音乐时长
+        minutes = int(duration // 60)
+        seconds = int(duration % 60)
+        formatted_duration = f"{minutes}:{seconds:02d}"
+        
+        # 更新到单独的作品信息JSON文件
+        update_artwork_info(music_name, formatted_duration)
+        
+        # 更新音乐播放状态
+        update_music_status(True, False)
+
+    def on_end():
+        # 音乐自然播放完毕（被停止或被替换时不会调用）
+        update_music_status(False, False, True)  # is_finished=True
+        log_and_print("[cyan]音乐播放完毕 - 状态: is_playing=False, is_paused=False, is_finished=True[/cyan]")
+
+    def on_error(e):
+        log_and_print(f"[bold red]无法播放文件 {file_path}: {e}[/bold red]")
+        update_music_status(False, False, False)
+
+    # 直播模式下设置音量为0（静音）
+    (audio or audio_player).play_music(
+        file_path, audio_data,
+        volume=0 if STREAMING_MODE else volume,
+        duration=duration,
+        on_start=on_start, on_end=on_end, on_error=on_error
+    )
+
+# 获取音乐时长的函数（文件未变化时直接使用元数据缓存）
 def get_music_duration(file_path):
-    audio = File(file_path)
-    if audio is not None and audio.info is not None:
-        return audio.info.length  # 时长（秒）
-    else:
-        return 0
+    return metadata_cache.duration(file_path)  # 时长（秒）
 
 # 播放特效音
-def play_effect_sound(effect_file):
-    def play_sound():
-        try:
-            pygame.mixer.init()
-            sound = pygame.mixer.Sound(effect_file)
-            sound.set_volume(volume)
-            sound.play()
-        except pygame.error as e:
-            log_and_print(f"[bold red]无法播放特效音 {effect_file}: {e}[/bold red]")
-
-    sound_thread = threading.Thread(target=play_sound)
-    sound_thread.start()
+def play_effect_sound(effect_file, audio=None):
+    (audio or audio_player).play_effect(
+        effect_file, volume,
+        on_error=lambda e: log_and_print(f"[bold red]无法播放特效音 {effect_file}: {e}[/bold red]")
+    )
 
-# 每个整5分钟播放一次音效
+# 每个整5分钟播放一次音效（由定时调度器在整点触发）
 def play_five_minute_effect():
-    while True:
-        now = datetime.now()
-        # 计算距离下一个整5分钟的秒数
-        seconds_until_next_five_minute = (5 - now.minute % 5) * 60 - now.second
-        if seconds_until_next_five_minute <= 0:
-            seconds_until_next_five_minute += 300  # 防止负数情况
-        time.sleep(seconds_until_next_five_minute)
-        play_effect_sound(five_minute_effect)
+    play_effect_sound(five_minute_effect)
 
 # 读取 Excel 文件
 def read_time_from_excel(file_path, row, col):
     """
     读取 Excel 文件中的指定单元格以及相对位置的三个单元格数据。
+    文件未变化时直接使用缓存，不再重新解析整个工作簿。
     """
     try:
-        # 移除 mode 参数
-        df = pd.read_excel(file_path, header=None)
-        
-        # 读取主单元格
-        cell_value = df.iloc[row, col]
-        if pd.isna(cell_value):
-            cell_value = "00:00:00"
-        
-        # 计算相对位置单元格
-        relative_positions = [
-            (row + 2, col + 5),  # "预测今日学习时长"（S列）
-            (row + 5, col + 5),  # "目标学习时长"（S列）
-            (row + 5, col + 6)   # "剩余空闲时间"（T列）
-        ]
-
-        relative_values = []
-        for r, c in relative_positions:
-            try:
-                value = df.iloc[r, c]
-                if pd.isna(value):
-                    value = "00:00:00"
-                relative_values.append(str(value))
-            except IndexError:
-                relative_values.append("00:00:00")
-        
-        return str(cell_value), relative_values
-
+        return study_cell_reader.read_time_from_excel(file_path, row, col)
     except Exception as e:
         log_and_print(f"[bold red]读取Excel文件时发生错误: {e}[/bold red]")
         return "00:00:00", ["00:00:00", "12", "00:00:00"]
 
 # 显示通知
 def show_notification(title, message):
+    from plyer import notification
+
     notification.notify(
         title=title,
         message=message,
@@ -528,68 +608,33 @@ def show_notification(title, message):
         timeout=10
     )
 
-# 更新或创建播放次数的.csv文件
-def update_play_count_csv(level, music_files):
-    # 获取.csv文件的路径
-    csv_file = os.path.join(play_count_folder, f"{level}_play_count.csv")
-
-    # 检查.csv文件是否存在
-    if os.path.exists(csv_file):
-        # 读取现有的.csv文件
-        df = pd.read_csv(csv_file, index_col='序号')
-        existing_songs = df['歌曲'].tolist()
-
-        # 检查歌单是否有变动
-        added_songs = list(set(music_files) - set(existing_songs))
-        removed_songs = list(set(existing_songs) - set(music_files))
-
-        # 如果有新增歌曲，添加到DataFrame
-        for song in added_songs:
-            df = df.append({'歌单': f"『{level}』渐进学习时长激励歌单", '歌曲': song, '学习成就播放次数': 0}, ignore_index=True)
-
-        # 如果有删除的歌曲，从DataFrame中移除
-        if removed_songs:
-            df = df[~df['歌曲'].isin(removed_songs)]
-
-        # 重置索引
-        df.reset_index(drop=True, inplace=True)
-        df.index.name = '序号'
-    else:
-        # 如果.csv文件不存在，创建新的DataFrame
-        df = pd.DataFrame({
-            '歌单': [f"『{level}』渐进学习时长激励歌单"] * len(music_files),
-            '歌曲': music_files,
-            '学习成就播放次数': [0] * len(music_files)
-        })
-        df.index.name = '序号'
+class DesktopNotifier:
+    """主程序的通知后端：系统通知在后台线程中发送，升级时显示全屏祝贺动画"""
+
+    def notify(self, title, message):
+        threading.Thread(target=show_notification, args=(title, message)).start()
 
-    # 保存到.csv文件
-    df.to_csv(csv_file)
+    def celebrate(self, level, song):
+        show_congratulations(level, song)
+        show_congratulations_with_gif()
 
-    # 更新level_played_counts
-    level_played_counts[level] = {'played_songs': set(), 'current_min_count': None}
+desktop_notifier = DesktopNotifier()
+
+# 更新或创建播放次数的.csv文件
+def update_play_count_csv(level, music_files):
+    # 按歌单同步播放次数索引并写回 .csv 文件（新增歌曲计数为 0，删除的歌曲移除）
+    play_count_registry.sync(level, music_files)
 
 # 更新歌曲的播放次数
 def update_song_play_count(level, song_name):
-    # 获取.csv文件的路径
-    csv_file = os.path.join(play_count_folder, f"{level}_play_count.csv")
-
-    # 检查.csv文件是否存在
-    if os.path.exists(csv_file):
-        # 读取.csv文件
-        df = pd.read_csv(csv_file, index_col='序号')
-        # 查找对应的歌曲
-        song_index = df[df['歌曲'] == song_name].index
-        if not song_index.empty:
-            index = song_index[0]
-            # 更新播放次数
-            df.at[index, '学习成就播放次数'] += 1
-            # 保存到.csv文件
-            df.to_csv(csv_file)
-        else:
-            log_and_print(f"[bold red]歌曲 {song_name} 不在播放次数文件中。[/bold red]")
-    else:
+    csv_file = play_count_registry.csv_path(level)
+    if not os.path.exists(csv_file):
         log_and_print(f"[bold red]播放次数文件 {csv_file} 不存在，无法更新播放次数。[/bold red]")
+        return
+
+    # 在内存索引中加一并追加到播放日志，稍后由后台线程合并进 .csv 文件
+    if not play_count_registry.get(level).record_play(song_name):
+        log_and_print(f"[bold red]歌曲 {song_name} 不在播放次数文件中。[/bold red]")
 
 
 # 打印奖状样式的函数
@@ -639,9 +684,6 @@ def print_certificate(formatted_cell_time, music_name, level):
     # 打印奖状到控制台并保存到日志
     log_and_print(panel)
 
-    # 更新播放次数
-    update_song_play_count(level, music_name)
-
 # 打印歌单的函数
 def print_song_list(level, music_files):
     # 创建居中的歌单标题
@@ -693,57 +735,19 @@ def select_music_file(total_minutes, level):
     # 设置基于当前时间的随机种子
     random.seed(int(time.time()))
 
-    level_folder = os.path.join(music_folder, level)
-    music_files = [filename for filename in os.listdir(level_folder) if filename.endswith(('.mp3', '.flac'))]
+    # 索引首次使用时加载；.csv 被外部修改或歌单文件夹有增删时会自动重新加载
+    index = play_count_registry.get(level)
 
-    # 获取.csv文件的路径
-    csv_file = os.path.join(play_count_folder, f"{level}_play_count.csv")
-    if not os.path.exists(csv_file):
-        # 如果CSV文件不存在，先更新
-        update_play_count_csv(level, music_files)
-
-    # 读取播放次数数据
-    df = pd.read_csv(csv_file, index_col='序号')
-
-    # 找到最小的播放次数
-    min_play_count = df['学习成就播放次数'].min()
-
-    # 过滤出放次数等于最小值的歌曲
-    min_play_songs = df[df['学习成就播放次数'] == min_play_count]['歌曲'].tolist()
-
-    # 从未播放的歌曲中选择
-    if level not in level_played_counts:
-        level_played_counts[level] = {'played_songs': set(), 'current_min_count': min_play_count}
-
-    # 检查当前的播放次数级别是否发生变化
-    if level_played_counts[level]['current_min_count'] != min_play_count:
-        level_played_counts[level]['played_songs'] = set()
-        level_played_counts[level]['current_min_count'] = min_play_count
-
-    unplayed_songs = list(set(min_play_songs) - level_played_counts[level]['played_songs'])
-
-    if not unplayed_songs:
-        # 如果所有最小播放次数的歌曲都已播放，增加播放次数级别，重新选择
-        level_played_counts[level]['played_songs'] = set()
-        level_played_counts[level]['current_min_count'] += 1
-        min_play_count = level_played_counts[level]['current_min_count']
-        min_play_songs = df[df['学习成就播放次数'] == min_play_count]['歌曲'].tolist()
-        unplayed_songs = list(set(min_play_songs) - level_played_counts[level]['played_songs'])
-
-        if not unplayed_songs:
-            # 如果没有歌曲可以选择，重置播放次数
-            df['学习成就播放次数'] = 0
-            df.to_csv(csv_file)
-            level_played_counts[level]['current_min_count'] = 0
-            unplayed_songs = df[df['学习成就播放次数'] == 0]['歌曲'].tolist()
-
-    selected_file = random.choice(unplayed_songs)
-    level_played_counts[level]['played_songs'].add(selected_file)
-    return selected_file, music_files
+    # 从播放次数最少、且本层级尚未选过的歌曲中随机选择
+    selected_file = index.pick()
+    return selected_file, index.songs
 
 # 显示祝贺
 def show_congratulations(level, song):
     def display():
+        import tkinter as tk
+        from PIL import Image, ImageTk, ImageDraw, ImageFont
+
         root = tk.Tk()
         root.attributes('-fullscreen', True)
         root.attributes('-topmost', True)
@@ -790,6 +794,10 @@ def show_congratulations(level, song):
     ribbon_thread.start()
 
 def show_congratulations_with_gif():
+    from PyQt5.QtWidgets import QApplication, QLabel
+    from PyQt5.QtGui import QMovie
+    from PyQt5.QtCore import Qt, QTimer
+
     app = QApplication(sys.argv)
 
     window = QLabel()
@@ -822,31 +830,22 @@ def format_duration_without_seconds(duration):
     if isinstance(duration, str) and duration.startswith('1899-12-30'):
         return "0时00分"
     
-    # 处理时间字符串
+    # 处理时间字符串（'H:MM:SS'，小数秒和秒数忽略）
     if isinstance(duration, str) and ':' in duration:
-        try:
-            # 去除小数秒部分和任何潜在的空白字符
-            duration = duration.split('.')[0].strip() if '.' in duration else duration.strip()
-            parts = duration.split(':')
-            if len(parts) < 2:
-                return duration  # 格式不正，直接返回始值
-            hours, minutes = int(parts[0]), int(parts[1])
-            return f"{hours}时{minutes:02d}分"
-        except (ValueError, IndexError) as e:
-            log_and_print(f"[bold red]格式化时间时出错。值: {duration}，错误: {e}[/bold red]")
+        minutes = parse_minutes(duration)
+        if minutes is None:
+            log_and_print(f"[bold red]格式化时间时出错。值: {duration}[/bold red]")
             return "0时00分"  # 错误情况下返回零时
+        # 与昼夜表单元格的写法一致：小时保留符号，分钟取绝对值（'-1:30:00' -> '-1时30分'，'-0:30:00' -> '0时30分'）
+        return f"{int(minutes / 60)}时{abs(minutes) % 60:02d}分"
     # 处理 timedelta 对象
     elif isinstance(duration, timedelta):
         total_minutes = int(duration.total_seconds() // 60)
-        hours = total_minutes // 60
-        minutes = total_minutes % 60
-        return f"{hours}时{minutes:02d}分"
+        return f"{total_minutes // 60}时{total_minutes % 60:02d}分"
     # 处理浮点数（秒数）
     elif isinstance(duration, float):
         total_minutes = int(duration // 60)
-        hours = total_minutes // 60
-        minutes = total_minutes % 60
-        return f"{hours}时{minutes:02d}分"
+        return f"{total_minutes // 60}时{total_minutes % 60:02d}分"
     # 如果是整数或其他类型，直接返回
     return str(duration)
 
@@ -883,15 +882,15 @@ class AutoShutdown:
 
 def get_music_control_signal_path():
     """获取音乐控制信号文件路径"""
-    return os.path.join(os.path.dirname(__file__), "music_control_signal.json")
+    return os.path.join(state_folder, "music_control_signal.json")
 
 def get_music_status_path():
     """获取音乐播放状态文件路径"""
-    return os.path.join(os.path.dirname(__file__), "music_playing_status.json")
+    return os.path.join(state_folder, "music_playing_status.json")
 
 def get_volume_change_signal_path():
     """获取音量变更信号文件路径"""
-    return os.path.join(os.path.dirname(__file__), "volume_change_signal.json")
+    return os.path.join(state_folder, "volume_change_signal.json")
 
 def update_music_status(is_playing, is_paused=False, is_finished=False):
     """更新音乐播放状态到文件，并处理OBS场景切换"""
@@ -919,6 +918,8 @@ def update_music_status(is_playing, is_paused=False, is_finished=False):
         with open(status_path, 'w', encoding='utf-8') as f:
             json.dump(status_data, f, ensure_ascii=False, indent=2)
         
+        publish_music_status(is_playing, is_paused, is_finished)
+        
         # 智能OBS场景切换：基于状态变化而不是时间
         if STREAMING_MODE:
             # 检测从非播放状态到播放状态的转换（包括暂停恢复）
@@ -934,23 +935,12 @@ def update_music_status(is_playing, is_paused=False, is_finished=False):
     except Exception as e:
         log_and_print(f"[bold red]更新音乐状态时出错: {e}[/bold red]")
 
-def check_music_control_signal():
-    """检查并处理音乐控制信号"""
-    global current_music_thread, music_playing_status, music_paused
-    
-    try:
-        signal_path = get_music_control_signal_path()
-        if not os.path.exists(signal_path):
-            return
-        
-        with open(signal_path, 'r', encoding='utf-8') as f:
-            signal_data = json.load(f)
-        
-        action = signal_data.get('action')
-        if not action:
-            return
-        
-        # 处理不同的控制信号
+# 信号文件和消息总线两条路径上的控制指令串行处理
+music_control_lock = threading.Lock()
+
+def handle_music_control_action(action):
+    """执行播放控制指令（play / pause / stop），供信号文件和消息总线共用"""
+    with music_control_lock:
         if action == 'play':
             if not music_playing_status:
                 # 开始播放当前音乐
@@ -967,6 +957,22 @@ def check_music_control_signal():
             if music_playing_status:
                 # 停止音乐
                 stop_current_music()
+
+def check_music_control_signal():
+    """检查并处理音乐控制信号（兼容未连接消息总线的旧客户端）"""
+    try:
+        signal_path = get_music_control_signal_path()
+        if not os.path.exists(signal_path):
+            return
+        
+        with open(signal_path, 'r', encoding='utf-8') as f:
+            signal_data = json.load(f)
+        
+        action = signal_data.get('action')
+        if not action:
+            return
+        
+        handle_music_control_action(action)
         
         # 删除信号文件以避免重复处理
         os.remove(signal_path)
@@ -976,17 +982,9 @@ def check_music_control_signal():
 
 def play_current_music_from_signal():
     """从信号触发播放当前音乐（不更新统计）"""
-    global current_music_thread
-    
     try:
-        # 读取当前音乐信息
-        data_path = os.path.join(os.path.dirname(__file__), "floating_button_data.json")
-        if not os.path.exists(data_path):
-            log_and_print("[bold red]找不到悬浮按钮数据文件[/bold red]")
-            return
-
-        with open(data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # 读取当前音乐信息（内存中的悬浮按钮数据）
+        data = button_state.snapshot()
         
         current_music = data.get('current_music')
         if not current_music:
@@ -1012,85 +1010,18 @@ def play_current_music_from_signal():
 
         log_and_print(f"[cyan]从信号播放音乐: {current_music}[/cyan]")
 
-        # 在新线程中播放音乐
-        current_music_thread = threading.Thread(target=play_music_signal_thread, args=(music_path, current_music))
-        current_music_thread.start()
+        # 交给音频服务线程播放
+        play_music(music_path)
 
     except Exception as e:
         log_and_print(f"[bold red]从信号播放音乐时出错: {e}[/bold red]")
 
-def play_music_signal_thread(music_path, music_name):
-    """信号触发的音乐播放线程（不更新统计）"""
-    global music_playing_status, music_paused
-    
-    try:
-        pygame.mixer.init()
-        
-        # 获取音乐时长
-        audio = File(music_path)
-        if audio is not None and audio.info is not None:
-            duration = audio.info.length
-        else:
-            duration = 0
-        
-        # 格式化音乐时长
-        minutes = int(duration // 60)
-        seconds = int(duration % 60)
-        formatted_duration = f"{minutes}:{seconds:02d}"
-        
-        # 更新作品信息（但不更新播放次数统计）
-        update_artwork_info(music_name, formatted_duration)
-        
-        # 更新音乐播放状态
-        update_music_status(True, False)
-        
-        pygame.mixer.music.load(music_path)
-        
-        # 直播模式下设置音量为0（静音）
-        if STREAMING_MODE:
-            log_and_print("[cyan]直播模式：音乐静音播放[/cyan]")
-            pygame.mixer.music.set_volume(0)
-        else:
-            pygame.mixer.music.set_volume(volume)
-            
-        pygame.mixer.music.play()
-
-        # 等待音乐播放结束
-        while music_playing_status:
-            # 如果音乐播放完毕且不是暂停状态，则退出循环
-            if not pygame.mixer.music.get_busy() and not music_paused:
-                break
-            
-            # 如果暂停了，等待恢复播放或停止
-            if music_paused:
-                pygame.time.Clock().tick(10)
-                continue
-                
-            pygame.time.Clock().tick(10)
-        
-        # 检查音乐是否自然播放完毕
-        if music_playing_status and not music_paused and not pygame.mixer.music.get_busy():
-            # 音乐自然播放完毕
-            update_music_status(False, False, True)  # is_finished=True
-            log_and_print("[cyan]音乐播放完毕 - 状态: is_playing=False, is_paused=False, is_finished=True[/cyan]")
-        elif music_playing_status and not music_paused:
-            # 音乐被停止
-            update_music_status(False, False, False)  # is_finished=False
-            log_and_print("[cyan]音乐被停止 - 状态: is_playing=False, is_paused=False, is_finished=False[/cyan]")
-            
-    except pygame.error as e:
-        log_and_print(f"[bold red]无法播放文件 {music_path}: {e}[/bold red]")
-        update_music_status(False, False, False)
-    except Exception as e: # 增加一个通用的异常捕获，以防 pyautogui 出错等
-        log_and_print(f"[bold red]播放音乐时发生未知错误: {e}[/bold red]")
-        update_music_status(False, False, False)
-
 def pause_current_music():
     """暂停当前音乐"""
     global music_paused
     if music_playing_status:  # 移除STREAMING_MODE限制
         try:
-            pygame.mixer.music.pause()
+            audio_player.pause()
             update_music_status(True, True)
             log_and_print("[cyan]音乐已暂停 - 状态: is_playing=True, is_paused=True[/cyan]")
         except Exception as e:
@@ -1101,7 +1032,7 @@ def resume_music():
     global music_paused
     if music_playing_status and music_paused:  # 移除STREAMING_MODE限制
         try:
-            pygame.mixer.music.unpause()
+            audio_player.resume()
             update_music_status(True, False)
             log_and_print("[cyan]音乐已恢复播放 - 状态: is_playing=True, is_paused=False[/cyan]")
         except Exception as e:
@@ -1109,18 +1040,29 @@ def resume_music():
 
 def stop_current_music():
     """停止当前音乐"""
-    global current_music_thread, music_playing_status, music_paused
     try:  # 移除STREAMING_MODE限制
-        pygame.mixer.music.stop()
+        audio_player.stop()
         update_music_status(False, False, False)  # 停止时设置为未完成状态
         log_and_print("[cyan]音乐已停止 - 状态: is_playing=False, is_paused=False, is_finished=False[/cyan]")
     except Exception as e:
         log_and_print(f"[bold red]停止音乐时出错: {e}[/bold red]")
 
-def check_volume_change_signal():
-    """检查并处理音量变更信号"""
+def apply_volume_change(new_volume):
+    """应用新的全局音量，供信号文件和消息总线共用"""
     global volume
     
+    with music_control_lock:
+        if new_volume is not None and new_volume != volume:
+            volume = new_volume
+            log_and_print(f"[cyan]全局音量已更新为: {int(volume * 100)}%[/cyan]")
+            
+            # 如果音乐正在播放，立即应用新音量
+            if music_playing_status and not STREAMING_MODE:
+                audio_player.set_music_volume(volume)
+                log_and_print(f"[cyan]已应用新音量到当前播放的音乐[/cyan]")
+
+def check_volume_change_signal():
+    """检查并处理音量变更信号（兼容未连接消息总线的旧客户端）"""
     try:
         signal_path = get_volume_change_signal_path()
         if not os.path.exists(signal_path):
@@ -1129,15 +1071,7 @@ def check_volume_change_signal():
         with open(signal_path, 'r', encoding='utf-8') as f:
             signal_data = json.load(f)
         
-        new_volume = signal_data.get('volume')
-        if new_volume is not None and new_volume != volume:
-            volume = new_volume
-            log_and_print(f"[cyan]全局音量已更新为: {int(volume * 100)}%[/cyan]")
-            
-            # 如果音乐正在播放，立即应用新音量
-            if music_playing_status and not STREAMING_MODE:
-                pygame.mixer.music.set_volume(volume)
-                log_and_print(f"[cyan]已应用新音量到当前播放的音乐[/cyan]")
+        apply_volume_change(signal_data.get('volume'))
         
         # 删除信号文件以避免重复处理
         os.remove(signal_path)
@@ -1145,27 +1079,84 @@ def check_volume_change_signal():
     except Exception as e:
         log_and_print(f"[bold red]处理音量变更信号时出错: {e}[/bold red]")
 
-def main_loop():
-    global current_level, previous_time, previous_target_time  # 更新全局变量引用
-    while True:
-        today = datetime.now().weekday()
-        if today == 0:  # 星期一
-            row, col = 21, column_to_index('N')
-        elif today == 1:  # 星期二
-            row, col = 21, column_to_index('AH')
-        elif today == 2:  # 星期三
-            row, col = 55, column_to_index('N')
-        elif today == 3:  # 星期四
-            row, col = 55, column_to_index('AH')
-        elif today == 4:  # 星期五
-            row, col = 89, column_to_index('N')
-        elif today == 5:  # 星期六
-            row, col = 89, column_to_index('AH')
-        elif today == 6:  # 星期日
-            row, col = 123, column_to_index('N')
+# 本地消息总线服务端，启动失败时只使用信号文件
+message_bus_server = None
 
-        # 读取 Excel 数据
-        cell_time, relative_values = read_time_from_excel(excel_file, row, col)
+def on_bus_control(message):
+    handle_music_control_action(message.get('action'))
+
+def on_bus_volume(message):
+    apply_volume_change(message.get('volume'))
+
+def start_message_bus():
+    """启动本地消息总线，悬浮按钮和33娘通过它发送控制指令、接收播放状态"""
+    global message_bus_server
+    try:
+        server = message_bus.MessageBusServer(
+            on_error=lambda e: log_and_print(f"[bold yellow]消息总线连接出错: {e}[/bold yellow]")
+        )
+        server.subscribe(on_bus_control, message_bus.MSG_CONTROL)
+        server.subscribe(on_bus_volume, message_bus.MSG_VOLUME)
+        message_bus_server = server.start()
+        log_and_print(f"[cyan]消息总线已启动: {server.address}[/cyan]")
+    except Exception as e:
+        log_and_print(f"[bold yellow]消息总线启动失败，将使用信号文件通信: {e}[/bold yellow]")
+
+def publish_music_status(is_playing, is_paused, is_finished):
+    """通过消息总线广播播放状态"""
+    if message_bus_server is None:
+        return
+    message_bus_server.publish(message_bus.status_message(is_playing, is_paused, is_finished, STREAMING_MODE))
+
+# 没有任何文件变化时，主循环最长的休眠时间（秒）
+MAX_IDLE_SECONDS = 300
+
+def get_watched_paths():
+    """主循环需要监听的文件：当周昼夜表和两个控制信号文件"""
+    return [excel_file, get_music_control_signal_path(), get_volume_change_signal_path()]
+
+def get_next_wakeup_timeout():
+    """计算下一次定时唤醒的等待秒数：零点换日，最长不超过 MAX_IDLE_SECONDS（21:30 自动关机检查由定时调度器触发）"""
+    timeouts = [MAX_IDLE_SECONDS, file_watcher.seconds_until(0, 0) + 1]
+    return max(0.5, min(timeouts))
+
+def schedule_next_reward(total_minutes):
+    """按当前学习时长推算下一个半小时节点，在后台预加载它的奖励音乐"""
+    next_half_hours = total_minutes // 30 + 1
+    if next_half_hours in played_music:
+        return
+    next_level = get_level_table().level_for_minutes(next_half_hours * 30)
+    if next_level is not None:
+        reward_preloader.schedule(next_level, next_half_hours)
+
+def measure_stage(timer, stage):
+    """timer 为 None 时（主程序）不计时；回放时由 replay_harness.StageTimer 统计各阶段耗时"""
+    return timer.measure(stage) if timer is not None else contextlib.nullcontext()
+
+def handle_study_reading(cell_time, relative_values, clock=datetime.now, audio=None, notifier=None,
+                         threshold_time=None, timer=None):
+    """
+    处理一次昼夜表读数，main_loop 和 replay_harness 共用
+
+    学习时间或目标时间变化时输出状态表格并保存学习记录；到达新的半小时节点时播放奖励音乐、
+    更新悬浮按钮数据和壁纸、播放音效、显示奖状、更新播放次数并发送通知，然后预加载下一个节点的音乐。
+
+    参数:
+        cell_time: 目前已学习时长单元格（'H:MM:SS'）
+        relative_values: [预测今日学习时长, 目标学习时长, 剩余空闲时间]
+        clock: 返回当前时间的函数
+        audio: 音频后端，默认为 audio_player
+        notifier: 通知后端（notify / celebrate），默认为 desktop_notifier
+        threshold_time: 本轮醒来时的 time.perf_counter()，用于记录节点到音乐响起的延迟
+        timer: 按阶段计时的对象（measure(阶段) 返回上下文管理器），为 None 时不计时
+
+    返回:
+        bool: 学习时间或目标时间是否发生变化
+    """
+    global current_level, previous_time, previous_target_time
+    notifier = notifier or desktop_notifier
+
+    with measure_stage(timer, 'decision'):
         predicted_study_time, target_study_time, remaining_free_time = relative_values
 
         # 格式化时间
@@ -1175,169 +1166,153 @@ def main_loop():
         target_study_time_str = str(target_study_time)
 
         # 检查学习时间或目标时间是否发生变化
-        if cell_time != previous_time or target_study_time != previous_target_time:
-            current_time = datetime.now().strftime("%H:%M:%S")
-
-            # 创建表格
-            table = Table(show_header=False, box=box.ROUNDED, border_style="white")
-            table.add_column("数据类型", justify="center")
-            table.add_column("数值", justify="center")
-
-            # 添加表格内容
-            table.add_row("现在时间", current_time)
-            table.add_row(Text("目前已学习时长", style="cyan bold"), Text(formatted_cell_time, style="cyan bold"))
-            table.add_row(Text("预测今日学习时长", style="orange1 bold"), Text(formatted_predicted_time, style="orange1 bold"))
-            table.add_row(Text("目标学习时长", style="red bold"), Text(f"{target_study_time_str} 小时", style="red bold"))
-            table.add_row(Text("剩余空闲时间", style="green bold"), Text(formatted_remaining_time, style="green bold"))
+        changed = cell_time != previous_time or target_study_time != previous_target_time
+        total_minutes = None
+        if changed and isinstance(cell_time, str) and len(cell_time.split(':')) == 3:
+            total_minutes = parse_minutes(cell_time)
+    if not changed:
+        return False
+
+    current_time = clock().strftime("%H:%M:%S")
+
+    with measure_stage(timer, 'log'):
+        # 创建表格
+        table = Table(show_header=False, box=box.ROUNDED, border_style="white")
+        table.add_column("数据类型", justify="center")
+        table.add_column("数值", justify="center")
+
+        # 添加表格内容
+        table.add_row("现在时间", current_time)
+        table.add_row(Text("目前已学习时长", style="cyan bold"), Text(formatted_cell_time, style="cyan bold"))
+        table.add_row(Text("预测今日学习时长", style="orange1 bold"), Text(formatted_predicted_time, style="orange1 bold"))
+        table.add_row(Text("目标学习时长", style="red bold"), Text(f"{target_study_time_str} 小时", style="red bold"))
+        table.add_row(Text("剩余空闲时间", style="green bold"), Text(formatted_remaining_time, style="green bold"))
+
+        # 如果目标时间发生变化，添加特殊提示
+        if target_study_time != previous_target_time and previous_target_time is not None:
+            log_and_print(f"[bold yellow]目标学习时长已更新: {previous_target_time} → {target_study_time} 小时[/bold yellow]")
+
+        log_and_print(table)  # 将输出保存到日志
+        report_first_table()
+
+        # 打印总分钟数和半小时数
+        if total_minutes is not None:
+            log_and_print(f"[magenta]总分钟数: {total_minutes}, 经过的半小时数: {total_minutes // 30}[/magenta]")
+        elif isinstance(cell_time, str) and len(cell_time.split(':')) == 3:
+            log_and_print(f"[bold red]时间格式不正确，无法解析为分钟数。值: {cell_time}[/bold red]")
+
+    # 保存数据到 CSV
+    with measure_stage(timer, 'record'):
+        save_record(current_time, formatted_cell_time, formatted_predicted_time, target_study_time_str, formatted_remaining_time)
+
+    # 播放音乐效果和通知
+    if total_minutes is not None:
+        try:
+            total_half_hours = total_minutes // 30
+
+            # 学习时长所属的级别（级别范围互不重叠，只会命中一个），每个半小时节点只奖励一次
+            level = get_level_table().level_for_minutes(total_minutes)
+            if level is not None and total_half_hours not in played_music:
+                with measure_stage(timer, 'selection'):
+                    # 优先使用为这个节点预加载好的音乐，没有时现场选歌
+                    track = reward_preloader.take(level, total_half_hours)
+                    if track is not None:
+                        selected_file, music_files, duration = track.song, track.music_files, track.duration
+                        audio_data, wallpaper = track.data, track.wallpaper
+                    else:
+                        selected_file, music_files = select_music_file(total_minutes, level)
+                        duration = get_music_duration(os.path.join(music_folder, level, selected_file))
+                        audio_data, wallpaper = None, wallpaper_lookup.get(selected_file)
+
+                # 构造音乐文件路径
+                music_path = os.path.join(music_folder, level, selected_file)
+
+                with measure_stage(timer, 'playback'):
+                    # 先播放音乐，壁纸、祝贺动画和奖状在音乐响起后处理
+                    play_music(music_path, audio_data, threshold_time=threshold_time, audio=audio)
+
+                    # 更新悬浮按钮数据中的音乐信息（level 是当前音乐所属的级别）
+                    minutes_calc = int(duration // 60)
+                    seconds_calc = int(duration % 60)
+                    button_state.update({
+                        "current_level": f"『{level}』",
+                        "study_time": formatted_cell_time,
+                        "target_time": f"{target_study_time_str}小时",
+                        "predicted_time": formatted_predicted_time,
+                        "remaining_time": formatted_remaining_time,
+                        "current_music": selected_file,
+                        "music_duration": f"{minutes_calc}:{seconds_calc:02d}"
+                    })
+
+                    # 壁纸脚本启动后会立即读取悬浮按钮数据中的级别和音乐，先把上面的修改落盘
+                    flush_button_state()
+
+                    # 调用 wallpaper_by_music_apply.py 脚本，并传递 selected_file 和 duration
+                    try:
+                        if WALLPAPER_ENGINE_MODE:
+                            wallpaper_id, wallpaper_name, artwork_source = wallpaper
+                            subprocess.Popen([
+                                'python', 'wallpaper_by_music_apply.py', selected_file, str(duration),
+                                wallpaper_id or '', wallpaper_name, artwork_source
+                            ])
+                            log_and_print("[cyan]壁纸引擎：根据音乐切换壁纸[/cyan]")
+                        else:
+                            log_and_print("[cyan]壁纸引擎：已禁用[/cyan]")
+                    except Exception as e:
+                        log_and_print(f"[bold red]调用 wallpaper_by_music_apply.py 时出错: {e}[/bold red]")
+
+                    if level != current_level:
+                        current_level = level
+                        print_song_list(level, music_files)
+                        play_effect_sound(level_up_effect, audio)
+                        notifier.celebrate(current_level, selected_file)
+
+                        # 更新悬浮按钮数据（current_music 和 music_duration 已在上面写入内存）
+                        button_state.update({"current_level": f"『{current_level}』"})
+                    else:
+                        play_effect_sound(half_hour_effect, audio)
+
+                    # 使用格式化后的时间传递给 print_certificate
+                    print_certificate(formatted_cell_time, selected_file, level)
+                    notifier.notify("学习成就", f"恭喜你达成了 {formatted_cell_time} 学习时长!\n正在播放的是: {selected_file}")
+
+                # 更新播放次数
+                with measure_stage(timer, 'play_count'):
+                    update_song_play_count(level, selected_file)
+
+                # 添加到已播放的音乐集合
+                played_music.add(total_half_hours)
+
+            # 为下一个半小时节点预加载奖励音乐
+            with measure_stage(timer, 'selection'):
+                schedule_next_reward(total_minutes)
 
-            # 如果目标时间发生变化，添加特殊提示
-            if target_study_time != previous_target_time and previous_target_time is not None:
-                log_and_print(f"[bold yellow]目标学习时长已更新: {previous_target_time} → {target_study_time} 小时[/bold yellow]")
+        except Exception as e:
+            log_and_print(f"[bold red]发生未知错误。值: {cell_time}，错误: {e}[/bold red]")
 
-            log_and_print(table)  # 将输出保存到日志
+    # 更新前一次的值
+    previous_time = cell_time
+    previous_target_time = target_study_time
+    return True
 
-            # 打印总分钟数和半小时数
-            if isinstance(cell_time, str) and len(cell_time.split(':')) == 3:
-                try:
-                    hours, minutes, seconds = map(int, cell_time.split(':'))
-                    total_minutes = hours * 60 + minutes
-                    total_half_hours = total_minutes // 30
+def main_loop():
+    watcher = file_watcher.create_watcher(get_watched_paths())
+    while True:
+        # 跨过零点后轮换当天的文件和状态，换周时监听新的昼夜表
+        if rollover.check():
+            watcher.update_paths(get_watched_paths())
 
-                    log_and_print(f"[magenta]总分钟数: {total_minutes}, 经过的半小时数: {total_half_hours}[/magenta]")
-                except ValueError:
-                    log_and_print("[bold red]时间格式不正确，无法解析为整数1。[/bold red]")
+        # 本轮醒来的时刻，用于计算半小时节点到音乐响起的延迟
+        loop_start = time.perf_counter()
+        today = datetime.now().weekday()
+        row, col = get_study_cell(today)
 
-            # 保存数据到 CSV
-            save_record(current_time, formatted_cell_time, formatted_predicted_time, target_study_time_str, formatted_remaining_time)
+        # 读取 Excel 数据
+        cell_time, relative_values = read_time_from_excel(excel_file, row, col)
+        handle_study_reading(cell_time, relative_values, threshold_time=loop_start)
 
-            # 播放音乐效果和通知
-            if isinstance(cell_time, str) and len(cell_time.split(':')) == 3:
-                try:
-                    hours, minutes, seconds = map(int, cell_time.split(':'))
-                    total_minutes = hours * 60 + minutes
-                    total_half_hours = total_minutes // 30
-
-                    for level, start_hour, end_hour, _ in level_config:
-                        if start_hour * 60 <= total_minutes < end_hour * 60:
-                            if total_half_hours not in played_music:
-                                selected_file, music_files = select_music_file(total_minutes, level)
-
-                                # 构造音乐文件路径
-                                music_path = os.path.join(music_folder, level, selected_file)
-                                
-                                # 获取音乐时长
-                                duration = get_music_duration(music_path)
-
-                                # 更新悬浮按钮数据中的音乐信息
-                                try:
-                                    json_path_music = os.path.join(os.path.dirname(__file__), "floating_button_data.json")
-                                    button_data_for_music = {}
-                                    if os.path.exists(json_path_music):
-                                        with open(json_path_music, 'r', encoding='utf-8') as f_music:
-                                            try:
-                                                button_data_for_music = json.load(f_music)
-                                            except json.JSONDecodeError:
-                                                log_and_print(f"[bold yellow]警告: floating_button_data.json 文件格式错误 (音乐更新前读取)。[/bold yellow]")
-
-                                    # level 是当前音乐所属的级别
-                                    level_name_for_music_update = f"『{level}』" 
-                                    
-                                    # 格式化音乐时长
-                                    minutes_calc = int(duration // 60)
-                                    seconds_calc = int(duration % 60)
-                                    formatted_duration_calc = f"{minutes_calc}:{seconds_calc:02d}"
-                                    
-                                    music_update_payload = {
-                                        "current_level": level_name_for_music_update,
-                                        "study_time": formatted_cell_time,
-                                        "target_time": f"{target_study_time_str}小时",
-                                        "predicted_time": formatted_predicted_time,
-                                        "remaining_time": formatted_remaining_time,
-                                        "current_music": selected_file,
-                                        "music_duration": formatted_duration_calc
-                                    }
-                                    button_data_for_music.update(music_update_payload)
-                                    
-                                    with open(json_path_music, 'w', encoding='utf-8') as f_music_write:
-                                        json.dump(button_data_for_music, f_music_write, ensure_ascii=False, indent=2)
-                                    log_and_print(f"[cyan]已更新悬浮按钮数据(包含音乐): {button_data_for_music}[/cyan]")
-                                except Exception as e:
-                                    log_and_print(f"[bold red]更新悬浮按钮音乐数据时出错: {e}[/bold red]")
-                                
-                                # 调用 wallpaper_by_music_apply.py 脚本，并传递 selected_file 和 duration
-                                try:
-                                    if WALLPAPER_ENGINE_MODE:
-                                        subprocess.Popen(['python', 'wallpaper_by_music_apply.py', selected_file, str(duration)])
-                                        log_and_print("[cyan]壁纸引擎：根据音乐切换壁纸[/cyan]")
-                                    else:
-                                        log_and_print("[cyan]壁纸引擎：已禁用[/cyan]")
-                                except Exception as e:
-                                    log_and_print(f"[bold red]调用 wallpaper_by_music_apply.py 时出错: {e}[/bold red]")
-
-                                if level != current_level:
-                                    current_level = level
-                                    print_song_list(level, music_files)
-                                    play_effect_sound(level_up_effect)
-                                    show_congratulations(current_level, selected_file)
-                                    show_congratulations_with_gif()
-                                    
-                                    # 立即更新悬浮按钮数据
-                                    try:
-                                        json_path_level_change = os.path.join(os.path.dirname(__file__), "floating_button_data.json")
-                                        button_data_on_level_change = {}
-                                        if os.path.exists(json_path_level_change):
-                                            with open(json_path_level_change, 'r', encoding='utf-8') as f_lc:
-                                                try:
-                                                    button_data_on_level_change = json.load(f_lc)
-                                                except json.JSONDecodeError:
-                                                    log_and_print(f"[bold yellow]警告: floating_button_data.json 文件格式错误 (阶段变化更新前读取)。[/bold yellow]")
-                                        
-                                        # 此时全局 current_level 变量已更新为新的 level
-                                        level_change_payload = {
-                                            "current_level": f"『{current_level}』", 
-                                            "study_time": formatted_cell_time,
-                                            "target_time": f"{target_study_time_str}小时",
-                                            "predicted_time": formatted_predicted_time,
-                                            "remaining_time": formatted_remaining_time
-                                            # current_music 和 music_duration 会被保留，因为它们刚被上面的音乐更新逻辑写入
-                                        }
-                                        button_data_on_level_change.update(level_change_payload)
-                                        
-                                        with open(json_path_level_change, 'w', encoding='utf-8') as f_lc_write:
-                                            json.dump(button_data_on_level_change, f_lc_write, ensure_ascii=False, indent=2)
-                                        log_and_print(f"[cyan]已更新悬浮按钮数据(阶段变化确认): {button_data_on_level_change}[/cyan]")
-                                    except Exception as e:
-                                        log_and_print(f"[bold red]更新悬浮按钮数据(阶段变化)时出错: {e}[/bold red]")
-                                else:
-                                    play_effect_sound(half_hour_effect)
-
-                                # 使用格式化后的时间传递给 print_certificate
-                                print_certificate(formatted_cell_time, selected_file, level)
-                                notification_thread = threading.Thread(
-                                    target=show_notification,
-                                    args=("学习成就", f"恭喜你达成了 {formatted_cell_time} 学习时长!\n正在播放的是: {selected_file}")
-                                )
-                                notification_thread.start()
-                                
-                                # 播放音乐
-                                play_music(music_path)
-                                
-                                # 添加到已播放的音乐集合
-                                played_music.add(total_half_hours)
-
-                except ValueError:
-                    log_and_print("[bold red]时间格式不正确，无法解析为整数2。[/bold red]")
-                except Exception as e:
-                    log_and_print(f"[bold red]发生未知错误。值: {cell_time}，错误: {e}[/bold red]")
-
-            # 更新前一次的值
-            previous_time = cell_time
-            previous_target_time = target_study_time
-
-        # ==== AUTO_SHUTDOWN_CHECK_START ====
-        # 检查是否需要启动自动关机程序
-        AutoShutdown.check_and_start_shutdown()
-        # ==== AUTO_SHUTDOWN_CHECK_END ====
+        # 本轮对悬浮按钮数据的修改统一落盘
+        flush_button_state()
 
         # 检查音乐控制信号
         check_music_control_signal()
@@ -1345,70 +1320,147 @@ def main_loop():
         # 检查音量变更信号
         check_volume_change_signal()
 
-        time.sleep(2)  # 减少间隔到2秒，让audio_visualizer.html能更及时响应状态变化
+        # 等待昼夜表或信号文件发生变化，控制信号写入后立即被处理；无变化时只在定时任务到期时醒来
+        watcher.wait(get_next_wakeup_timeout())
+
+# 启动基准测试：对比延迟导入前后导入本模块的耗时
+DEFERRED_IMPORTS = ['pandas', 'tkinter', 'PIL.ImageTk', 'PyQt5.QtWidgets', 'plyer', 'pyautogui']
+
+def measure_import_time(statement):
+    """
+    在新进程中用 python -X importtime 执行 statement
+
+    返回:
+        (总耗时毫秒, [(累计耗时毫秒, 模块名)]) 列表为顶层模块直接导入的模块，按耗时从大到小排列
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, encoding='utf-8', errors='replace'
+    )
+    total_ms = 0.0
+    modules = []
+    for line in result.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        # 每缩进两个空格表示被上一层模块导入
+        depth = (len(name) - len(name.lstrip())) // 2
+        ms = int(parts[1]) / 1000
+        if depth == 0:
+            total_ms += ms
+        elif depth == 1:
+            modules.append((ms, name.strip()))
+    modules.sort(reverse=True)
+    return total_ms, modules
+
+def benchmark_startup(top=10):
+    """统计导入本模块的耗时，以及延迟导入的模块若在启动时导入需要的额外耗时"""
+    import importlib.util
+
+    total_ms, modules = measure_import_time('import progressive_study_player')
+    log_and_print(f"[bold cyan]导入 progressive_study_player: {total_ms:.0f} ms，耗时最多的直接导入:[/bold cyan]")
+    for ms, name in modules[:top]:
+        log_and_print(f"  {ms:8.1f} ms  {name}")
+
+    available = [name for name in DEFERRED_IMPORTS if importlib.util.find_spec(name.split('.')[0]) is not None]
+    missing = [name for name in DEFERRED_IMPORTS if name not in available]
+    if available:
+        deferred_ms, _ = measure_import_time('import ' + ', '.join(available))
+        log_and_print(f"[bold cyan]延迟导入的模块（{', '.join(available)}）: {deferred_ms:.0f} ms，不再计入启动耗时[/bold cyan]")
+    if missing:
+        log_and_print(f"[yellow]未安装、未计入: {', '.join(missing)}[/yellow]")
+    log_and_print(f"[cyan]首次显示学习时长表格的目标: {FIRST_TABLE_TARGET_MS} ms（启动时在日志中报告实际耗时）[/cyan]")
+
+def main():
+    global volume, STREAMING_MODE, WALLPAPER_ENGINE_MODE, scheduler
+
+    # 处理命令行参数
+    parser = argparse.ArgumentParser(description='渐进学习时长激励播放器')
+    parser.add_argument('--show-playlist', help='显示指定级别的歌单')
+    parser.add_argument('--show-certificate', nargs=2, help='显示学习奖状，参数为级别和学习时长')
+    parser.add_argument('--startup-benchmark', action='store_true', help='统计启动导入耗时后退出')
+    args = parser.parse_args()
+
+    if args.startup_benchmark:
+        setup_logging()
+        benchmark_startup()
+        return
+
+    init_app()
+
+    if args.show_playlist:
+        # 显示指定级别的歌单
+        level_folder = os.path.join(music_folder, args.show_playlist)
+        if os.path.exists(level_folder):
+            music_files = [filename for filename in os.listdir(level_folder) if filename.endswith(('.mp3', '.flac'))]
+            print_song_list(args.show_playlist, music_files)
+        else:
+            log_and_print(f"[bold red]找不到级别 {args.show_playlist} 的歌单文件夹[/bold red]")
+        sys.exit(0)
+    elif args.show_certificate:
+        import pandas as pd
+
+        # 显示学习奖状
+        level, study_time = args.show_certificate
+        # 获取最后播放的歌曲
+        csv_file = os.path.join(play_count_folder, f"{level}_play_count.csv")
+        last_song = "最近播放的歌曲"
+        if os.path.exists(csv_file):
+            try:
+                df = pd.read_csv(csv_file)
+                if not df.empty:
+                    # 获取播放次数最多的歌曲作为最近播放
+                    last_song = df.loc[df['学习成就播放次数'].idxmax(), '歌曲']
+            except Exception as e:
+                log_and_print(f"[bold red]读取最近播放歌曲时出错: {e}[/bold red]")
 
-# 将列标签转换为索引
-def column_to_index(col):
-    index = 0
-    for char in col:
-        index = index * 26 + (ord(char) - ord('A') + 1)
-    return index - 1
+        print_certificate(study_time, last_song, level)
+        update_song_play_count(level, last_song)
+        sys.exit(0)
 
-# 获取音量设置
-volume = get_volume()
+    # 获取音量设置
+    volume = get_volume()
 
-# 获取OBS直播模式设置
-STREAMING_MODE = get_streaming_mode()
+    # 获取OBS直播模式设置
+    STREAMING_MODE = get_streaming_mode()
 
-# 获取壁纸引擎模式设置
-WALLPAPER_ENGINE_MODE = get_wallpaper_engine_mode()
+    # 获取壁纸引擎模式设置
+    WALLPAPER_ENGINE_MODE = get_wallpaper_engine_mode()
 
-# 启动每5分钟播放音效的线程
-five_minute_thread = threading.Thread(target=play_five_minute_effect)
-five_minute_thread.daemon = True  # 设置为守护线程，主线程退出时该线程自动退出
-five_minute_thread.start()
+    # 所有定时任务注册到同一个时间轮调度线程，只在任务到期时醒来
+    scheduler = get_default_wheel(
+        on_error=lambda job, e: log_and_print(f"[bold red]定时任务 {job.name} 出错: {e}[/bold red]")
+    )
 
-# 在文件顶部导入部分添加
-import subprocess
-try:
-    # 启动悬浮按钮作为独立进程
-    subprocess.Popen([sys.executable, 'floating_button_process.py'], 
-                    creationflags=subprocess.CREATE_NO_WINDOW)
-except Exception as e:
-    log_and_print(f"[bold red]启动悬浮按钮进程时出错: {e}[/bold red]")
-
-# 处理命令行参数
-parser = argparse.ArgumentParser(description='渐进学习时长激励播放器')
-parser.add_argument('--show-playlist', help='显示指定级别的歌单')
-parser.add_argument('--show-certificate', nargs=2, help='显示学习奖状，参数为级别和学习时长')
-args = parser.parse_args()
-
-if args.show_playlist:
-    # 显示指定级别的歌单
-    level_folder = os.path.join(music_folder, args.show_playlist)
-    if os.path.exists(level_folder):
-        music_files = [filename for filename in os.listdir(level_folder) if filename.endswith(('.mp3', '.flac'))]
-        print_song_list(args.show_playlist, music_files)
-    else:
-        log_and_print(f"[bold red]找不到级别 {args.show_playlist} 的歌单文件夹[/bold red]")
-    sys.exit(0)
-elif args.show_certificate:
-    # 显示学习奖状
-    level, study_time = args.show_certificate
-    # 获取最后播放的歌曲
-    csv_file = os.path.join(play_count_folder, f"{level}_play_count.csv")
-    last_song = "最近播放的歌曲"
-    if os.path.exists(csv_file):
-        try:
-            df = pd.read_csv(csv_file)
-            if not df.empty:
-                # 获取播放次数最多的歌曲作为最近播放
-                last_song = df.loc[df['学习成就播放次数'].idxmax(), '歌曲']
-        except Exception as e:
-            log_and_print(f"[bold red]读取最近播放歌曲时出错: {e}[/bold red]")
-    
-    print_certificate(study_time, last_song, level)
-    sys.exit(0)
+    # 每个整5分钟播放音效
+    scheduler.call_every(300, play_five_minute_effect, name='五分钟音效', anchor=dt_time(0, 0))
+
+    # ==== AUTO_SHUTDOWN_CHECK_START ====
+    # 每天 21:30 启动自动关机程序；启动时已过 21:30 则立即启动
+    scheduler.call_at(21, 30, AutoShutdown.check_and_start_shutdown, name='自动关机检查')
+    AutoShutdown.check_and_start_shutdown()
+    # ==== AUTO_SHUTDOWN_CHECK_END ====
+
+    try:
+        # 启动悬浮按钮作为独立进程
+        subprocess.Popen([sys.executable, 'floating_button_process.py'],
+                        creationflags=subprocess.CREATE_NO_WINDOW)
+    except Exception as e:
+        log_and_print(f"[bold red]启动悬浮按钮进程时出错: {e}[/bold red]")
+
+    # 后台预扫描曲库元数据
+    threading.Thread(target=prescan_music_library, name='MetadataPrescan', daemon=True).start()
+
+    # 启动本地消息总线（悬浮按钮进程会自动连接）
+    start_message_bus()
+
+    # 启动主循环
+    main_loop()
 
-# 启动主循环
-main_loop()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,638 @@
+"""
+学习日回放模块
+
+把录制下来的一天（学习记录_<日期>.csv、五分钟记录_<日期>.csv，可选当周昼夜表 .xls）
+按原来的时间顺序逐条交给 progressive_study_player.handle_study_reading（main_loop 处理每次读数的同一个函数），
+用虚拟时钟代替真实时间，一整天在几秒内回放完毕，并统计每个阶段的耗时。
+
+回放时:
+    - 时间轮（TimerWheel）使用虚拟时钟，整 5 分钟音效、音乐播放结束等定时事件按虚拟时间触发
+    - 音频与系统通知换成只记录调用的后端（FakeAudioService / FakeNotifier），不需要声卡和桌面
+    - 主程序的全局状态换成回放用的对象：预加载、选歌、播放次数、元数据、悬浮按钮数据、学习记录写入、
+      日志输出和图表生成使用真实实现，所有输出写入临时目录，不会改动真实的播放次数和学习记录；
+      直播模式和壁纸引擎关闭，不会触发 OBS 快捷键或启动壁纸脚本
+    - 主程序的全局状态只有一份，同一进程中同时只能有一个 ReplayPlayer
+
+统计的阶段:
+    excel      读取昼夜表单元格（指定 --xls 时）
+    decision   解析学习时长、判断级别和半小时节点
+    log        输出状态表格到控制台和日志
+    record     追加学习记录
+    selection  取出预加载的音乐或现场选歌，预加载下一个节点的音乐
+    playback   交给音频后端播放、更新悬浮按钮数据、播放音效、显示奖状、发送通知
+    play_count 更新播放次数
+    chart      生成学习时长图表（按虚拟时间每 chart_interval 秒最多一次，与 ChartRenderWorker 一致）
+    five_min   处理五分钟记录
+
+用法:
+    python replay_harness.py --date 2025-03-01
+    python replay_harness.py --study-log 学习记录.csv --five-minute-log 五分钟记录.csv --xls 第1周.xls
+    python replay_harness.py --synthetic        # 生成一天的模拟记录和小型曲库后回放
+    python replay_harness.py --synthetic --days 28 --no-chart --trace-memory   # 连续回放四周，统计每天结束时的内存
+"""
+
+import csv
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+
+import progressive_study_player as study_player
+from app_state import ButtonDataState
+from audio_metadata import AudioMetadataCache
+from day_rollover import DayRollover
+from level_table import LevelTable, get_level_table
+from play_count_index import PlayCountRegistry
+from reward_preloader import RewardPreloader, WallpaperLookup
+from study_record_writer import StudyRecordWriter
+from study_time_parser import parse_minutes
+from timer_wheel import TimerWheel
+
+STAGES = ('excel', 'decision', 'log', 'record', 'selection', 'playback', 'play_count', 'chart', 'five_min')
+
+# 与 ChartRenderWorker 默认值一致
+DEFAULT_CHART_INTERVAL = 30.0
+
+# MPEG-1 Layer III, 128kbps, 44.1kHz 的静音帧（4 字节帧头 + 413 字节数据），每帧 1152 个采样
+_SILENT_MP3_FRAME = b'\xff\xfb\x90\x00' + b'\x00' * 413
+_MP3_FRAMES_PER_SECOND = 38
+
+# 后端保留的最近调用条数，连续回放多天时内存不随天数增长
+RECENT_EVENTS = 256
+
+
+class VirtualClock:
+    """虚拟时钟：monotonic() 为回放开始后经过的秒数，now() 为对应的墙上时间"""
+
+    def __init__(self, start):
+        self.start = start
+        self._elapsed = 0.0
+
+    def monotonic(self):
+        return self._elapsed
+
+    def now(self):
+        return self.start + timedelta(seconds=self._elapsed)
+
+    def set(self, wall_time):
+        self._elapsed = max(self._elapsed, (wall_time - self.start).total_seconds())
+
+
+class FakeAudioService:
+    """
+    与 AudioService 接口相同、只记录调用的音频后端
+
+    音乐的结束回调按曲目时长在时间轮上（虚拟时间）触发。
+    只保留最近 RECENT_EVENTS 次调用，另按类型计数。
+    """
+
+    def __init__(self, wheel):
+        self.wheel = wheel
+        self.events = deque(maxlen=RECENT_EVENTS)
+        self.counts = Counter()
+        self._end_job = None
+
+    def _record(self, *event):
+        self.events.append((self.wheel.wall_clock(),) + event)
+        self.counts[event[0]] += 1
+
+    def play_music(self, path, data=None, volume=None, duration=None, on_start=None, on_end=None, on_error=None):
+        self.stop()
+        self._record('music', path)
+        if on_start:
+            on_start()
+        if duration:
+            self._end_job = self.wheel.call_later(duration, lambda: self._finish(on_end), name='音乐播放结束')
+
+    def _finish(self, on_end):
+        self._end_job = None
+        self._record('music_end')
+        if on_end:
+            on_end()
+
+    def pause(self):
+        self._record('pause')
+
+    def resume(self):
+        self._record('resume')
+
+    def stop(self):
+        if self._end_job is not None:
+            self._end_job.cancel()
+            self._end_job = None
+
+    def set_music_volume(self, volume):
+        self._record('volume', volume)
+
+    def play_effect(self, path, volume=1.0, on_error=None):
+        self._record('effect', path)
+
+    def stop_effects(self):
+        pass
+
+    def count(self, kind):
+        return self.counts[kind]
+
+
+class FakeNotifier:
+    """与 progressive_study_player.DesktopNotifier 接口相同、只记录内容的通知后端"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.notifications = deque(maxlen=RECENT_EVENTS)
+        self.count = 0
+        self.celebrations = 0
+
+    def notify(self, title, message):
+        self.notifications.append((self.clock.now(), title, message))
+        self.count += 1
+
+    def celebrate(self, level, song):
+        self.celebrations += 1
+
+
+class StageTimer:
+    """按阶段累计耗时（次数、总耗时、最大耗时）"""
+
+    def __init__(self):
+        self.totals = OrderedDict((stage, [0, 0.0, 0.0]) for stage in STAGES)
+
+    def measure(self, stage):
+        timer = self
+
+        class _Measure:
+            def __enter__(self):
+                self.start = time.perf_counter()
+
+            def __exit__(self, *exc):
+                elapsed = time.perf_counter() - self.start
+                totals = timer.totals.setdefault(stage, [0, 0.0, 0.0])
+                totals[0] += 1
+                totals[1] += elapsed
+                totals[2] = max(totals[2], elapsed)
+                return False
+
+        return _Measure()
+
+    def report(self):
+        rows = []
+        for stage, (count, total, longest) in self.totals.items():
+            if not count:
+                continue
+            rows.append({
+                'stage': stage,
+                'count': count,
+                'total_ms': total * 1000,
+                'avg_ms': total * 1000 / count,
+                'max_ms': longest * 1000,
+            })
+        return rows
+
+
+def duration_to_cell_time(text):
+    """学习记录中的 'H时MM分' 转换为昼夜表单元格的 'H:MM:00'，无法解析时原样返回"""
+    minutes = parse_minutes(text) if isinstance(text, str) and '时' in text else None
+    if minutes is None:
+        return text
+    return f"{minutes // 60}:{minutes % 60:02d}:00"
+
+
+def read_study_log(csv_file):
+    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def read_five_minute_log(csv_file):
+    if not csv_file or not os.path.exists(csv_file):
+        return []
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def build_events(day, study_rows, five_minute_rows):
+    """把两种记录合并为按时间排序的事件列表 [(时间, 类型, 行)]"""
+    events = []
+    for row in study_rows:
+        moment = datetime.combine(day, datetime.strptime(row['现在时间'], '%H:%M:%S').time())
+        events.append((moment, 'study', row))
+    for row in five_minute_rows:
+        moment = datetime.combine(day, datetime.strptime(row['时间'], '%H:%M').time())
+        events.append((moment, 'five_min', row))
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+class ReplayPlayer:
+    """
+    把回放的每条学习记录交给 progressive_study_player.handle_study_reading 处理
+
+    参数:
+        level_table: 级别表（level_table.LevelTable），用于图表配色；奖励的级别判断与主程序相同，使用 get_level_table()
+        music_folder: 曲库目录
+        work_dir: 输出目录（播放次数、学习记录、日志、图表、悬浮按钮数据和播放状态）
+        play_count_seed: 已有的播放次数目录，会复制到 work_dir 后使用
+        xls_file: 当周昼夜表，指定时每个事件都读取一次单元格并计入 excel 阶段
+        chart_mode: 'full' 每次生成完整的 HTML，'live' 只向实时图表追加数据（与 ChartRenderWorker 相同）
+    """
+
+    def __init__(self, level_table, music_folder, work_dir, day, effects=None,
+                 play_count_seed=None, xls_file=None, chart_interval=DEFAULT_CHART_INTERVAL, render_charts=True,
+                 chart_mode='full'):
+        self.level_table = level_table
+        self.music_folder = music_folder
+        self.work_dir = work_dir
+        self.day = day
+        self.effects = effects or {}
+        self.xls_file = xls_file
+        self.chart_interval = chart_interval
+        self.render_charts = render_charts
+        self.chart_mode = chart_mode
+        self.timer = StageTimer()
+
+        self.clock = VirtualClock(datetime.combine(day, dt_time(0, 0)))
+        self.wheel = TimerWheel(clock=self.clock.monotonic, wall_clock=self.clock.now)
+        self.audio = FakeAudioService(self.wheel)
+        self.notifier = FakeNotifier(self.clock)
+
+        play_count_folder = os.path.join(work_dir, 'play_count_logs')
+        if play_count_seed and os.path.isdir(play_count_seed):
+            shutil.copytree(play_count_seed, play_count_folder, dirs_exist_ok=True)
+        os.makedirs(play_count_folder, exist_ok=True)
+        self.registry = PlayCountRegistry(music_folder, play_count_folder)
+        self.metadata = AudioMetadataCache(None)
+
+        self.console, self.log_and_print = self._create_logger()
+        self._install_player()
+
+        self.writer = None
+        self._last_chart = None
+        self._chart_pending = False
+        self._open_day(day)
+
+        # 与主程序相同：跨过零点时轮换当天的文件并清空每日状态
+        self.rollover = DayRollover(clock=self.clock.now)
+        self.rollover.on_day(self._start_new_day)
+        self.memory_by_day = []
+        self.five_minute_records = 0
+
+        if self.effects.get('five_minute'):
+            self.wheel.call_every(
+                300, lambda: self.audio.play_effect(self.effects['five_minute']),
+                name='五分钟音效', anchor=dt_time(0, 0)
+            )
+
+    def _create_logger(self):
+        import logging
+        from rich.console import Console
+        from log_pipeline import LogPrinter
+
+        logger = logging.getLogger('replay_harness')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = logging.FileHandler(os.path.join(self.work_dir, 'replay_log.txt'), encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logger.addHandler(handler)
+        self._log_handler = handler
+        # 控制台输出（包括表格、奖状等 rich 对象）丢弃，只统计耗时（写入 StringIO 会让内存随回放天数增长）
+        self._null_output = open(os.devnull, 'w', encoding='utf-8')
+        console = Console(file=self._null_output, color_system='truecolor', width=120)
+        return console, LogPrinter(console, logger, capture_file=self._null_output)
+
+    def _install_player(self):
+        """把主程序的全局状态换成回放用的对象（init_app 和 main 在正常运行时设置的那些）"""
+        player = study_player
+        player.log_and_print = self.log_and_print
+        player.state_folder = self.work_dir
+        player.music_folder = self.music_folder
+        player.button_state = ButtonDataState(
+            os.path.join(self.work_dir, 'floating_button_data.json'),
+            on_error=lambda message, e: self.log_and_print(f"[bold yellow]警告: {message}: {e}[/bold yellow]")
+        )
+        # 学习记录保存后请求生成图表，由 _maybe_render_chart 按虚拟时间节流
+        player.chart_worker = self
+        player.play_count_registry = self.registry
+        player.metadata_cache = self.metadata
+        player.audio_player = self.audio
+        player.wallpaper_lookup = WallpaperLookup()
+        # 在调用线程中同步预加载，回放结果可以重现，耗时计入 selection 阶段
+        player.reward_preloader = RewardPreloader(
+            self.music_folder,
+            pick_song=lambda level: player.select_music_file(None, level),
+            release_song=lambda level, song: self.registry.get(level).unpick(song),
+            get_duration=player.get_music_duration,
+            wallpaper_lookup=player.wallpaper_lookup,
+            on_error=lambda level, half_hours, e: self.log_and_print(
+                f"[bold yellow]预加载 {level} 第 {half_hours} 个半小时的音乐时出错: {e}[/bold yellow]"
+            ),
+            background=False
+        )
+        player.half_hour_effect = self.effects.get('half_hour', 'half_hour')
+        player.level_up_effect = self.effects.get('level_up', 'level_up')
+        player.STREAMING_MODE = False
+        player.WALLPAPER_ENGINE_MODE = False
+        player.first_table_shown = True
+        self._reset_day_state()
+
+    def _reset_day_state(self):
+        """与 progressive_study_player.start_new_day 相同：作废预加载的音乐，清空当天的奖励进度"""
+        player = study_player
+        player.reward_preloader.discard()
+        player.played_music = set()
+        player.played_songs = {level: set() for level in get_level_table().names}
+        player.current_level = None
+        player.previous_time = None
+        player.previous_target_time = None
+
+    def request(self, chart_date):
+        """代替 ChartRenderWorker.request"""
+        self._chart_pending = True
+
+    def advance_to(self, moment):
+        """推进虚拟时间到 moment，依次执行其间到期的定时任务"""
+        while True:
+            timeout = self.wheel.run_pending()
+            if timeout is None:
+                break
+            next_due = self.clock.now() + timedelta(seconds=timeout)
+            if next_due > moment:
+                break
+            self.clock.set(next_due)
+        self.clock.set(moment)
+        self.wheel.run_pending()
+
+    def _open_day(self, day):
+        self.day = day
+        self.record_path = os.path.join(self.work_dir, 'study_time_logs', f"学习记录_{day.strftime('%Y-%m-%d')}.csv")
+        self.writer = StudyRecordWriter(self.record_path, fsync=False)
+        self.chart_path = os.path.join(self.work_dir, '学习时长图表', f"学习时长图表_{day.strftime('%Y-%m-%d')}.html")
+        self.live_chart = None
+        study_player.record_writer = self.writer
+        study_player.current_date = day.strftime('%Y-%m-%d')
+
+    def _start_new_day(self, day, previous_day):
+        self._maybe_render_chart(force=True)
+        self._record_memory(previous_day)
+        self.writer.close()
+        self._open_day(day)
+        self._reset_day_state()
+
+    def _record_memory(self, day):
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            self.memory_by_day.append((day, tracemalloc.get_traced_memory()[0]))
+
+    # ---- 各阶段 ----
+
+    def handle_study_row(self, row):
+        if self.xls_file:
+            import study_cell_reader
+            with self.timer.measure('excel'):
+                row_index, col_index = study_cell_reader.get_study_cell(self.clock.now().weekday())
+                study_cell_reader.read_time_from_excel(self.xls_file, row_index, col_index)
+
+        # 学习记录中的时长是格式化后的 'H时MM分'，已学习时长还原为昼夜表单元格的形式，其余原样传入
+        cell_time = duration_to_cell_time(row['目前已学习时长'])
+        relative_values = [row['预测今日学习时长'], row['目标学习时长'], row['剩余空闲时间']]
+        study_player.handle_study_reading(
+            cell_time, relative_values, clock=self.clock.now, audio=self.audio, notifier=self.notifier,
+            threshold_time=time.perf_counter(), timer=self.timer
+        )
+        self._maybe_render_chart()
+
+    def _maybe_render_chart(self, force=False):
+        if not self.render_charts or not self._chart_pending:
+            return
+        now = self.clock.monotonic()
+        if not force and self._last_chart is not None and now - self._last_chart < self.chart_interval:
+            return
+        if self.chart_mode == 'live':
+            with self.timer.measure('chart'):
+                if self.live_chart is None:
+                    from study_log_chart_live import LiveStudyChart
+                    self.live_chart = LiveStudyChart(
+                        self.record_path, self.day.strftime('%Y-%m-%d'), os.path.dirname(self.chart_path),
+                        color_ranges=self.level_table.color_ranges()
+                    )
+                self.live_chart.update()
+            self._last_chart = now
+            self._chart_pending = False
+            return
+        import plotly.io as pio
+        import study_log_chart
+        with self.timer.measure('chart'):
+            df = study_log_chart.load_study_log(self.record_path)
+            fig = study_log_chart.build_figure(df)
+            os.makedirs(os.path.dirname(self.chart_path), exist_ok=True)
+            pio.write_html(fig, file=self.chart_path)
+        self._last_chart = now
+        self._chart_pending = False
+
+    def handle_five_minute_row(self, row):
+        with self.timer.measure('five_min'):
+            self.five_minute_records += 1
+            self.log_and_print(f"[cyan]五分钟记录: {row.get('时间')} {row.get('状态')} {row.get('事情类型')}[/cyan]")
+
+    def replay(self, events):
+        """按时间顺序回放事件，返回统计报告"""
+        start = time.perf_counter()
+        for moment, kind, row in events:
+            self.advance_to(moment)
+            self.rollover.check()
+            if kind == 'study':
+                self.handle_study_row(row)
+            else:
+                self.handle_five_minute_row(row)
+        if events:
+            # 回放到当天结束，触发剩余的定时任务
+            self.advance_to(datetime.combine(self.day, dt_time(23, 59, 59)))
+        self._maybe_render_chart(force=True)
+        self._record_memory(self.day)
+        elapsed = time.perf_counter() - start
+        self.close()
+
+        span = (events[-1][0] - events[0][0]).total_seconds() if events else 0.0
+        return {
+            'events': len(events),
+            'virtual_seconds': span,
+            'wall_seconds': elapsed,
+            'speedup': span / elapsed if elapsed else 0.0,
+            'rewards': self.audio.count('music'),
+            'level_ups': self.notifier.celebrations,
+            'music_plays': self.audio.count('music'),
+            'music_ends': self.audio.count('music_end'),
+            'effects': self.audio.count('effect'),
+            'notifications': self.notifier.count,
+            'five_minute_records': self.five_minute_records,
+            'stages': self.timer.report(),
+            'wheel': self.wheel.stats(),
+            'days': self.rollover.rollovers + 1,
+            'memory_by_day': self.memory_by_day,
+        }
+
+    def close(self):
+        self.writer.close()
+        self.registry.close()
+        self._log_handler.close()
+        self._null_output.close()
+
+
+def make_synthetic_day(work_dir, level_table, day, songs_per_level=20, seed=None):
+    """
+    生成一天的模拟学习记录、五分钟记录和每个级别 songs_per_level 首静音 mp3 的小型曲库
+
+    返回:
+        (学习记录路径, 五分钟记录路径, 曲库目录)
+    """
+    import random
+
+    rng = random.Random(day.toordinal() if seed is None else seed)
+    music_folder = os.path.join(work_dir, 'music_library')
+    for level in level_table.names:
+        folder = os.path.join(music_folder, level)
+        os.makedirs(folder, exist_ok=True)
+        for i in range(songs_per_level):
+            path = os.path.join(folder, f"歌手{i} - 歌曲{i}.mp3")
+            if os.path.exists(path):
+                continue
+            with open(path, 'wb') as f:
+                f.write(_SILENT_MP3_FRAME * (_MP3_FRAMES_PER_SECOND * rng.randint(60, 300)))
+
+    study_log = os.path.join(work_dir, 'input', f"学习记录_{day.strftime('%Y-%m-%d')}.csv")
+    five_minute_log = os.path.join(work_dir, 'input', f"五分钟记录_{day.strftime('%Y-%m-%d')}.csv")
+    os.makedirs(os.path.dirname(study_log), exist_ok=True)
+
+    writer = StudyRecordWriter(study_log, fsync=False)
+    with open(five_minute_log, 'w', encoding='utf-8', newline='') as f:
+        five_writer = csv.writer(f)
+        five_writer.writerow(["时间", "状态", "事情类型", "坐标点"])
+        studied = 0
+        moment = datetime.combine(day, dt_time(6, 0))
+        end = datetime.combine(day, dt_time(22, 0))
+        while moment <= end:
+            if rng.random() < 0.8:
+                studied += 5
+                five_writer.writerow([moment.strftime('%H:%M'), "高效" if rng.random() < 0.5 else "普通", "学习", "0,0"])
+            # 昼夜表每分钟都可能被保存，学习时长变化时才有记录
+            for minute in range(0, 5):
+                stamp = moment + timedelta(minutes=minute, seconds=rng.randint(0, 59))
+                studied_now = studied - 5 + minute + 1 if studied else 0
+                writer.append({
+                    "现在时间": stamp.strftime('%H:%M:%S'),
+                    "目前已学习时长": f"{studied_now // 60}时{studied_now % 60:02d}分",
+                    "预测今日学习时长": f"{studied * 2 // 60}时{studied * 2 % 60:02d}分",
+                    "目标学习时长": "12",
+                    "剩余空闲时间": f"{(960 - studied) // 60}时{(960 - studied) % 60:02d}分",
+                })
+            moment += timedelta(minutes=5)
+    writer.close()
+    return study_log, five_minute_log, music_folder
+
+
+def load_level_table(config_file='config.json'):
+    import json
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    effects = {
+        'half_hour': config.get('half_hour_effect'),
+        'level_up': config.get('level_up_effect'),
+        'five_minute': config.get('five_minute_effect'),
+    }
+    return LevelTable.from_config(config), effects
+
+
+def print_report(result):
+    print(f"回放事件 {result['events']} 个，覆盖 {result['virtual_seconds'] / 3600:.1f} 小时，"
+          f"实际耗时 {result['wall_seconds']:.2f} 秒（{result['speedup']:.0f} 倍速）")
+    print(f"奖励 {result['rewards']} 次，升级 {result['level_ups']} 次，音乐 {result['music_plays']} 首（播完 {result['music_ends']} 首），"
+          f"音效 {result['effects']} 次，通知 {result['notifications']} 条，五分钟记录 {result['five_minute_records']} 条")
+    runs = OrderedDict()
+    for job in result['wheel']['jobs']:
+        runs[job['name']] = runs.get(job['name'], 0) + job['runs']
+    print("定时任务触发: " + "，".join(f"{name} {count} 次" for name, count in runs.items()))
+    if result['memory_by_day']:
+        first = result['memory_by_day'][0][1]
+        print(f"回放 {result['days']} 天，每天结束时的内存（tracemalloc）:")
+        for day, size in result['memory_by_day']:
+            print(f"  {day}  {size / 1024:10.1f} KB  ({(size - first) / 1024:+.1f} KB)")
+    print(f"{'阶段':<12}{'次数':>8}{'总耗时(ms)':>14}{'平均(ms)':>12}{'最大(ms)':>12}")
+    for row in result['stages']:
+        print(f"{row['stage']:<12}{row['count']:>8}{row['total_ms']:>14.1f}{row['avg_ms']:>12.3f}{row['max_ms']:>12.3f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='按虚拟时间回放一天的学习记录并统计各阶段耗时')
+    parser.add_argument('--date', help='回放 statistics 下该日期（YYYY-MM-DD）的记录')
+    parser.add_argument('--study-log', help='学习记录 CSV')
+    parser.add_argument('--five-minute-log', help='五分钟记录 CSV')
+    parser.add_argument('--xls', help='当周昼夜表，指定时每个事件读取一次单元格')
+    parser.add_argument('--music-folder', default='music_library', help='曲库目录')
+    parser.add_argument('--play-count-folder', default=os.path.join('statistics', 'play_count_logs'),
+                        help='播放次数目录（复制到临时目录后使用）')
+    parser.add_argument('--synthetic', action='store_true', help='生成一天的模拟记录和小型曲库后回放')
+    parser.add_argument('--days', type=int, default=1, help='从 --date 开始连续回放的天数')
+    parser.add_argument('--trace-memory', action='store_true', help='用 tracemalloc 统计每天结束时的内存')
+    parser.add_argument('--no-chart', action='store_true', help='不生成图表')
+    parser.add_argument('--chart-interval', type=float, default=DEFAULT_CHART_INTERVAL, help='图表最短生成间隔（虚拟秒）')
+    parser.add_argument('--chart-mode', choices=('full', 'live'), default='full', help='图表模式')
+    parser.add_argument('--keep', action='store_true', help='保留输出目录')
+    args = parser.parse_args()
+
+    level_table, effects = load_level_table()
+    work_dir = tempfile.mkdtemp(prefix='replay_')
+    try:
+        # 要回放的 [(日期, 学习记录, 五分钟记录)]
+        days = []
+        if args.synthetic:
+            day = datetime.strptime(args.date, '%Y-%m-%d').date() if args.date else datetime.now().date()
+            for offset in range(args.days):
+                current = day + timedelta(days=offset)
+                study_log, five_minute_log, music_folder = make_synthetic_day(work_dir, level_table, current)
+                days.append((current, study_log, five_minute_log))
+            play_count_seed = None
+        else:
+            if args.date:
+                day = datetime.strptime(args.date, '%Y-%m-%d').date()
+                for offset in range(args.days):
+                    date_str = (day + timedelta(days=offset)).strftime('%Y-%m-%d')
+                    study_log = os.path.join('statistics', 'study_time_logs', f"学习记录_{date_str}.csv")
+                    five_minute_log = os.path.join('statistics', 'five_minute_logs', f"五分钟记录_{date_str}.csv")
+                    if args.days == 1:
+                        study_log = args.study_log or study_log
+                        five_minute_log = args.five_minute_log or five_minute_log
+                    if os.path.exists(study_log):
+                        days.append((day + timedelta(days=offset), study_log, five_minute_log))
+            elif args.study_log:
+                match = re.search(r'(\d{4}-\d{2}-\d{2})', os.path.basename(args.study_log))
+                day = datetime.strptime(match.group(1), '%Y-%m-%d').date() if match else datetime.now().date()
+                days.append((day, args.study_log, args.five_minute_log))
+            else:
+                parser.error('需要 --date、--study-log 或 --synthetic')
+            if not days:
+                parser.error('找不到要回放的学习记录')
+            music_folder = args.music_folder
+            play_count_seed = args.play_count_folder
+
+        events = []
+        for current, study_log, five_minute_log in days:
+            events.extend(build_events(current, read_study_log(study_log), read_five_minute_log(five_minute_log)))
+        day = days[0][0]
+        if args.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        player = ReplayPlayer(
+            level_table, music_folder, work_dir, day, effects=effects,
+            play_count_seed=play_count_seed, xls_file=args.xls,
+            chart_interval=args.chart_interval, render_charts=not args.no_chart, chart_mode=args.chart_mode
+        )
+        print_report(player.replay(events))
+        if args.keep:
+            print(f"输出目录: {work_dir}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
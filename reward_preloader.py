@@ -0,0 +1,246 @@
+"""
+半小时奖励音乐预加载模块
+
+跨过半小时节点时，主循环原先要依次选歌、读取时长、启动壁纸脚本、显示祝贺动画
+（阶段变化时 GIF 会阻塞 4 秒），最后才调用 play_music，音乐比成就晚好几秒才响起。
+
+下一个半小时节点可以由当前学习时长推算出来，此模块在后台提前完成：
+    - 为下一个节点所属的级别选好歌曲（与正常选歌使用同一个播放次数索引）
+    - 读取时长（元数据缓存）并把音频文件读入内存，播放时不再等待磁盘
+    - 查好歌曲对应的壁纸（WallpaperMusicMatcher.csv 按修改时间缓存）
+到达节点时 take() 直接取出准备好的结果，主循环可以先开始播放，再处理其余展示。
+
+独立运行时对比节点到达后"现场准备"和"取出预加载结果"的耗时：
+    python reward_preloader.py music_library 等级名称
+"""
+
+import csv
+import os
+import threading
+import time
+
+# 超过此大小的音频文件只预读以预热系统缓存，不常驻内存
+MAX_PRELOAD_BYTES = 64 * 1024 * 1024
+
+WALLPAPER_CSV = 'WallpaperMusicMatcher.csv'
+
+
+class WallpaperLookup:
+    """歌曲 -> (壁纸引擎ID, 壁纸名称, 所属作品) 的查找表，CSV 未变化时不重新读取"""
+
+    def __init__(self, csv_file=WALLPAPER_CSV):
+        self.csv_file = csv_file
+        self._signature = None
+        self._table = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.csv_file)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            self._signature, self._table = None, {}
+            return
+        if signature == self._signature:
+            return
+        table = {}
+        with open(self.csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                song = row.get('歌曲')
+                # 与 wallpaper_by_music_apply.get_wallpaper_engine_id 一致：同名歌曲取第一行
+                if song and song not in table:
+                    table[song] = (
+                        row.get('壁纸引擎ID') or None,
+                        row.get('壁纸名称') or "未知壁纸",
+                        row.get('所属作品') or "未知作品",
+                    )
+        self._signature, self._table = signature, table
+
+    def get(self, song):
+        with self._lock:
+            try:
+                self._refresh()
+            except (OSError, csv.Error):
+                return None, "未知壁纸", "未知作品"
+            return self._table.get(song, (None, "未知壁纸", "未知作品"))
+
+
+class PreparedTrack:
+    """为某个半小时节点准备好的奖励音乐"""
+
+    def __init__(self, level, half_hours, song, music_files, path, duration, data, wallpaper):
+        self.level = level
+        self.half_hours = half_hours
+        self.song = song
+        self.music_files = music_files
+        self.path = path
+        self.duration = duration
+        self.data = data              # 音频文件内容，文件过大时为 None
+        self.wallpaper = wallpaper    # (壁纸引擎ID, 壁纸名称, 所属作品)
+        self.prepared_at = time.monotonic()
+        self.prepare_ms = 0.0
+
+
+class RewardPreloader:
+    """
+    在后台为下一个半小时节点准备奖励音乐
+
+    参数:
+        music_folder: 曲库目录
+        pick_song: 选歌函数 (级别) -> (歌曲文件名, 歌单文件列表)
+        release_song: 撤销一次选歌的函数 (级别, 歌曲文件名)，预加载结果作废时调用
+        get_duration: 读取时长的函数 (路径) -> 秒
+        wallpaper_lookup: WallpaperLookup 实例，为 None 时不查壁纸
+        on_error: 后台准备出错时的回调，参数为 (级别, 节点, 异常)
+        background: 为 False 时 schedule 在调用线程中直接准备（回放时使用，结果可以重现）
+    """
+
+    def __init__(self, music_folder, pick_song, release_song, get_duration, wallpaper_lookup=None, on_error=None,
+                 background=True):
+        self.music_folder = music_folder
+        self.pick_song = pick_song
+        self.release_song = release_song
+        self.get_duration = get_duration
+        self.wallpaper_lookup = wallpaper_lookup
+        self.on_error = on_error
+        self.background = background
+        self._lock = threading.Lock()
+        self._prepared = None
+        self._pending_key = None
+
+    def prepare(self, level, half_hours):
+        """同步准备 (级别, 节点) 的奖励音乐"""
+        start = time.perf_counter()
+        song, music_files = self.pick_song(level)
+        path = os.path.join(self.music_folder, level, song)
+        duration = self.get_duration(path)
+        data = None
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size <= MAX_PRELOAD_BYTES:
+                data = f.read()
+            else:
+                # 大文件只顺序读一遍，让系统缓存住
+                while f.read(1024 * 1024):
+                    pass
+        wallpaper = self.wallpaper_lookup.get(song) if self.wallpaper_lookup else (None, "未知壁纸", "未知作品")
+        track = PreparedTrack(level, half_hours, song, music_files, path, duration, data, wallpaper)
+        track.prepare_ms = (time.perf_counter() - start) * 1000
+        return track
+
+    def schedule(self, level, half_hours):
+        """
+        在后台线程中为 (级别, 节点) 准备奖励音乐；已准备好或正在准备时不重复执行
+
+        之前为其他节点准备的结果会被作废，其选歌会被撤销。
+        """
+        key = (level, half_hours)
+        with self._lock:
+            prepared = self._prepared
+            if self._pending_key == key or (prepared is not None and (prepared.level, prepared.half_hours) == key):
+                return
+            self._pending_key = key
+            self._prepared = None
+        if prepared is not None:
+            self.release_song(prepared.level, prepared.song)
+        if not self.background:
+            self._prepare_in_background(*key)
+            return
+        threading.Thread(target=self._prepare_in_background, args=key, name='RewardPreloader', daemon=True).start()
+
+    def _prepare_in_background(self, level, half_hours):
+        try:
+            track = self.prepare(level, half_hours)
+        except Exception as e:
+            with self._lock:
+                if self._pending_key == (level, half_hours):
+                    self._pending_key = None
+            if self.on_error:
+                self.on_error(level, half_hours, e)
+            return
+        with self._lock:
+            if self._pending_key == (level, half_hours):
+                self._prepared = track
+                self._pending_key = None
+                return
+        # 准备期间节点已改变，结果作废
+        self.release_song(level, track.song)
+
+    def take(self, level, half_hours):
+        """
+        取出为 (级别, 节点) 准备好的结果；没有准备好或准备的是其他节点时返回 None
+
+        取出后该结果不会再被撤销选歌。
+        """
+        with self._lock:
+            track = self._prepared
+            if track is None or (track.level, track.half_hours) != (level, half_hours):
+                return None
+            self._prepared = None
+            return track
+
+    def discard(self):
+        """作废已准备的结果"""
+        with self._lock:
+            track, self._prepared = self._prepared, None
+            self._pending_key = None
+        if track is not None:
+            self.release_song(track.level, track.song)
+
+
+def benchmark(music_folder, level, rounds=20):
+    """
+    对比节点到达后现场准备（选歌 + 读时长 + 读文件 + 查壁纸）与取出预加载结果的耗时
+
+    返回:
+        dict: cold_ms 现场准备的平均耗时, warm_ms 取出预加载结果的平均耗时
+    """
+    from audio_metadata import AudioMetadataCache
+    from play_count_index import PlayCountRegistry
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        registry = PlayCountRegistry(music_folder, directory, compact_delay=3600)
+        metadata = AudioMetadataCache(None)
+
+        def pick_song(name):
+            index = registry.get(name)
+            return index.pick(), index.songs
+
+        preloader = RewardPreloader(
+            music_folder, pick_song,
+            lambda name, song: registry.get(name).unpick(song),
+            metadata.duration, WallpaperLookup()
+        )
+
+        cold = 0.0
+        for i in range(rounds):
+            start = time.perf_counter()
+            preloader.prepare(level, i)
+            cold += time.perf_counter() - start
+
+        warm = 0.0
+        for i in range(rounds):
+            preloader.schedule(level, i)
+            while preloader._pending_key is not None:
+                time.sleep(0.001)
+            start = time.perf_counter()
+            track = preloader.take(level, i)
+            warm += time.perf_counter() - start
+            assert track is not None
+        registry.close()
+
+    return {'cold_ms': cold * 1000 / rounds, 'warm_ms': warm * 1000 / rounds}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='奖励音乐预加载耗时对比')
+    parser.add_argument('music_folder', help='曲库目录')
+    parser.add_argument('level', help='级别（歌单文件夹名）')
+    parser.add_argument('--rounds', type=int, default=20, help='测量次数')
+    args = parser.parse_args()
+
+    result = benchmark(args.music_folder, args.level, args.rounds)
+    print(f"节点到达后现场准备: 平均 {result['cold_ms']:.2f} ms")
+    print(f"取出预加载结果:     平均 {result['warm_ms'] * 1000:.1f} us")
@@ -0,0 +1,227 @@
+"""
+昼夜表学习时长单元格读取模块
+
+主循环每 2 秒读取一次当周的昼夜表，但真正用到的只有四个单元格：
+当天的"目前已学习时长"以及相对它的"预测今日学习时长"、"目标学习时长"、"剩余空闲时间"。
+此模块按文件的修改时间和大小缓存这四个值，文件没有变化时直接返回缓存；
+文件变化后通过 xls_cell_reader 只定点读取这四个单元格，无法定点读取时才回退到 pandas 完整解析。
+
+独立运行时可对比缓存读取与原先每次完整解析的耗时：
+    python study_cell_reader.py "昼夜表/第1周(01.01~01.07).xls"
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import xls_cell_reader
+
+# 读取失败或单元格为空时使用的默认值
+DEFAULT_TIME = "00:00:00"
+
+# 相对"目前已学习时长"单元格的偏移 (行, 列)
+RELATIVE_OFFSETS = [
+    (2, 5),  # "预测今日学习时长"（S列）
+    (5, 5),  # "目标学习时长"（S列）
+    (5, 6),  # "剩余空闲时间"（T列）
+]
+
+# 星期几（0表示星期一）对应的"目前已学习时长"单元格 (行, 列字母)
+STUDY_CELL_BY_WEEKDAY = {
+    0: (21, 'N'),   # 星期一
+    1: (21, 'AH'),  # 星期二
+    2: (55, 'N'),   # 星期三
+    3: (55, 'AH'),  # 星期四
+    4: (89, 'N'),   # 星期五
+    5: (89, 'AH'),  # 星期六
+    6: (123, 'N'),  # 星期日
+}
+
+
+def column_to_index(col):
+    """将列标签转换为从0开始的索引"""
+    index = 0
+    for char in col:
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index - 1
+
+
+def get_study_cell(weekday):
+    """
+    返回指定星期几的"目前已学习时长"单元格坐标
+
+    参数:
+        weekday: int，0-6，0表示星期一
+
+    返回:
+        tuple: (行索引, 列索引)，均从0开始
+    """
+    row, col_letter = STUDY_CELL_BY_WEEKDAY[weekday]
+    return row, column_to_index(col_letter)
+
+
+def get_cell_positions(row, col):
+    """返回主单元格及三个相对单元格的坐标列表，顺序与 read_study_cells 的返回值一致"""
+    return [(row, col)] + [(row + dr, col + dc) for dr, dc in RELATIVE_OFFSETS]
+
+
+def read_study_cells(file_path, row, col):
+    """
+    完整解析工作簿并取出所需的四个单元格（原 read_time_from_excel 的读取方式）。
+
+    返回:
+        tuple: (主单元格字符串, [预测今日学习时长, 目标学习时长, 剩余空闲时间])
+    """
+    import pandas as pd
+
+    df = pd.read_excel(file_path, header=None)
+
+    # 读取主单元格
+    cell_value = df.iloc[row, col]
+    if pd.isna(cell_value):
+        cell_value = DEFAULT_TIME
+
+    relative_values = []
+    for r, c in get_cell_positions(row, col)[1:]:
+        try:
+            value = df.iloc[r, c]
+            if pd.isna(value):
+                value = DEFAULT_TIME
+            relative_values.append(str(value))
+        except IndexError:
+            relative_values.append(DEFAULT_TIME)
+
+    return str(cell_value), relative_values
+
+
+def load_study_cells(file_path, row, col):
+    """
+    定点读取学习时长单元格；文件不是 BIFF8 格式（如 .xlsx 或已加密）时回退到完整解析。
+    """
+    try:
+        return xls_cell_reader.read_study_cells(file_path, row, col)
+    except xls_cell_reader.XlsFormatError:
+        return read_study_cells(file_path, row, col)
+
+
+class StudyCellReader:
+    """
+    带缓存的学习时长单元格读取器
+
+    以 (文件路径, 行, 列, 修改时间, 文件大小) 作为缓存键，
+    只有昼夜表被保存过之后才会重新解析。
+    """
+
+    def __init__(self, loader=load_study_cells):
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._key = None
+        self._values = None
+        self.hits = 0
+        self.misses = 0
+
+    def _stat_key(self, file_path, row, col):
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), row, col, stat.st_mtime_ns, stat.st_size)
+
+    def read(self, file_path, row, col):
+        """
+        读取学习时长单元格，文件未变化时直接返回缓存值。
+        读取失败时抛出异常，且不会写入缓存。
+        """
+        key = self._stat_key(file_path, row, col)
+        with self._lock:
+            if key == self._key:
+                self.hits += 1
+                cell_value, relative_values = self._values
+                return cell_value, list(relative_values)
+
+        cell_value, relative_values = self.loader(file_path, row, col)
+
+        # 解析期间文件可能又被保存，重新取一次状态，确保缓存键对应的是刚读到的内容
+        if self._stat_key(file_path, row, col) == key:
+            with self._lock:
+                self._key = key
+                self._values = (cell_value, tuple(relative_values))
+                self.misses += 1
+        return cell_value, list(relative_values)
+
+    def invalidate(self):
+        """清除缓存，下次读取时强制重新解析"""
+        with self._lock:
+            self._key = None
+            self._values = None
+
+
+# 供各模块共用的默认读取器
+default_reader = StudyCellReader()
+
+
+def read_time_from_excel(file_path, row, col):
+    """使用默认读取器读取学习时长单元格"""
+    return default_reader.read(file_path, row, col)
+
+
+def benchmark(file_path, weekday=None, repeat=20):
+    """
+    对比每次完整解析、定点读取与缓存读取的耗时
+
+    返回:
+        dict: 各读取方式的平均耗时（毫秒）
+    """
+    if weekday is None:
+        weekday = datetime.now().weekday()
+    row, col = get_study_cell(weekday)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        full_values = read_study_cells(file_path, row, col)
+    full_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        targeted_values = load_study_cells(file_path, row, col)
+    targeted_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    reader = StudyCellReader()
+    start = time.perf_counter()
+    cold_values = reader.read(file_path, row, col)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        warm_values = reader.read(file_path, row, col)
+    warm_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    if not (full_values == targeted_values == cold_values == warm_values):
+        raise AssertionError(
+            f"读取结果不一致: {full_values} / {targeted_values} / {cold_values} / {warm_values}"
+        )
+
+    return {
+        'full_parse_ms': full_ms,
+        'targeted_ms': targeted_ms,
+        'cached_cold_ms': cold_ms,
+        'cached_warm_ms': warm_ms,
+        'values': warm_values,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='昼夜表学习时长单元格读取基准测试')
+    parser.add_argument('file', help='当周昼夜表 .xls 文件路径')
+    parser.add_argument('--weekday', type=int, default=None, help='星期几（0表示星期一），默认今天')
+    parser.add_argument('--repeat', type=int, default=20, help='重复次数')
+    args = parser.parse_args()
+
+    result = benchmark(args.file, args.weekday, args.repeat)
+    print(f"读取结果: {result['values']}")
+    print(f"每次完整解析: {result['full_parse_ms']:.2f} ms/次")
+    print(f"定点读取: {result['targeted_ms']:.2f} ms/次")
+    print(f"缓存首次读取: {result['cached_cold_ms']:.2f} ms")
+    print(f"缓存命中读取: {result['cached_warm_ms']:.4f} ms/次")
+    if result['cached_warm_ms'] > 0:
+        print(f"加速比: {result['full_parse_ms'] / result['cached_warm_ms']:.0f}x")
@@ -0,0 +1,562 @@
+"""
+学习时长图表动画逐帧渲染模块
+
+study_log_chart_animated.py 原先对每个前缀 df.iloc[:i] 重新构建一个 go.Figure，
+再逐帧串行调用 fig.write_image。每一帧都要重新添加全部折线、色带、整点注释和虚线，
+导出图片的 Kaleido 渲染又只能用到一个 CPU 核心，几百帧的视频要跑很久。
+
+此模块把逐帧渲染拆成：
+    - build_template_figure: 每个进程只构建一次模板图表，整点注释、虚线和布局都是固定的
+    - update_frame:          每帧只替换折线和色带的数据、标题、横轴刻度和纵轴范围
+    - iter_frames:           把帧分配到进程池，每个工作进程启动时构建模板并预热 Kaleido，
+                             按帧号顺序返回 (行数, PNG 字节)
+    - encode_video:          把 PNG 字节直接写入 ffmpeg 的标准输入编码为视频，
+                             结尾停留由 ffmpeg 的 tpad 滤镜重复最后一帧，不写任何临时图片
+    - frame_keys:            每帧的缓存键（样式哈希 + 前 i 行数据的滚动哈希），
+                             配合 frame_cache.FrameCache，重新生成同一天的视频时只渲染新增记录对应的帧
+
+workers 为 1 时在当前进程中按同样的方式渲染，不启动进程池。
+
+独立运行时用一天的模拟学习记录测试每帧的构建耗时，安装了 Kaleido 时还会对比串行与并行导出，
+找得到 ffmpeg 时对比写图片文件再编码与直接写入 ffmpeg：
+    python study_log_chart_frames.py --rows 300 --workers 4
+"""
+
+import os
+
+import numpy as np
+
+from study_log_chart import compute_level_bands
+
+# 折线图中的数据列（顺序与模板中前 4 条折线一致）
+VALUE_COLUMNS = ['目前已学习时长', '预测今日学习时长', '目标学习时长', '剩余空闲时间']
+
+# 整点网格至少画到几点
+HOUR_GRID_END = 23
+
+# 每个工作进程中的模板图表和数据，由 _init_worker 设置
+_worker_state = None
+
+
+def frame_data(df):
+    """
+    把学习记录转换为可以传给工作进程的数组（进程间只传一次）
+
+    参数:
+        df: study_log_chart.load_study_log 返回的 DataFrame
+
+    返回:
+        dict: times 记录时间（datetime64[us]，序列化后的字符串比纳秒短），ticktext 每条记录的 'HH:MM:SS'，各数据列的 float 数组
+    """
+    times = df['现在时间'].to_numpy(dtype='datetime64[us]')
+    data = {
+        'times': times,
+        'ticktext': [t.strftime('%H:%M:%S') for t in df['现在时间']],
+    }
+    for column in VALUE_COLUMNS:
+        data[column] = df[column].to_numpy(dtype=float)
+    return data
+
+
+def build_template_figure(data, color_ranges):
+    """
+    构建所有帧共用的模板图表：4 条折线、每个等级一条（暂时隐藏的）色带、整点注释和虚线
+
+    返回:
+        (go.Figure, list): 模板图表，以及整点注释（每帧的色带标签排在它们之前）
+    """
+    import plotly.graph_objs as go
+
+    from datetime import timedelta
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        mode='lines+markers',
+        name='目前已学习时长',
+        line=dict(color='#FFD700', width=5, shape='spline', smoothing=1.3),
+        marker=dict(size=10)
+    ))
+    fig.add_trace(go.Scatter(
+        mode='lines+markers',
+        name='预测今日学习时长',
+        line=dict(color='#FF4500', dash='dash', width=4, shape='spline', smoothing=1.3),
+        marker=dict(size=8)
+    ))
+    fig.add_trace(go.Scatter(
+        mode='lines+markers',
+        name='目标学习时长',
+        line=dict(color='#32CD32', width=4),
+        marker=dict(size=8)
+    ))
+    fig.add_trace(go.Scatter(
+        mode='lines',
+        name='剩余空闲时间',
+        line=dict(color='#1E90FF', dash='dashdot', width=4)
+    ))
+    # 色带没有顶点时隐藏，图例中也不显示
+    for start, end, color, label in color_ranges:
+        fig.add_trace(go.Scatter(
+            x=[], y=[],
+            fill='tozeroy', fillcolor=color,
+            line=dict(color=color),
+            name=label, showlegend=True,
+            visible=False
+        ))
+
+    # 整点注释和黄色细虚线每帧相同：从第一条记录所在的整点画到 HOUR_GRID_END 点（记录更晚时画到最后一条记录），
+    # 当天后来追加的记录不会改变已有帧的横轴，帧缓存得以复用
+    times = data['times']
+    hour_annotations = []
+    if len(times):
+        import pandas as pd
+
+        current_time_tick = pd.Timestamp(times.min()).replace(minute=0, second=0, microsecond=0)
+        last_time = max(pd.Timestamp(times.max()), current_time_tick.replace(hour=HOUR_GRID_END))
+        while current_time_tick <= last_time:
+            hour_annotations.append(go.layout.Annotation(
+                x=current_time_tick,
+                y=0,
+                xref='x',
+                yref='y',
+                text=current_time_tick.strftime('%H点'),
+                showarrow=False,
+                font=dict(size=12, color='yellow'),
+                xanchor='center',
+                yanchor='top',
+                align='center',
+                yshift=-20
+            ))
+            fig.add_shape(
+                type='line',
+                x0=current_time_tick,
+                y0=0,
+                x1=current_time_tick,
+                y1=1,
+                xref='x',
+                yref='paper',  # 纵轴从 0 开始，画满整个绘图区高度，与当天的最大值无关
+                line=dict(color='yellow', width=1, dash='dash')
+            )
+            current_time_tick += timedelta(hours=1)
+
+    fig.update_layout(
+        xaxis_title='现在时间',
+        yaxis_title='时间 (小时)',
+        xaxis=dict(
+            tickmode='array',
+            tickangle=45,
+            tickfont=dict(size=10, color='rgba(255, 255, 255, 0.6)'),
+            title_standoff=25,
+            showgrid=True,
+            gridcolor='LightGray',
+            zeroline=False
+        ),
+        yaxis=dict(
+            tickformat='.1f小时',
+            showgrid=True,
+            gridcolor='LightGray'
+        ),
+        template='plotly_dark',
+        autosize=False,
+        width=1200,
+        height=600,
+        legend=dict(x=0.01, y=0.99),
+        plot_bgcolor='rgba(30, 30, 30, 1)',
+        paper_bgcolor='rgba(30, 30, 30, 1)',
+        font=dict(color='white', size=14),
+        margin=dict(b=120)
+    )
+    fig.update_traces(marker=dict(symbol='circle', line=dict(width=1, color='DarkSlateGrey')))
+    fig.update_xaxes(showline=True, linewidth=2, linecolor='white', mirror=True)
+    fig.update_yaxes(showline=True, linewidth=2, linecolor='white', mirror=True)
+    return fig, hour_annotations
+
+
+def update_frame(fig, hour_annotations, data, color_ranges, rows):
+    """把模板图表更新为前 rows 条记录的一帧"""
+    import plotly.graph_objs as go
+
+    times = data['times'][:rows]
+    band_annotations = []
+    bands = compute_level_bands(times, data['目前已学习时长'][:rows], color_ranges)
+    with fig.batch_update():
+        for trace, column in zip(fig.data, VALUE_COLUMNS):
+            trace.x = times
+            trace.y = data[column][:rows]
+        for trace, (start, end, color, label), (band_x, band_y) in zip(fig.data[len(VALUE_COLUMNS):], color_ranges, bands):
+            if not len(band_x):
+                trace.visible = False
+                continue
+            band_x = band_x.astype('datetime64[us]')
+            trace.update(x=band_x, y=band_y, visible=True)
+            # 标签放在色带中点时间、区间 30% 高度处
+            band_annotations.append(go.layout.Annotation(
+                x=band_x[len(band_x) // 2],
+                y=start + 0.3 * (end - start),
+                text=label,
+                showarrow=False,
+                font=dict(size=14, color='white'),
+                xanchor='center',
+                yanchor='middle',
+                align='center',
+                bgcolor='rgba(0,0,0,0.5)',
+                bordercolor='white',
+                borderwidth=1,
+                borderpad=2
+            ))
+        fig.layout.annotations = band_annotations + hour_annotations
+        fig.layout.title.text = f'学习时长记录 - 折线图 ({rows} 行数据)'
+        fig.layout.xaxis.tickvals = times
+        fig.layout.xaxis.ticktext = data['ticktext'][:rows]
+        y_max = np.nanmax([np.nanmax(data[column][:rows]) for column in VALUE_COLUMNS])
+        fig.layout.yaxis.range = [0, y_max + 1]
+    return fig
+
+
+def warm_renderer():
+    """
+    预热 Kaleido：Kaleido 1.x 启动常驻的浏览器进程，之后每帧的导出都复用它；
+    旧版 Kaleido 本身会保留渲染子进程。最后导出一张空白图，把首次加载 plotly.js 的耗时留在这里。
+    """
+    import kaleido
+    import plotly.io as pio
+
+    start_sync_server = getattr(kaleido, 'start_sync_server', None)
+    if start_sync_server is not None:
+        try:
+            start_sync_server(silence_warnings=True)
+        except TypeError:
+            start_sync_server()
+    pio.to_image({'data': [], 'layout': {'width': 10, 'height': 10}}, format='png')
+
+
+def _init_worker(data, color_ranges, warm):
+    global _worker_state
+    fig, hour_annotations = build_template_figure(data, color_ranges)
+    _worker_state = (fig, hour_annotations, data, color_ranges)
+    if warm:
+        warm_renderer()
+
+
+def _render_frame(rows):
+    import plotly.io as pio
+
+    fig, hour_annotations, data, color_ranges = _worker_state
+    update_frame(fig, hour_annotations, data, color_ranges, rows)
+    return rows, pio.to_image(fig, format='png')
+
+
+def default_workers():
+    """默认的工作进程数：CPU 核心数，至少为 1"""
+    return max(1, os.cpu_count() or 1)
+
+
+def frame_keys(data, color_ranges):
+    """
+    每一帧的缓存键：模板图表（样式、色带、整点网格）与 plotly 版本的哈希，加上前 i 行数据的滚动哈希
+
+    当天追加记录后，已有前缀的键不变，只有新增的帧需要渲染。
+
+    返回:
+        list: 第 i - 1 项为前 i 行对应帧的键（十六进制字符串）
+    """
+    import hashlib
+
+    import plotly
+
+    fig, hour_annotations = build_template_figure(data, color_ranges)
+    style = f"{plotly.__version__}\n{fig.to_json()}\n{[a.to_plotly_json() for a in hour_annotations]}"
+    prefix = hashlib.sha256(style.encode('utf-8'))
+
+    records = np.empty(len(data['times']), dtype=[('time', '<i8'), ('values', '<f8', (len(VALUE_COLUMNS),))])
+    records['time'] = data['times'].astype(np.int64)
+    for index, column in enumerate(VALUE_COLUMNS):
+        records['values'][:, index] = data[column]
+    keys = []
+    for record in records:
+        prefix.update(record.tobytes())
+        keys.append(prefix.hexdigest())
+    return keys
+
+
+def _render_frames(data, color_ranges, frames, workers):
+    if not frames:
+        return
+    workers = max(1, min(workers, len(frames)))
+
+    if workers == 1:
+        _init_worker(data, color_ranges, True)
+        for rows in frames:
+            yield _render_frame(rows)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    import kaleido  # noqa: F401  未安装时直接在这里报 ImportError，而不是进程池初始化失败
+
+    # 每次分给工作进程一小批连续的帧，减少进程间通信，同时保证各进程的负载大致均衡
+    chunksize = max(1, min(8, len(frames) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(data, color_ranges, True)) as executor:
+        yield from executor.map(_render_frame, frames, chunksize=chunksize)
+
+
+def iter_frames(df, color_ranges, frames=None, workers=None, cache=None):
+    """
+    渲染动画的各帧
+
+    参数:
+        df: study_log_chart.load_study_log 返回的 DataFrame
+        color_ranges: [(开始, 结束, 颜色, 名称)]
+        frames: 要渲染的行数（前缀长度）列表，默认 1..len(df)
+        workers: 工作进程数，默认 CPU 核心数；为 1 时在当前进程中渲染
+        cache: frame_cache.FrameCache，给出时只渲染缓存中没有的帧，
+               全部帧产出后删除当天不再使用的缓存
+
+    返回:
+        生成器，按 frames 的顺序产出 (行数, PNG 字节)
+    """
+    data = frame_data(df)
+    if frames is None:
+        frames = range(1, len(df) + 1)
+    frames = list(frames)
+    if workers is None:
+        workers = default_workers()
+
+    if cache is None:
+        yield from _render_frames(data, color_ranges, frames, workers)
+        return
+
+    keys = frame_keys(data, color_ranges)
+    missing = [rows for rows in frames if not cache.contains(keys[rows - 1])]
+    rendered = _render_frames(data, color_ranges, missing, workers)
+    missing = set(missing)
+    for rows in frames:
+        key = keys[rows - 1]
+        if rows in missing:
+            _, png = next(rendered)
+            cache.put(key, png)
+        else:
+            png = cache.get(key)
+            if png is None:
+                # 检查之后缓存文件被删除，单独补渲染这一帧
+                _, png = next(_render_frames(data, color_ranges, [rows], 1))
+                cache.put(key, png)
+        yield rows, png
+    cache.prune(keys)
+
+
+def ffmpeg_command(output_video_path, frame_rate=10, hold_frames=0, ffmpeg='ffmpeg'):
+    """
+    从标准输入读取 PNG 帧并编码为 H.264 视频的 ffmpeg 命令
+
+    参数:
+        hold_frames: 最后一帧之后再重复的帧数，由 tpad 滤镜在 ffmpeg 内部完成
+    """
+    filters = []
+    if hold_frames > 0:
+        filters.append(f'tpad=stop_mode=clone:stop={hold_frames}')
+    filters.append('format=yuv420p')  # 设置像素格式，保证兼容性
+    return [
+        ffmpeg,
+        '-hide_banner',
+        '-loglevel', 'error',
+        '-f', 'image2pipe',
+        '-framerate', str(frame_rate),
+        '-c:v', 'png',
+        '-i', '-',
+        '-vf', ','.join(filters),
+        '-c:v', 'libx264',
+        '-y',  # 覆盖输出文件（如果已经存在）
+        output_video_path
+    ]
+
+
+def encode_video(frames, output_video_path, frame_rate=10, hold_seconds=5, ffmpeg='ffmpeg'):
+    """
+    把 PNG 帧依次写入 ffmpeg 的标准输入编码为视频，不落地任何图片文件
+
+    参数:
+        frames: 按顺序产出 PNG 字节的可迭代对象（如 iter_frames 的结果）
+        hold_seconds: 视频结尾最后一帧停留的秒数（最后一帧本身也算在内）
+
+    返回:
+        dict: frames 写入的帧数, bytes 写入的字节数
+
+    异常:
+        subprocess.CalledProcessError: ffmpeg 退出码不为 0
+    """
+    import subprocess
+
+    hold_frames = max(0, int(frame_rate * hold_seconds) - 1)
+    command = ffmpeg_command(output_video_path, frame_rate, hold_frames, ffmpeg)
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    count = written = 0
+    try:
+        for png in frames:
+            process.stdin.write(png)
+            count += 1
+            written += len(png)
+    except BrokenPipeError:
+        pass  # ffmpeg 提前退出，下面按退出码报错
+    except BaseException:
+        # 渲染出错或被中断时不留下只有前半段的视频
+        process.kill()
+        process.wait()
+        raise
+    try:
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    returncode = process.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, command)
+    return {'frames': count, 'bytes': written}
+
+
+def _legacy_encode_from_files(frames, output_video_path, frame_rate, work_dir, ffmpeg='ffmpeg'):
+    """原先的方式：每帧写成 PNG 文件，复制最后一帧作为结尾停留，再让 ffmpeg 读取图片序列，用于基准测试对比"""
+    import shutil
+    import subprocess
+
+    folder = os.path.join(work_dir, 'frames')
+    os.makedirs(folder, exist_ok=True)
+    count = 0
+    for count, png in enumerate(frames, 1):
+        with open(os.path.join(folder, f'frame_{count}.png'), 'wb') as f:
+            f.write(png)
+    last_frame_path = os.path.join(folder, f'frame_{count}.png')
+    for i in range(1, frame_rate * 5):
+        shutil.copy(last_frame_path, os.path.join(folder, f'frame_{count + i}.png'))
+    subprocess.run([
+        ffmpeg, '-nostdin', '-hide_banner', '-loglevel', 'error', '-framerate', str(frame_rate),
+        '-i', os.path.join(folder, 'frame_%d.png'), '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-y', output_video_path
+    ], check=True)
+    shutil.rmtree(folder)
+
+
+def _synthetic_png_frames(count, width=1200, height=600, ffmpeg='ffmpeg'):
+    """没有 Kaleido 时用 ffmpeg 的测试图案生成 count 帧 PNG，作为编码测试帧"""
+    import subprocess
+
+    output = subprocess.run([
+        ffmpeg, '-hide_banner', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'testsrc=size={width}x{height}:rate=10',
+        '-frames:v', str(count), '-f', 'image2pipe', '-c:v', 'png', '-'
+    ], check=True, capture_output=True, stdin=subprocess.DEVNULL).stdout
+    # 每张 PNG 以 IEND 块（长度 4 字节 + 'IEND' + CRC 4 字节）结尾
+    end_marker = b'IEND\xaeB`\x82'
+    frames = []
+    start = 0
+    while start < len(output):
+        end = output.index(end_marker, start) + len(end_marker)
+        frames.append(output[start:end])
+        start = end
+    return frames
+
+
+def benchmark(rows=300, workers=None, render=True, encode=True):
+    """
+    用一天的模拟学习记录测试逐帧渲染
+
+    返回:
+        dict: rows 帧数, update_ms 每帧更新模板图表的平均耗时；
+              安装了 Kaleido 且 render 为 True 时另有 serial_s / parallel_s 串行与并行导出全部帧的耗时；
+              找得到 ffmpeg 且 encode 为 True 时另有 legacy_encode_s / pipe_encode_s 两种编码方式的耗时
+              （没有 Kaleido 时用 ffmpeg 的测试图案）和 legacy_disk_mb 原先写入的临时图片大小；
+              keys_ms 计算全部帧缓存键的耗时，能导出图片时另有 cached_s 追加 10% 记录后借助帧缓存重新生成的耗时
+    """
+    import shutil
+    import tempfile
+    import time
+
+    from level_table import get_level_table
+    from study_log_chart import load_study_log
+    from study_time_parser import write_synthetic_year
+
+    work_dir = tempfile.mkdtemp(prefix='study_frames_')
+    try:
+        write_synthetic_year(work_dir, 1)
+        csv_file_path = os.path.join(work_dir, os.listdir(work_dir)[0])
+        df = load_study_log(csv_file_path).iloc[:rows].reset_index(drop=True)
+        color_ranges = get_level_table().color_ranges()
+
+        data = frame_data(df)
+        fig, hour_annotations = build_template_figure(data, color_ranges)
+        start = time.perf_counter()
+        for i in range(1, len(df) + 1):
+            update_frame(fig, hour_annotations, data, color_ranges, i)
+        result = {
+            'rows': len(df),
+            'update_ms': (time.perf_counter() - start) * 1000 / max(1, len(df)),
+        }
+
+        frames = None
+        if render:
+            from importlib.util import find_spec
+
+            if find_spec('kaleido') is not None:
+                if workers is None:
+                    workers = default_workers()
+                for key, count in (('serial_s', 1), ('parallel_s', workers)):
+                    start = time.perf_counter()
+                    frames = [png for _, png in iter_frames(df, color_ranges, workers=count)]
+                    result[key] = time.perf_counter() - start
+                result['workers'] = workers
+                result['frame_kb'] = sum(len(png) for png in frames) / 1024 / max(1, len(frames))
+
+        # 帧缓存：先缓存前 90% 的记录对应的帧，再对整天重新生成，只渲染新增的帧
+        start = time.perf_counter()
+        frame_keys(data, color_ranges)
+        result['keys_ms'] = (time.perf_counter() - start) * 1000
+        if 'serial_s' in result:
+            from frame_cache import FrameCache
+
+            cache = FrameCache('2025-01-01', os.path.join(work_dir, 'cache'))
+            known = len(df) * 9 // 10
+            for _ in iter_frames(df.iloc[:known], color_ranges, workers=workers, cache=cache):
+                pass
+            start = time.perf_counter()
+            for _ in iter_frames(df, color_ranges, workers=workers, cache=cache):
+                pass
+            result['cached_s'] = time.perf_counter() - start
+            result['cached_new_frames'] = len(df) - known
+
+        # 编码：写 PNG 文件 + 复制结尾帧 + ffmpeg 读取图片序列，对比直接写入 ffmpeg 标准输入
+        if encode and shutil.which('ffmpeg'):
+            if frames is None:
+                frames = _synthetic_png_frames(len(df))
+            start = time.perf_counter()
+            _legacy_encode_from_files(frames, os.path.join(work_dir, 'legacy.mp4'), 10, work_dir)
+            result['legacy_encode_s'] = time.perf_counter() - start
+            result['legacy_disk_mb'] = sum(len(png) for png in frames) / 1024 / 1024 + len(frames[-1]) * 49 / 1024 / 1024
+            start = time.perf_counter()
+            encode_video(frames, os.path.join(work_dir, 'pipe.mp4'), 10)
+            result['pipe_encode_s'] = time.perf_counter() - start
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='学习时长动画逐帧渲染耗时测试')
+    parser.add_argument('--rows', type=int, default=300, help='模拟记录的行数（帧数）')
+    parser.add_argument('--workers', type=int, default=None, help='并行工作进程数，默认 CPU 核心数')
+    parser.add_argument('--no-render', action='store_true', help='只测试构建帧，不导出图片')
+    parser.add_argument('--no-encode', action='store_true', help='不测试 ffmpeg 编码')
+    args = parser.parse_args()
+
+    result = benchmark(args.rows, args.workers, not args.no_render, not args.no_encode)
+    print(f"{result['rows']} 帧，每帧更新模板图表 {result['update_ms']:.2f} ms")
+    if 'serial_s' in result:
+        print(f"串行导出: {result['serial_s']:.1f} s")
+        print(f"{result['workers']} 个进程并行导出: {result['parallel_s']:.1f} s（每帧约 {result['frame_kb']:.0f} KB）")
+    elif not args.no_render:
+        print("未安装 Kaleido，跳过图片导出测试")
+    print(f"计算全部帧的缓存键: {result['keys_ms']:.0f} ms")
+    if 'cached_s' in result:
+        print(f"追加 {result['cached_new_frames']} 条记录后借助帧缓存重新生成: {result['cached_s']:.1f} s")
+    if 'pipe_encode_s' in result:
+        print(f"写 PNG 文件再编码: {result['legacy_encode_s']:.2f} s（临时图片 {result['legacy_disk_mb']:.1f} MB）")
+        print(f"直接写入 ffmpeg:   {result['pipe_encode_s']:.2f} s（不写临时文件）")
@@ -0,0 +1,428 @@
+"""
+学习时长实时图表模块
+
+study_log_chart.render_chart 每次都把整天的数据重新生成一份完整的 Plotly HTML，
+连同内嵌的 plotly.js 每次写出约 5 MB，耗时随当天记录数增长。
+
+实时图表模式把页面和数据分开：
+    - 每天只写一次静态页面 学习时长实时图表_<日期>.html（几 KB），
+      plotly.js 在输出目录中只保存一份，所有页面共用
+    - 学习记录 CSV 中新增的行被转换为小时后，逐行追加到 学习时长数据_<日期>.js，
+      每行形如 feed(["09:30:15", 1.5, 9.2, 12, 6.1]);
+    - 页面每隔几秒重新加载数据文件并在浏览器中绘制折线和等级色带
+
+数据文件用 <script> 加载而不是 fetch，直接双击打开本地页面（file://）也能刷新。
+每保存一条记录只读取 CSV 新增的字节、追加一行数据，耗时和写入量与当天记录数无关。
+
+用法:
+    render_live_chart('2025-01-01')          # 与 study_log_chart.render_chart 参数相同，返回页面路径
+"""
+
+import csv
+import io
+import json
+import os
+import threading
+from datetime import datetime
+
+from study_time_parser import parse_minutes, parse_target_minutes
+
+DEFAULT_OUTPUT_FOLDER = '学习时长图表'
+
+# 页面重新加载数据文件的间隔（毫秒）
+POLL_INTERVAL_MS = 5000
+
+# 记录中按小时绘制的列（顺序与数据文件中每行的数值顺序一致）
+VALUE_COLUMNS = ['目前已学习时长', '预测今日学习时长', '目标学习时长', '剩余空闲时间']
+
+# 同时保持增量状态的日期数（跨日时前一天还会再刷新一次）
+MAX_OPEN_CHARTS = 2
+
+
+def parse_hours(value, target=False):
+    """把记录中的时长转换为小时，无法识别时返回 None（规则见 study_time_parser）"""
+    minutes = parse_target_minutes(value) if target else parse_minutes(value)
+    return None if minutes is None else minutes / 60
+
+
+class LiveStudyChart:
+    """
+    一天的实时图表：静态页面 + 追加写入的数据文件
+
+    参数:
+        csv_file_path: 当天的学习记录 CSV
+        current_date: 'YYYY-MM-DD'
+        output_folder: 页面和数据文件的输出目录
+        color_ranges: 等级色带 [(开始, 结束, 颜色, 名称)]，默认从共用的级别表读取
+    """
+
+    def __init__(self, csv_file_path, current_date, output_folder=DEFAULT_OUTPUT_FOLDER, color_ranges=None):
+        self.csv_file_path = csv_file_path
+        self.current_date = current_date
+        self.output_folder = output_folder
+        self.color_ranges = color_ranges
+        self.shell_path = os.path.join(output_folder, f'学习时长实时图表_{current_date}.html')
+        self.feed_path = os.path.join(output_folder, f'学习时长数据_{current_date}.js')
+        self._lock = threading.Lock()
+        self._offset = None  # CSV 中已转换到的字节位置，None 表示尚未初始化
+        self._header = []
+
+        # 统计信息
+        self.points = 0
+        self.last_appended = 0
+        self.last_bytes_written = 0
+
+    def update(self):
+        """
+        把 CSV 中新增的完整行追加到数据文件，首次调用时写出页面并重建数据文件
+
+        返回:
+            str: 页面路径
+        """
+        with self._lock:
+            if self._offset is None or self._csv_truncated():
+                self._start()
+            rows = self._read_new_rows()
+            lines = []
+            for row in rows:
+                values = [parse_hours(row.get(column, ''), target=(column == '目标学习时长')) for column in VALUE_COLUMNS]
+                current_time = row.get('现在时间', '').strip()
+                if not current_time or values[0] is None:
+                    continue
+                lines.append(f"feed({json.dumps([current_time] + values, ensure_ascii=False)});\n")
+            data = ''.join(lines).encode('utf-8')
+            if data:
+                with open(self.feed_path, 'ab') as f:
+                    f.write(data)
+            self.points += len(lines)
+            self.last_appended = len(lines)
+            self.last_bytes_written = len(data)
+            return self.shell_path
+
+    def _csv_truncated(self):
+        try:
+            return os.path.getsize(self.csv_file_path) < self._offset
+        except OSError:
+            return False
+
+    def _start(self):
+        """写出页面和共用的 plotly.js，清空数据文件，从 CSV 开头重新转换"""
+        os.makedirs(self.output_folder, exist_ok=True)
+        plotly_js = write_plotly_js(self.output_folder)
+        self._write_shell(plotly_js)
+        with open(self.feed_path, 'wb'):
+            pass
+        self._offset = 0
+        self.points = 0
+
+    def _read_new_rows(self):
+        """读取 CSV 中上次位置之后的完整行（末尾未写完的行留到下次）"""
+        if not os.path.exists(self.csv_file_path):
+            return []
+        with open(self.csv_file_path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        if not end:
+            return []
+        start_offset = self._offset
+        self._offset += end
+        text = data[:end].decode('utf-8-sig' if start_offset == 0 else 'utf-8')
+        reader = csv.reader(io.StringIO(text))
+        if start_offset == 0:
+            self._header = next(reader, [])
+        return [dict(zip(self._header, values)) for values in reader if values]
+
+    def _write_shell(self, plotly_js):
+        color_ranges = self.color_ranges
+        if color_ranges is None:
+            from level_table import get_level_table
+            color_ranges = get_level_table().color_ranges()
+        bands = [
+            {'start': start, 'end': end, 'color': color, 'label': label}
+            for start, end, color, label in color_ranges
+        ]
+        html = SHELL_TEMPLATE
+        for key, value in (
+            ('__TITLE__', f'学习时长记录 - {self.current_date}'),
+            ('__PLOTLY_JS__', plotly_js),
+            ('__FEED__', os.path.basename(self.feed_path)),
+            ('__DATE__', json.dumps(self.current_date)),
+            ('__BANDS__', json.dumps(bands, ensure_ascii=False)),
+            ('__POLL_MS__', str(POLL_INTERVAL_MS)),
+        ):
+            html = html.replace(key, value)
+        temp_path = self.shell_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(temp_path, self.shell_path)
+
+
+def write_plotly_js(output_folder):
+    """在输出目录中保存一份 plotly.js（按版本命名，已存在时不重复写入），返回文件名"""
+    import plotly
+    name = f'plotly-{plotly.__version__}.min.js'
+    path = os.path.join(output_folder, name)
+    if not os.path.exists(path):
+        from plotly.offline import get_plotlyjs
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+        os.replace(temp_path, path)
+    return name
+
+
+_charts = {}
+_charts_lock = threading.Lock()
+
+
+def render_live_chart(current_date=None, output_folder=DEFAULT_OUTPUT_FOLDER):
+    """
+    更新指定日期（默认今天）的实时图表，参数与 study_log_chart.render_chart 相同
+
+    返回:
+        str: 页面路径
+    """
+    if current_date is None:
+        current_date = datetime.now().strftime('%Y-%m-%d')
+    key = (current_date, output_folder)
+    with _charts_lock:
+        chart = _charts.get(key)
+        if chart is None:
+            csv_file_path = os.path.join('statistics', 'study_time_logs', f'学习记录_{current_date}.csv')
+            chart = _charts[key] = LiveStudyChart(csv_file_path, current_date, output_folder)
+            # 只保留最近几天的增量状态
+            while len(_charts) > MAX_OPEN_CHARTS:
+                _charts.pop(min(_charts))
+    return chart.update()
+
+
+SHELL_TEMPLATE = r"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<script src="__PLOTLY_JS__"></script>
+<style>
+  html, body { margin: 0; background: rgb(30, 30, 30); color: white; font-family: sans-serif; }
+  #status { position: fixed; right: 12px; bottom: 8px; font-size: 12px; color: rgba(255, 255, 255, 0.5); }
+</style>
+</head>
+<body>
+<div id="chart"></div>
+<div id="status"></div>
+<script>
+var FEED = "__FEED__";
+var DATE = __DATE__;
+var BANDS = __BANDS__;
+var POLL_MS = __POLL_MS__;
+
+var rows = [];
+var drawnRows = -1;
+
+function feed(row) { rows.push(row); }
+
+function toSeconds(text) {
+  var parts = text.split(':');
+  return (+parts[0]) * 3600 + (+parts[1]) * 60 + (+(parts[2] || 0));
+}
+
+function pad(value, width) {
+  var text = String(value);
+  while (text.length < width) { text = '0' + text; }
+  return text;
+}
+
+function toTimestamp(seconds) {
+  var ms = Math.round(seconds * 1000);
+  var h = Math.floor(ms / 3600000), m = Math.floor(ms / 60000) % 60, s = Math.floor(ms / 1000) % 60;
+  return DATE + ' ' + pad(h, 2) + ':' + pad(m, 2) + ':' + pad(s, 2) + '.' + pad(ms % 1000, 3);
+}
+
+// 与 study_log_chart.compute_level_bands 相同：每段依次取起点、下界交点、上界交点、终点，再按时间排序
+function levelBand(xs, ys, start, end) {
+  var points = [];
+  function crossing(i, bound) {
+    var y1 = ys[i - 1], y2 = ys[i];
+    if (!((y1 < bound && y2 >= bound) || (y1 >= bound && y2 < bound))) { return; }
+    var proportion = (bound - y1) / (y2 - y1);
+    if (proportion >= 0 && proportion <= 1) {
+      points.push([xs[i - 1] + (xs[i] - xs[i - 1]) * proportion, bound, points.length]);
+    }
+  }
+  for (var i = 1; i < xs.length; i++) {
+    if (start <= ys[i - 1] && ys[i - 1] < end) { points.push([xs[i - 1], ys[i - 1], points.length]); }
+    crossing(i, start);
+    crossing(i, end);
+    if (start <= ys[i] && ys[i] < end) { points.push([xs[i], ys[i], points.length]); }
+  }
+  points.sort(function (a, b) { return a[0] - b[0] || a[2] - b[2]; });
+  return points;
+}
+
+function draw() {
+  var seconds = rows.map(function (row) { return toSeconds(row[0]); });
+  var x = seconds.map(toTimestamp);
+  var column = function (index) { return rows.map(function (row) { return row[index]; }); };
+  var studied = column(1), predicted = column(2), target = column(3), remaining = column(4);
+
+  var traces = [
+    {x: x, y: studied, mode: 'lines+markers', name: '目前已学习时长',
+     line: {color: '#FFD700', width: 5, shape: 'spline', smoothing: 1.3}, marker: {size: 10}},
+    {x: x, y: predicted, mode: 'lines+markers', name: '预测今日学习时长',
+     line: {color: '#FF4500', dash: 'dash', width: 4, shape: 'spline', smoothing: 1.3}, marker: {size: 8}},
+    {x: x, y: target, mode: 'lines+markers', name: '目标学习时长',
+     line: {color: '#32CD32', width: 4}, marker: {size: 8}},
+    {x: x, y: remaining, mode: 'lines', name: '剩余空闲时间',
+     line: {color: '#1E90FF', dash: 'dashdot', width: 4}}
+  ];
+  traces.forEach(function (trace) {
+    trace.marker = Object.assign({}, trace.marker, {symbol: 'circle', line: {width: 1, color: 'DarkSlateGrey'}});
+  });
+
+  var annotations = [], shapes = [];
+  BANDS.forEach(function (band) {
+    var points = levelBand(seconds, studied, band.start, band.end);
+    if (!points.length) { return; }
+    var bx = points.map(function (p) { return toTimestamp(p[0]); });
+    var by = points.map(function (p) { return p[1]; });
+    traces.push({x: bx.concat([bx[bx.length - 1], bx[0]]), y: by.concat([0, 0]), fill: 'toself',
+                 fillcolor: band.color, mode: 'none', name: band.label, showlegend: false});
+    annotations.push({x: bx[Math.floor(bx.length / 2)], y: band.start + 0.3 * (band.end - band.start),
+                      text: band.label, showarrow: false, font: {size: 14, color: 'white'},
+                      xanchor: 'center', yanchor: 'middle', align: 'center', bgcolor: 'rgba(0,0,0,0.5)',
+                      bordercolor: 'white', borderwidth: 1, borderpad: 2});
+  });
+
+  var top = 1;
+  [studied, predicted, target, remaining].forEach(function (values) {
+    values.forEach(function (value) { if (value !== null && value + 1 > top) { top = value + 1; } });
+  });
+  if (seconds.length) {
+    var first = Math.min.apply(null, seconds), last = Math.max.apply(null, seconds);
+    for (var hour = Math.floor(first / 3600) * 3600; hour <= last; hour += 3600) {
+      annotations.push({x: toTimestamp(hour), y: 0, xref: 'x', yref: 'y', text: pad(hour / 3600, 2) + '点',
+                        showarrow: false, font: {size: 12, color: 'yellow'}, xanchor: 'center',
+                        yanchor: 'top', align: 'center', yshift: -20});
+      shapes.push({type: 'line', x0: toTimestamp(hour), y0: 0, x1: toTimestamp(hour), y1: top, xref: 'x', yref: 'y',
+                   line: {color: 'yellow', width: 1, dash: 'dash'}});
+    }
+  }
+
+  var layout = {
+    title: {text: '学习时长记录 - 折线图'},
+    xaxis: {title: {text: '现在时间', standoff: 25}, tickmode: 'array', tickvals: x,
+            ticktext: rows.map(function (row) { return row[0]; }), tickangle: 45,
+            tickfont: {size: 10, color: 'rgba(255, 255, 255, 0.6)'}, showgrid: true, gridcolor: 'LightGray',
+            zeroline: false, showline: true, linewidth: 2, linecolor: 'white', mirror: true},
+    yaxis: {title: {text: '时间 (小时)'}, tickformat: '.1f', showgrid: true, gridcolor: 'LightGray', range: [0, top],
+            showline: true, linewidth: 2, linecolor: 'white', mirror: true},
+    template: 'plotly_dark', autosize: false, width: 1200, height: 600, legend: {x: 0.01, y: 0.99},
+    plot_bgcolor: 'rgba(30, 30, 30, 1)', paper_bgcolor: 'rgba(30, 30, 30, 1)',
+    font: {color: 'white', size: 14}, margin: {b: 120},
+    annotations: annotations, shapes: shapes
+  };
+  Plotly.react('chart', traces, layout);
+}
+
+function poll() {
+  var previous = document.getElementById('feed');
+  if (previous) { previous.parentNode.removeChild(previous); }
+  rows = [];
+  var script = document.createElement('script');
+  script.id = 'feed';
+  script.src = FEED + '?t=' + Date.now();
+  script.onload = function () {
+    if (rows.length !== drawnRows) {
+      drawnRows = rows.length;
+      draw();
+    }
+    document.getElementById('status').textContent =
+      rows.length + ' 条记录，更新于 ' + new Date().toLocaleTimeString();
+    setTimeout(poll, POLL_MS);
+  };
+  script.onerror = function () { setTimeout(poll, POLL_MS); };
+  document.head.appendChild(script);
+}
+
+poll();
+</script>
+</body>
+</html>
+"""
+
+
+def benchmark(records=1000, output_folder=None):
+    """
+    模拟一天逐条保存记录，对比每条记录完整重绘与追加数据的耗时和写入量
+
+    返回:
+        dict: full_ms / live_ms 最后一条记录的耗时（毫秒），full_bytes / live_bytes 最后一条记录写出的字节数
+    """
+    import shutil
+    import tempfile
+    import time
+    from datetime import timedelta
+
+    import plotly.io as pio
+
+    import study_log_chart
+    from study_record_writer import StudyRecordWriter
+
+    work_dir = output_folder or tempfile.mkdtemp(prefix='live_chart_')
+    try:
+        csv_file_path = os.path.join(work_dir, 'study.csv')
+        writer = StudyRecordWriter(csv_file_path, fsync=False)
+        chart = LiveStudyChart(csv_file_path, '2025-01-01', os.path.join(work_dir, 'live'))
+        full_path = os.path.join(work_dir, 'full.html')
+        live_ms = []
+        for i in range(records):
+            studied = i * 720 // records
+            moment = datetime(2025, 1, 1, 6) + timedelta(seconds=i * 16 * 3600 // records)
+            writer.append({
+                "现在时间": moment.strftime('%H:%M:%S'),
+                "目前已学习时长": f"{studied // 60}时{studied % 60:02d}分",
+                "预测今日学习时长": f"{studied * 2 // 60}时{studied * 2 % 60:02d}分",
+                "目标学习时长": "12",
+                "剩余空闲时间": f"{(960 - studied) // 60}时{(960 - studied) % 60:02d}分",
+            })
+            start = time.perf_counter()
+            chart.update()
+            live_ms.append((time.perf_counter() - start) * 1000)
+        writer.close()
+
+        start = time.perf_counter()
+        df = study_log_chart.load_study_log(csv_file_path)
+        pio.write_html(study_log_chart.build_figure(df), file=full_path)
+        full_ms = (time.perf_counter() - start) * 1000
+        return {
+            'records': records,
+            'full_ms': full_ms,
+            'full_bytes': os.path.getsize(full_path),
+            'live_ms': live_ms[-1],
+            'live_first_ms': live_ms[0],
+            'live_avg_ms': sum(live_ms[1:]) / max(1, len(live_ms) - 1),
+            'live_bytes': chart.last_bytes_written,
+            'shell_bytes': os.path.getsize(chart.shell_path),
+        }
+    finally:
+        if output_folder is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='学习时长实时图表')
+    parser.add_argument('--date', help='日期 YYYY-MM-DD，默认今天')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='模拟 N 条记录，对比完整重绘与追加数据')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark(args.benchmark)
+        print(f"{result['records']} 条记录时，保存一条记录后更新图表：")
+        print(f"完整重绘: {result['full_ms']:.0f} ms，写出 {result['full_bytes'] / 1024:.0f} KB")
+        print(f"追加数据: {result['live_ms']:.2f} ms（平均 {result['live_avg_ms']:.2f} ms，首次 {result['live_first_ms']:.0f} ms），"
+              f"写出 {result['live_bytes']} 字节；页面 {result['shell_bytes'] / 1024:.1f} KB 每天只写一次")
+    else:
+        print(f"实时图表页面: {os.path.realpath(render_live_chart(args.date))}")
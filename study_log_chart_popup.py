@@ -4,7 +4,8 @@ import plotly.io as pio
 from datetime import datetime, timedelta
 import os
 import webbrowser
-import json
+from level_table import get_level_table
+from study_time_parser import hours_array
 
 # 辅助函数，寻找交点
 def find_intersection(df, y_target, index):
@@ -39,62 +40,15 @@ df = pd.read_csv(csv_file_path)
 # 将"现在时间"列转换为时间类型
 df['现在时间'] = pd.to_datetime(df['现在时间'], format='%H:%M:%S')
 
-# 辅助函数：将目标学习时长转换为分钟
-def convert_to_minutes(value):
-    """
-    将目标学习时长（小时或格式化的字符串，如 '12时'）转换为分钟。
-    """
-    try:
-        # 如果值是浮动的小时数（例如 12.0），直接乘以60转为分钟
-        if isinstance(value, (float, int)):
-            return value * 60
-        # 如果值是字符串格式（如 '12时' 或 '12:30'），需要提取出小时并转为分钟
-        elif isinstance(value, str):
-            value = value.strip()
-            if '时' in value:  # 处理类似 '12时' 的格式
-                hours = int(value.replace('时', '').strip())
-                return hours * 60
-            elif ':' in value:  # 处理类似 '12:30' 的格式
-                hours, minutes = map(int, value.split(':'))
-                return hours * 60 + minutes
-        else:
-            raise ValueError(f"Unexpected value format: {value}")
-    except Exception as e:
-        print(f"Error converting value to minutes: {e}")
-        return 0  # 出错时返回 0 以避免中断流程
-
-# 应用转换函数来处理目标学习时长列
-df['目标学习时长'] = df['目标学习时长'].apply(convert_to_minutes) / 60  # 转换为小时单位
-
-# 打印转换后的值来检查是否正确
-# print("转换后的目标学习时长（小时）：")
-# print(df['目标学习时长'])
-
-# 将其余列转换为分钟数，以便于绘制图表
-def time_to_minutes(time_str):
-    if isinstance(time_str, str):
-        parts = time_str.replace('分', '').replace('时', ':').split(':')
-        if len(parts) == 2:
-            hours, minutes = map(int, parts)
-            return hours * 60 + minutes
-    return time_str  # 如果已经是数字类型，则直接返回
-
 def minutes_to_hours_minutes(minutes):
     hours = int(minutes // 60)
     remaining_minutes = int(minutes % 60)
     return f'{hours}时{remaining_minutes}分'
 
+# 各列时长整列解析为小时（目标学习时长中的纯数字单位为小时）
+df['目标学习时长'] = hours_array(df['目标学习时长'], target=True)
 for column in ['目前已学习时长', '预测今日学习时长', '剩余空闲时间']:
-    df[column] = df[column].apply(time_to_minutes)
-
-# 处理目标学习时长列（可能包含小数）
-df['目标学习时长'] = df['目标学习时长'].apply(lambda x: round(x * 60) if isinstance(x, float) else time_to_minutes(x))
-
-# 将分钟数转换为小时数
-df['目前已学习时长'] = df['目前已学习时长'] / 60
-df['预测今日学习时长'] = df['预测今日学习时长'] / 60
-df['目标学习时长'] = df['目标学习时长'] / 60
-df['剩余空闲时间'] = df['剩余空闲时间'] / 60
+    df[column] = hours_array(df[column])
 
 # 按"现在时间"排序数据框
 df = df.sort_values(by='现在时间').reset_index(drop=True)
@@ -139,19 +93,8 @@ fig.add_trace(go.Scatter(
 def load_color_ranges_from_config():
     """从 config.json 加载颜色区间配置"""
     try:
-        with open('config.json', 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            
-        color_ranges = []
-        for level in config['levels']:
-            color_ranges.append((
-                level['start'],
-                level['end'],
-                level['color'],  # 直接使用 rgba 格式
-                level['name']
-            ))
-            
-        return color_ranges
+        # 与主程序共用同一份级别表，config.json 未修改时不再重复读取
+        return get_level_table().color_ranges()
     except Exception as e:
         print(f"加载颜色配置失败: {str(e)}")
         return []
@@ -0,0 +1,107 @@
+"""
+学习记录追加写入模块
+
+原先每条记录都把整天的 DataFrame 拼接后整体重写 学习记录_<日期>.csv，
+耗时和内存都随当天记录数增长。此模块每条记录只追加一行并立即落盘，
+内存中只保留最近若干条记录供需要的地方使用。
+
+写出的文件与 DataFrame.to_csv(index=False, encoding='utf-8-sig') 的格式一致：
+文件开头带 BOM，首行为表头，行尾使用系统换行符，study_log_chart.py 等脚本可直接读取。
+"""
+
+import codecs
+import csv
+import io
+import os
+import threading
+from collections import deque
+
+# 学习记录的列
+COLUMNS = [
+    "现在时间",
+    "目前已学习时长",
+    "预测今日学习时长",
+    "目标学习时长",
+    "剩余空闲时间"
+]
+
+# 内存中保留的最近记录条数
+DEFAULT_TAIL_SIZE = 64
+
+
+class StudyRecordWriter:
+    """
+    按行追加学习记录的写入器
+
+    参数:
+        csv_file_path: 学习记录 CSV 文件路径
+        tail_size: 内存中保留的最近记录条数
+        fsync: 每次追加后是否调用 os.fsync 确保写入磁盘
+    """
+
+    def __init__(self, csv_file_path, tail_size=DEFAULT_TAIL_SIZE, fsync=True):
+        self.csv_file_path = csv_file_path
+        self.fsync = fsync
+        self.tail = deque(maxlen=tail_size)
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._load_tail()
+
+    def _load_tail(self):
+        """读取已有文件的最近记录和总条数（当天重启程序时）"""
+        if not os.path.exists(self.csv_file_path):
+            return
+        with open(self.csv_file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                self.tail.append(row)
+                self.count += 1
+
+    def _open(self):
+        if self._file is not None:
+            return
+        directory = os.path.dirname(self.csv_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(self.csv_file_path) or os.path.getsize(self.csv_file_path) == 0
+        self._file = open(self.csv_file_path, 'ab')
+        if is_new:
+            # 新文件：写入 BOM 和表头
+            self._file.write(codecs.BOM_UTF8 + self._encode_row(COLUMNS))
+            self._flush()
+
+    def _encode_row(self, values):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator=os.linesep).writerow(values)
+        return buffer.getvalue().encode('utf-8')
+
+    def _flush(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def append(self, record):
+        """
+        追加一条记录
+
+        参数:
+            record: dict，键为 COLUMNS 中的列名
+        """
+        values = ["" if record.get(column) is None else record.get(column) for column in COLUMNS]
+        with self._lock:
+            self._open()
+            self._file.write(self._encode_row(values))
+            self._flush()
+            self.tail.append({column: str(value) for column, value in zip(COLUMNS, values)})
+            self.count += 1
+
+    def latest(self):
+        """返回最近一条记录，没有记录时返回 None"""
+        with self._lock:
+            return self.tail[-1] if self.tail else None
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,238 @@
+"""
+学习时长字符串解析模块
+
+学习记录、悬浮按钮数据和昼夜表中的时长有几种写法：
+    '6时30分'、'12时'          学习记录 CSV、floating_button_data.json
+    '6:30:15'、'6:30:15.5'     昼夜表单元格
+    '12'、12、12.5             目标学习时长（单位为小时）
+原先图表脚本、主程序、悬浮按钮、33娘和歌单统计各自用 split / replace / 正则逐行解析，
+规则略有出入，整列处理时还要为每一行调用一次 Python 函数。
+
+此模块统一解析规则：
+    - parse_minutes / parse_target_minutes: 单个值，结果按字符串缓存（同一天的时长取值很少）
+    - minutes_array / target_minutes_array / hours_array: 整列解析，
+      先用 pandas.factorize 找出不同的取值，每个取值只解析一次，再用下标数组还原整列
+    - format_minutes: 分钟数格式化为 'H时MM分'
+
+独立运行时用一年的学习记录对比逐行解析与整列解析的耗时：
+    python study_time_parser.py                       # 生成一年的模拟学习记录
+    python study_time_parser.py --folder statistics/study_time_logs
+"""
+
+import re
+from functools import lru_cache
+
+# 'H时MM分'、'H时'、'H:MM'、'H:MM:SS(.fff)'，秒数忽略
+_DURATION_PATTERN = re.compile(r'^\s*(-?)(\d+)\s*(?:时\s*(?:(\d+)\s*分?)?|:(\d+)(?::\d+(?:\.\d*)?)?)\s*$')
+_NUMBER_PATTERN = re.compile(r'^\s*\d+(?:\.\d*)?\s*$')
+
+
+@lru_cache(maxsize=4096)
+def _parse_text(text):
+    match = _DURATION_PATTERN.match(text)
+    if not match:
+        return None
+    sign, hours, minutes_zh, minutes_colon = match.groups()
+    minutes = int(hours) * 60 + int(minutes_zh or minutes_colon or 0)
+    return -minutes if sign else minutes
+
+
+def parse_minutes(value):
+    """
+    把时长转换为分钟数
+
+    参数:
+        value: 'H时MM分' / 'H时' / 'H:MM' / 'H:MM:SS' 字符串（秒数忽略），或已经是分钟数的数字
+
+    返回:
+        int 或 float: 分钟数，无法识别时返回 None
+    """
+    if isinstance(value, str):
+        return _parse_text(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def parse_target_minutes(value):
+    """
+    把目标学习时长转换为分钟数：纯数字（数字或数字字符串）的单位为小时，其余写法同 parse_minutes
+
+    返回:
+        分钟数（按整分钟取整），无法识别时返回 None
+    """
+    if isinstance(value, str):
+        if _NUMBER_PATTERN.match(value):
+            return round(float(value) * 60)
+        return _parse_text(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if value != value:  # NaN
+            return None
+        return round(value * 60)
+    return None
+
+
+def format_minutes(minutes):
+    """分钟数格式化为 'H时MM分'，如 65 -> '1时05分'，-65 -> '-1时05分'"""
+    minutes = int(minutes)
+    sign = '-' if minutes < 0 else ''
+    hours, minutes = divmod(abs(minutes), 60)
+    return f"{sign}{hours}时{minutes:02d}分"
+
+
+def _parse_array(values, parse, numeric_scale):
+    import numpy as np
+    import pandas as pd
+
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        result = series.to_numpy(dtype=float) * numeric_scale
+        return np.round(result) if numeric_scale != 1 else result
+
+    # 每个不同的取值只解析一次
+    codes, uniques = pd.factorize(series)
+    parsed = np.array([parse(value) for value in uniques], dtype=float)
+    parsed = np.append(parsed, np.nan)  # 缺失值（code 为 -1）对应末尾的 NaN
+    return parsed[codes]
+
+
+def minutes_array(values):
+    """
+    整列解析时长
+
+    参数:
+        values: pandas.Series、列表或数组
+
+    返回:
+        numpy.ndarray: float64 分钟数，无法识别或缺失时为 NaN
+    """
+    return _parse_array(values, parse_minutes, 1)
+
+
+def target_minutes_array(values):
+    """整列解析目标学习时长（纯数字的单位为小时），返回 float64 分钟数"""
+    return _parse_array(values, parse_target_minutes, 60)
+
+
+def hours_array(values, target=False):
+    """整列解析为小时数；target 为 True 时按目标学习时长的规则解析"""
+    return (target_minutes_array(values) if target else minutes_array(values)) / 60
+
+
+def _legacy_time_to_minutes(time_str):
+    """原先图表脚本中的逐行解析，用于基准测试对比"""
+    if isinstance(time_str, str):
+        parts = time_str.replace('分', '').replace('时', ':').split(':')
+        if len(parts) == 2:
+            hours, minutes = map(int, parts)
+            return hours * 60 + minutes
+    return time_str
+
+
+def write_synthetic_year(folder, days=365, seed=0):
+    """生成 days 天的模拟学习记录（每天每分钟可能有一条）"""
+    import csv
+    import os
+    import random
+    from datetime import date, timedelta
+
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    first_day = date(2025, 1, 1)
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        path = os.path.join(folder, f"学习记录_{day.strftime('%Y-%m-%d')}.csv")
+        studied = 0
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["现在时间", "目前已学习时长", "预测今日学习时长", "目标学习时长", "剩余空闲时间"])
+            for minute in range(6 * 60, 22 * 60):
+                if rng.random() < 0.3:
+                    continue
+                studied += rng.random() < 0.8
+                writer.writerow([
+                    f"{minute // 60:02d}:{minute % 60:02d}:{rng.randint(0, 59):02d}",
+                    format_minutes(studied),
+                    format_minutes(studied * 2),
+                    rng.choice(["12", "10", "12.5"]),
+                    format_minutes(960 - studied),
+                ])
+
+
+def benchmark(folder=None, days=365):
+    """
+    读取一整年的学习记录，对比逐行 apply 与整列解析的耗时，并确认结果一致
+
+    返回:
+        dict: rows 总行数, read_ms 读取 CSV 耗时, legacy_ms 逐行解析耗时, vectorized_ms 整列解析耗时,
+              scalar_legacy_us / scalar_us 单个值的平均解析耗时（微秒）
+    """
+    import glob
+    import os
+    import shutil
+    import tempfile
+    import time
+
+    import numpy as np
+    import pandas as pd
+
+    temp_folder = None
+    if folder is None:
+        temp_folder = folder = tempfile.mkdtemp(prefix='study_logs_')
+        write_synthetic_year(folder, days)
+    try:
+        start = time.perf_counter()
+        files = sorted(glob.glob(os.path.join(folder, '学习记录_*.csv')))
+        df = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+        read_ms = (time.perf_counter() - start) * 1000
+        columns = ['目前已学习时长', '预测今日学习时长', '剩余空闲时间']
+
+        start = time.perf_counter()
+        legacy = {column: df[column].apply(_legacy_time_to_minutes) for column in columns}
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        _parse_text.cache_clear()
+        start = time.perf_counter()
+        vectorized = {column: minutes_array(df[column]) for column in columns}
+        vectorized_ms = (time.perf_counter() - start) * 1000
+
+        for column in columns:
+            assert np.array_equal(legacy[column].to_numpy(dtype=float), vectorized[column], equal_nan=True), column
+
+        samples = df['目前已学习时长'].tolist()[:100000]
+        start = time.perf_counter()
+        for value in samples:
+            _legacy_time_to_minutes(value)
+        scalar_legacy_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for value in samples:
+            parse_minutes(value)
+        scalar_s = time.perf_counter() - start
+
+        return {
+            'files': len(files),
+            'rows': len(df),
+            'read_ms': read_ms,
+            'legacy_ms': legacy_ms,
+            'vectorized_ms': vectorized_ms,
+            'scalar_legacy_us': scalar_legacy_s * 1e6 / max(1, len(samples)),
+            'scalar_us': scalar_s * 1e6 / max(1, len(samples)),
+        }
+    finally:
+        if temp_folder:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='学习时长解析耗时对比')
+    parser.add_argument('--folder', help='学习记录目录，默认生成一年的模拟记录')
+    parser.add_argument('--days', type=int, default=365, help='模拟记录的天数')
+    args = parser.parse_args()
+
+    result = benchmark(args.folder, args.days)
+    print(f"{result['files']} 个文件，{result['rows']} 行，读取 CSV {result['read_ms']:.0f} ms")
+    print(f"逐行 apply 解析 3 列: {result['legacy_ms']:.0f} ms")
+    print(f"整列解析 3 列:       {result['vectorized_ms']:.0f} ms")
+    print(f"单个值: 原写法 {result['scalar_legacy_us']:.2f} us，parse_minutes {result['scalar_us']:.2f} us")
@@ -0,0 +1,230 @@
+"""
+学习时长趋势图
+
+study_log_chart.py / study_log_chart_popup.py 只能显示一天的学习记录。
+此脚本从每日学习汇总索引（daily_summary.py）读取每天的最终学习时长、目标和达到的级别，
+生成一张可在 周 / 月 / 年 之间切换的趋势图：
+    - 柱状图：每天的最终学习时长，颜色为当天达到的级别色带颜色
+    - 折线：目标学习时长、近 7 天平均学习时长
+    - 右侧坐标轴：目标达成率
+
+打开前只重新汇总新增或变化的学习记录，不再逐个读取所有 CSV。
+plotly.js 与实时图表共用输出目录中的同一份文件。
+
+用法:
+    python study_trend_chart.py                 # 默认显示最近一个月
+    python study_trend_chart.py --view year
+    python study_trend_chart.py --benchmark     # 用一年的模拟记录对比逐个读取 CSV 与读取汇总索引
+"""
+
+import os
+import webbrowser
+from datetime import timedelta
+
+from daily_summary import get_default_index
+
+DEFAULT_OUTPUT_FOLDER = '学习时长图表'
+
+# 各视图显示的天数
+VIEW_DAYS = {'week': 7, 'month': 31, 'year': 366}
+VIEW_LABELS = {'week': '周', 'month': '月', 'year': '年'}
+
+
+def load_trend_data(index=None):
+    """
+    刷新汇总索引并读取为 DataFrame
+
+    返回:
+        pandas.DataFrame: 日期(datetime), 学习时长 / 目标学习时长(小时), 达成率, 级别
+    """
+    import pandas as pd
+
+    if index is None:
+        index = get_default_index()
+    index.refresh()
+    df = pd.DataFrame(index.load(), columns=['日期', '学习时长', '目标学习时长', '达成率', '级别'])
+    df['日期'] = pd.to_datetime(df['日期'], format='%Y-%m-%d')
+    df['学习时长'] = df['学习时长'].astype(float) / 60
+    df['目标学习时长'] = df['目标学习时长'].astype(float) / 60
+    df['达成率'] = df['达成率'].astype(float)
+    return df
+
+
+def build_trend_figure(df, view='month', color_ranges=None):
+    """根据每日汇总构建趋势图，view 为初始显示的范围（week / month / year）"""
+    import plotly.graph_objs as go
+
+    if color_ranges is None:
+        from level_table import get_level_table
+        color_ranges = get_level_table().color_ranges()
+    level_colors = {name: color for _, _, color, name in color_ranges}
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=df['日期'],
+        y=df['学习时长'],
+        name='最终学习时长',
+        marker=dict(color=[level_colors.get(level, 'rgba(128, 128, 128, 0.6)') for level in df['级别']]),
+        customdata=df['级别'].fillna('未达到级别'),
+        hovertemplate='%{x|%Y-%m-%d}<br>学习 %{y:.2f} 小时<br>%{customdata}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=df['日期'],
+        y=df['目标学习时长'],
+        mode='lines',
+        name='目标学习时长',
+        line=dict(color='#32CD32', width=3, shape='hv')
+    ))
+    fig.add_trace(go.Scatter(
+        x=df['日期'],
+        y=df.set_index('日期')['学习时长'].rolling('7D').mean().to_numpy(),
+        mode='lines',
+        name='近 7 天平均',
+        line=dict(color='#FFD700', width=3, shape='spline', smoothing=1.0)
+    ))
+    fig.add_trace(go.Scatter(
+        x=df['日期'],
+        y=df['达成率'] * 100,
+        mode='markers',
+        name='目标达成率',
+        yaxis='y2',
+        marker=dict(color='#FF4500', size=6, symbol='diamond'),
+        hovertemplate='%{x|%Y-%m-%d}<br>达成率 %{y:.0f}%<extra></extra>'
+    ))
+
+    # 周 / 月 / 年 切换按钮只调整横轴范围，数据只嵌入一次
+    last_day = df['日期'].max() if len(df) else None
+    ranges = {}
+    for name, days in VIEW_DAYS.items():
+        if last_day is not None:
+            ranges[name] = [last_day - timedelta(days=days - 0.5), last_day + timedelta(days=0.5)]
+    buttons = [
+        dict(label=VIEW_LABELS[name], method='relayout', args=[{'xaxis.range': ranges[name]}])
+        for name in VIEW_DAYS if name in ranges
+    ]
+
+    y_max = max(df[['学习时长', '目标学习时长']].max().max(), 1) + 1 if len(df) else 16
+    fig.update_layout(
+        title='学习时长趋势',
+        xaxis=dict(
+            title='日期',
+            range=ranges.get(view),
+            tickformat='%m-%d',
+            showgrid=True,
+            gridcolor='rgba(211, 211, 211, 0.3)'
+        ),
+        yaxis=dict(title='学习时长 (小时)', range=[0, y_max], showgrid=True, gridcolor='rgba(211, 211, 211, 0.3)'),
+        yaxis2=dict(title='达成率 (%)', overlaying='y', side='right', range=[0, 150], showgrid=False),
+        updatemenus=[dict(type='buttons', direction='right', x=0.5, xanchor='center', y=1.12, buttons=buttons)],
+        template='plotly_dark',
+        autosize=False,
+        width=1200,
+        height=600,
+        legend=dict(x=0.01, y=0.99),
+        plot_bgcolor='rgba(30, 30, 30, 1)',
+        paper_bgcolor='rgba(30, 30, 30, 1)',
+        font=dict(color='white', size=14),
+        bargap=0.15
+    )
+    return fig
+
+
+def render_trend_chart(view='month', output_folder=DEFAULT_OUTPUT_FOLDER, index=None):
+    """
+    生成趋势图 HTML
+
+    返回:
+        str: 生成的 HTML 文件路径
+    """
+    import plotly.io as pio
+
+    from study_log_chart_live import write_plotly_js
+
+    df = load_trend_data(index)
+    fig = build_trend_figure(df, view)
+    os.makedirs(output_folder, exist_ok=True)
+    output_file_path = os.path.join(output_folder, '学习时长趋势图.html')
+    pio.write_html(fig, file=output_file_path, include_plotlyjs=write_plotly_js(output_folder))
+    return output_file_path
+
+
+def benchmark(days=365):
+    """
+    用 days 天的模拟学习记录对比：逐个读取所有 CSV / 首次建立索引 / 读取已有索引并生成趋势图
+
+    返回:
+        dict: 各阶段耗时（毫秒）
+    """
+    import glob
+    import shutil
+    import tempfile
+    import time
+
+    import numpy as np
+    import pandas as pd
+
+    from daily_summary import DailySummaryIndex
+    from study_time_parser import minutes_array, write_synthetic_year
+
+    work_dir = tempfile.mkdtemp(prefix='study_trend_')
+    try:
+        logs_folder = os.path.join(work_dir, 'study_time_logs')
+        write_synthetic_year(logs_folder, days)
+
+        # 原先的方式：读取每个 CSV，取最后一条记录
+        start = time.perf_counter()
+        finals = []
+        for path in sorted(glob.glob(os.path.join(logs_folder, '学习记录_*.csv'))):
+            df = pd.read_csv(path)
+            finals.append(minutes_array(df['目前已学习时长'])[-1])
+        read_all_ms = (time.perf_counter() - start) * 1000
+
+        index_path = os.path.join(work_dir, 'daily_summary.csv')
+        start = time.perf_counter()
+        DailySummaryIndex(index_path, logs_folder).refresh()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # 新打开的进程：读取已有索引（无变化），生成并写出趋势图
+        start = time.perf_counter()
+        index = DailySummaryIndex(index_path, logs_folder)
+        df = load_trend_data(index)
+        load_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        output_folder = os.path.join(work_dir, 'charts')
+        render_trend_chart('year', output_folder, index)
+        render_ms = (time.perf_counter() - start) * 1000
+
+        assert np.allclose(df['学习时长'].to_numpy() * 60, finals)
+        return {
+            'days': days,
+            'read_all_ms': read_all_ms,
+            'build_index_ms': build_ms,
+            'load_index_ms': load_ms,
+            'render_ms': render_ms,
+            'html_kb': os.path.getsize(os.path.join(output_folder, '学习时长趋势图.html')) / 1024,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='学习时长趋势图')
+    parser.add_argument('--view', choices=list(VIEW_DAYS), default='month', help='初始显示范围')
+    parser.add_argument('--no-open', action='store_true', help='只生成文件，不打开浏览器')
+    parser.add_argument('--benchmark', action='store_true', help='用一年的模拟记录测试加载耗时')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark()
+        print(f"{result['days']} 天的学习记录：")
+        print(f"逐个读取 CSV:       {result['read_all_ms']:.0f} ms")
+        print(f"首次建立汇总索引:   {result['build_index_ms']:.0f} ms（只需一次，之后每天增量更新）")
+        print(f"读取汇总索引:       {result['load_index_ms']:.0f} ms")
+        print(f"生成年视图趋势图:   {result['render_ms']:.0f} ms，HTML {result['html_kb']:.0f} KB")
+    else:
+        output_file_path = render_trend_chart(args.view)
+        print(f"趋势图: {os.path.realpath(output_file_path)}")
+        if not args.no_open:
+            webbrowser.open(f'file://{os.path.realpath(output_file_path)}')
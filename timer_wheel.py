@@ -0,0 +1,357 @@
+"""
+统一定时调度模块
+
+各处的定时任务原先各自开线程或定时器睡眠等待：
+主程序的每 5 分钟音效线程、21:30 自动关机检查、昼夜表自动记录每秒醒来一次的主循环、
+half_hour.Scheduler 的报时线程、悬浮按钮和 auto_shutdown.pyw 每秒触发的 QTimer。
+
+此模块提供一个基于单调时钟的哈希时间轮，所有定时任务注册到同一个调度线程：
+    - 任务按到期刻度散列到固定数量的槽中，注册 / 取消都是 O(1)
+    - 调度线程只在最近一个任务到期时醒来，没有到期任务时不做固定频率的空转
+    - 周期任务按"上一次的计划时间 + 周期"计算下一次，不会因回调耗时累积漂移；
+      按墙上时间对齐的任务（整 5 分钟、每天 21:30）每次触发后按墙上时间重新计算
+    - 每个任务记录触发次数、相对计划时间的平均 / 最大延迟和出错次数
+
+用法:
+    wheel = TimerWheel().start()
+    job = wheel.call_every(300, play_effect, anchor=time(0, 0), name='五分钟音效')
+    wheel.call_at(21, 30, check_shutdown, name='自动关机检查')
+    job.cancel()
+
+独立运行时统计一组任务在一段时间内的唤醒次数和触发延迟：
+    python timer_wheel.py --seconds 10
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+# 默认刻度（秒）与槽数：一圈覆盖约 8.5 分钟，更远的任务按圈数留在槽中
+DEFAULT_TICK = 1.0
+DEFAULT_SLOTS = 512
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+class TimerJob:
+    """注册在时间轮上的任务，由 TimerWheel 的 call_* 方法创建"""
+
+    def __init__(self, wheel, func, name, interval=None, anchor=None):
+        self._wheel = wheel
+        self.func = func
+        self.name = name or getattr(func, '__name__', 'job')
+        self.interval = interval
+        self.anchor = anchor
+        self.deadline = None        # 单调时钟上的计划触发时间
+        self.wall_deadline = None   # 按墙上时间对齐的任务的计划触发时间
+        self.tick = None
+        self.cancelled = False
+        self.runs = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def cancel(self):
+        """取消任务；正在执行的回调不受影响，之后不会再触发"""
+        self._wheel._cancel(self)
+
+    def stats(self):
+        """触发次数、相对计划时间的平均 / 最大延迟（毫秒）和出错次数"""
+        return {
+            'name': self.name,
+            'runs': self.runs,
+            'avg_latency_ms': self.total_latency * 1000 / self.runs if self.runs else 0.0,
+            'max_latency_ms': self.max_latency * 1000,
+            'errors': self.errors,
+            'cancelled': self.cancelled,
+        }
+
+
+def next_wall_time(anchor, interval, now):
+    """
+    墙上时间 anchor + k * interval 中第一个晚于 now 的时刻
+
+    参数:
+        anchor: datetime，或 datetime.time（表示 now 当天的该时刻）
+        interval: 周期（秒）
+    """
+    if not isinstance(anchor, datetime):
+        anchor = datetime.combine(now.date(), anchor)
+    elapsed = (now - anchor).total_seconds()
+    periods = math.floor(elapsed / interval) + 1
+    return anchor + timedelta(seconds=periods * interval)
+
+
+class TimerWheel:
+    """
+    哈希时间轮调度器
+
+    参数:
+        tick: 刻度（秒），决定任务散列到槽的粒度；任务仍按各自的精确计划时间触发
+        slots: 槽数
+        on_error: 回调抛出异常时调用，参数为 (任务, 异常)
+        dispatch: 执行回调的方式，默认在调度线程中直接调用；
+                  Qt 界面可传入把回调转交给界面线程的函数
+        clock / wall_clock: 单调时钟与墙上时钟，可替换以便回放测试
+    """
+
+    def __init__(self, tick=DEFAULT_TICK, slots=DEFAULT_SLOTS, on_error=None, dispatch=None,
+                 clock=time.monotonic, wall_clock=datetime.now):
+        self.tick = tick
+        self.slots = slots
+        self.on_error = on_error
+        self.dispatch = dispatch
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self._wheel = [set() for _ in range(slots)]
+        self._count = 0
+        self._current_tick = math.floor(clock() / tick)
+        self._condition = threading.Condition()
+        self._jobs = []
+        self._thread = None
+        self._closed = False
+        self.wakeups = 0
+
+    # ---- 注册任务 ----
+
+    def call_later(self, delay, func, name=None):
+        """delay 秒后执行一次"""
+        job = TimerJob(self, func, name)
+        with self._condition:
+            job.deadline = self.clock() + delay
+            self._add(job)
+        return job
+
+    def call_every(self, interval, func, name=None, anchor=None, first_delay=None):
+        """
+        每 interval 秒执行一次
+
+        参数:
+            anchor: 为 None 时从现在起按单调时钟计时（首次在 first_delay 或 interval 秒后）；
+                    为 datetime / datetime.time 时在墙上时间 anchor + k * interval 触发，
+                    例如 anchor=time(0, 0), interval=300 表示每个整 5 分钟
+        """
+        job = TimerJob(self, func, name, interval, anchor)
+        with self._condition:
+            if anchor is None:
+                job.deadline = self.clock() + (interval if first_delay is None else first_delay)
+            else:
+                self._schedule_wall(job, self.wall_clock())
+            self._add(job)
+        return job
+
+    def call_at(self, hour, minute, func, name=None, second=0):
+        """每天墙上时间 hour:minute:second 执行一次"""
+        from datetime import time as time_of_day
+        return self.call_every(DAY_SECONDS, func, name, anchor=time_of_day(hour, minute, second))
+
+    def jobs(self):
+        with self._condition:
+            return [job for job in self._jobs if not job.cancelled]
+
+    def stats(self):
+        """调度线程唤醒次数和各任务的统计"""
+        with self._condition:
+            return {'wakeups': self.wakeups, 'jobs': [job.stats() for job in self._jobs]}
+
+    # ---- 时间轮 ----
+
+    def _schedule_wall(self, job, wall_now):
+        job.wall_deadline = next_wall_time(job.anchor, job.interval, wall_now)
+        job.deadline = self.clock() + (job.wall_deadline - wall_now).total_seconds()
+
+    def _add(self, job):
+        job.tick = math.ceil(job.deadline / self.tick)
+        self._wheel[job.tick % self.slots].add(job)
+        self._count += 1
+        if job not in self._jobs:
+            self._jobs.append(job)
+        self._condition.notify()
+
+    def _remove(self, job):
+        slot = self._wheel[job.tick % self.slots]
+        if job in slot:
+            slot.discard(job)
+            self._count -= 1
+
+    def _cancel(self, job):
+        with self._condition:
+            job.cancelled = True
+            self._remove(job)
+            if job in self._jobs:
+                self._jobs.remove(job)
+            self._condition.notify()
+
+    def _next_deadline(self):
+        """最早到期任务的计划时间；没有任务时返回 None"""
+        if not self._count:
+            return None
+        current = math.ceil(self.clock() / self.tick)
+        # 从当前刻度往后找第一个有本圈任务的槽
+        for offset in range(self.slots):
+            tick = current + offset
+            due = [job.deadline for job in self._wheel[tick % self.slots] if job.tick <= tick]
+            if due:
+                return min(due)
+        # 一圈之内没有任务：所有任务都在更远的圈数上
+        return min(job.deadline for slot in self._wheel for job in slot)
+
+    def _pop_due(self, now):
+        """从上次处理到的刻度推进到当前刻度，取出其间所有已到期的任务"""
+        due = []
+        current = math.floor(now / self.tick)
+        # 到期任务的刻度不超过 current + 1；落后超过一圈（例如系统休眠）时每个槽只需检查一次
+        ticks = range(self._current_tick, current + 2)
+        if len(ticks) > self.slots:
+            ticks = range(current + 2 - self.slots, current + 2)
+        for tick in ticks:
+            slot = self._wheel[tick % self.slots]
+            for job in [job for job in slot if job.deadline <= now]:
+                slot.discard(job)
+                self._count -= 1
+                due.append(job)
+        self._current_tick = current
+        due.sort(key=lambda job: job.deadline)
+        return due
+
+    def _reschedule(self, job, now):
+        if job.interval is None or job.cancelled:
+            if job in self._jobs:
+                self._jobs.remove(job)
+            return
+        if job.anchor is not None:
+            # 按墙上时间重新计算，系统时间调整或休眠后仍对齐到整点
+            self._schedule_wall(job, max(self.wall_clock(), job.wall_deadline))
+        else:
+            job.deadline += job.interval
+            if job.deadline <= now:
+                # 落后一个周期以上（例如系统休眠），跳过错过的触发
+                missed = math.floor((now - job.deadline) / job.interval) + 1
+                job.deadline += missed * job.interval
+        self._add(job)
+
+    def run_pending(self):
+        """
+        执行所有已到期的任务
+
+        返回:
+            float | None: 距离下一个任务到期的秒数，没有任务时为 None
+        """
+        now = self.clock()
+        with self._condition:
+            due = self._pop_due(now)
+            wall_now = self.wall_clock() if due else None
+            ready = []
+            for job in due:
+                if job.wall_deadline is not None and wall_now < job.wall_deadline - timedelta(seconds=self.tick):
+                    # 墙上时间被调回，尚未真正到点：按剩余时间重新放回
+                    self._schedule_wall(job, wall_now)
+                    self._add(job)
+                    continue
+                ready.append((job, job.deadline))
+                self._reschedule(job, now)
+
+        for job, scheduled in ready:
+            self._fire(job, scheduled)
+
+        with self._condition:
+            deadline = self._next_deadline()
+        return None if deadline is None else max(deadline - self.clock(), 0.0)
+
+    def _fire(self, job, scheduled):
+        def run():
+            if job.cancelled:
+                return
+            latency = self.clock() - scheduled
+            job.runs += 1
+            job.total_latency += latency
+            job.max_latency = max(job.max_latency, latency)
+            try:
+                job.func()
+            except Exception as e:
+                job.errors += 1
+                if self.on_error:
+                    self.on_error(job, e)
+
+        if self.dispatch:
+            self.dispatch(run)
+        else:
+            run()
+
+    # ---- 调度线程 ----
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='TimerWheel', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            timeout = self.run_pending()
+            with self._condition:
+                if self._closed:
+                    return
+                # 注册新任务或取消任务时会被唤醒，重新计算等待时间
+                self._condition.wait(timeout)
+                self.wakeups += 1
+                if self._closed:
+                    return
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+
+_default_wheel = None
+_default_wheel_lock = threading.Lock()
+
+
+def get_default_wheel(on_error=None):
+    """同一进程内共用的时间轮（首次调用时启动调度线程）"""
+    global _default_wheel
+    with _default_wheel_lock:
+        if _default_wheel is None:
+            _default_wheel = TimerWheel(on_error=on_error).start()
+        return _default_wheel
+
+
+def benchmark(seconds=10.0):
+    """
+    注册一组与实际用途相同频率的任务，运行 seconds 秒，统计调度线程唤醒次数和触发延迟
+
+    返回:
+        dict: wakeups 唤醒次数, jobs 各任务统计, polling_wakeups 原先各自轮询的唤醒次数估计
+    """
+    wheel = TimerWheel().start()
+    wheel.call_every(1, lambda: None, name='每秒刷新', anchor=datetime.min.time())
+    wheel.call_every(300, lambda: None, name='整5分钟', anchor=datetime.min.time())
+    wheel.call_at(21, 30, lambda: None, name='每天21:30')
+    wheel.call_every(2.5, lambda: None, name='2.5秒周期')
+    wheel.call_later(seconds / 2, lambda: None, name='一次性')
+    cancelled = wheel.call_every(0.1, lambda: None, name='已取消')
+    cancelled.cancel()
+    time.sleep(seconds)
+    wheel.close()
+    stats = wheel.stats()
+    # 原方式：昼夜表记录每秒 1 次、悬浮按钮两个 1 秒 QTimer、关机倒计时 1 秒 QTimer
+    stats['polling_wakeups'] = int(seconds * 4)
+    return stats
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='时间轮调度唤醒次数与触发延迟')
+    parser.add_argument('--seconds', type=float, default=10.0, help='运行时长（秒）')
+    args = parser.parse_args()
+
+    result = benchmark(args.seconds)
+    print(f"调度线程唤醒 {result['wakeups']} 次（原先各自轮询约 {result['polling_wakeups']} 次）")
+    for job in result['jobs']:
+        print(
+            f"{job['name']}: 触发 {job['runs']} 次, 平均延迟 {job['avg_latency_ms']:.3f} ms, "
+            f"最大延迟 {job['max_latency_ms']:.3f} ms, 出错 {job['errors']} 次"
+        )
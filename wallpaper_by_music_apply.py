@@ -380,7 +380,7 @@ if __name__ == "__main__":
     
     # 获取命令行参数
     if len(sys.argv) < 3:
-        log("用法: python wallpaper_by_music_apply.py <歌曲文件名> <时长（秒）>")
+        log("用法: python wallpaper_by_music_apply.py <歌曲文件名> <时长（秒）> [壁纸引擎ID 壁纸名称 所属作品]")
         sys.exit(1)
     
     selected_file = sys.argv[1]
@@ -392,8 +392,12 @@ if __name__ == "__main__":
         log(f"无效的时长参数: {sys.argv[2]}")
         sys.exit(1)
     
-    # 获取对应的壁纸引擎ID、名称和作品来源
-    wallpaper_id, wallpaper_name, artwork_source = get_wallpaper_engine_id(selected_file)
+    # 获取对应的壁纸引擎ID、名称和作品来源（主程序已预先查好时直接使用传入的结果）
+    if len(sys.argv) >= 6:
+        wallpaper_id = sys.argv[3] or None
+        wallpaper_name, artwork_source = sys.argv[4], sys.argv[5]
+    else:
+        wallpaper_id, wallpaper_name, artwork_source = get_wallpaper_engine_id(selected_file)
     
     # 如果获取到有效的壁纸引擎ID，应用壁纸
     apply_wallpaper(wallpaper_id, wallpaper_name, artwork_source, duration)
@@ -0,0 +1,531 @@
+"""
+.xls 单元格定点读取模块
+
+直接解析 .xls（OLE2 复合文档 + BIFF8）文件，只读取指定工作表中指定坐标的单元格，
+不构建 DataFrame，也不依赖 pandas / xlrd。
+返回值与 pd.read_excel(file_path, header=None) 得到的单元格值保持一致：
+时间返回 datetime.time，日期时间返回 datetime.datetime，整数值返回 int，
+空单元格、错误值及 pandas 默认视为缺失的字符串返回 None。
+
+注意：pandas 会按整列推断类型，若某一列全部是数字，整数也会变成 float。
+昼夜表中用到的列都混有时间值，不受影响。
+
+独立运行时对比本模块与 pandas 在主循环用到的全部单元格上的结果：
+    python xls_cell_reader.py "昼夜表/第1周(01.01~01.07).xls"
+"""
+
+import math
+import re
+import struct
+from datetime import datetime, time, timedelta
+
+# ---------- OLE2 复合文档 ----------
+
+OLE_SIGNATURE = b'\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1'
+END_OF_CHAIN = 0xFFFFFFFE
+FREE_SECT = 0xFFFFFFFF
+
+# ---------- BIFF 记录类型 ----------
+
+REC_BOF = 0x0809
+REC_EOF = 0x000A
+REC_FILEPASS = 0x002F
+REC_DATEMODE = 0x0022
+REC_FORMAT = 0x041E
+REC_XF = 0x00E0
+REC_BOUNDSHEET = 0x0085
+REC_SST = 0x00FC
+REC_CONTINUE = 0x003C
+REC_NUMBER = 0x0203
+REC_RK = 0x027E
+REC_MULRK = 0x00BD
+REC_LABELSST = 0x00FD
+REC_LABEL = 0x0204
+REC_RSTRING = 0x00D6
+REC_FORMULA = 0x0006
+REC_STRING = 0x0207
+REC_BOOLERR = 0x0205
+
+# 内置数字格式中的日期格式编号（与 xlrd 的判定保持一致）
+BUILTIN_DATE_FORMATS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | \
+    set(range(50, 59)) | set(range(71, 82))
+NON_DATE_FORMAT_STRINGS = {'0.00E+00', '##0.0E+0', 'General', 'GENERAL', 'general', '@'}
+
+# pandas 默认视为缺失值的字符串
+PANDAS_NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+EPOCH_1900 = datetime(1899, 12, 31)
+EPOCH_1900_MINUS_1 = datetime(1899, 12, 30)
+EPOCH_1904 = datetime(1904, 1, 1)
+
+_bracketed_sub = re.compile(r'\[[^]]*\]').sub
+
+
+class XlsFormatError(Exception):
+    """文件不是可以定点读取的 .xls（BIFF8）工作簿"""
+
+
+def _read_ole_stream(data, names=('Workbook', 'Book')):
+    """从 OLE2 复合文档中取出工作簿数据流"""
+    if data[:8] != OLE_SIGNATURE:
+        raise XlsFormatError("不是 OLE2 复合文档")
+
+    sector_shift, mini_shift = struct.unpack_from('<HH', data, 0x1E)
+    sector_size = 1 << sector_shift
+    mini_size = 1 << mini_shift
+    first_dir, = struct.unpack_from('<I', data, 0x30)
+    mini_cutoff, first_minifat, num_minifat, first_difat, num_difat = \
+        struct.unpack_from('<IIIII', data, 0x38)
+
+    def sector(sid):
+        offset = (sid + 1) * sector_size
+        return data[offset:offset + sector_size]
+
+    # 收集 FAT 扇区编号（头部 109 个 + DIFAT 链）
+    fat_sids = [sid for sid in struct.unpack_from('<109I', data, 0x4C) if sid != FREE_SECT]
+    per_difat = sector_size // 4 - 1
+    sid = first_difat
+    for _ in range(num_difat):
+        if sid in (END_OF_CHAIN, FREE_SECT):
+            break
+        entries = struct.unpack(f'<{per_difat + 1}I', sector(sid))
+        fat_sids.extend(e for e in entries[:-1] if e != FREE_SECT)
+        sid = entries[-1]
+
+    fat = []
+    for fat_sid in fat_sids:
+        fat.extend(struct.unpack(f'<{sector_size // 4}I', sector(fat_sid)))
+
+    def chain(start, table):
+        sids = []
+        sid = start
+        while sid not in (END_OF_CHAIN, FREE_SECT) and sid < len(table):
+            sids.append(sid)
+            if len(sids) > len(table):
+                raise XlsFormatError("扇区链存在循环")
+            sid = table[sid]
+        return sids
+
+    def read_chain(start, size):
+        return b''.join(sector(sid) for sid in chain(start, fat))[:size]
+
+    directory = b''.join(sector(sid) for sid in chain(first_dir, fat))
+    entries = []
+    for offset in range(0, len(directory) - 127, 128):
+        name_len, = struct.unpack_from('<H', directory, offset + 64)
+        name = directory[offset:offset + max(name_len - 2, 0)].decode('utf-16-le', 'ignore')
+        entry_type = directory[offset + 66]
+        start, size = struct.unpack_from('<II', directory, offset + 116)
+        entries.append((name, entry_type, start, size))
+
+    if not entries:
+        raise XlsFormatError("复合文档目录为空")
+    root_start, root_size = entries[0][2], entries[0][3]
+
+    for wanted in names:
+        for name, entry_type, start, size in entries:
+            if entry_type != 2 or name != wanted:
+                continue
+            if size >= mini_cutoff:
+                return read_chain(start, size)
+            # 小于阈值的流存放在迷你流中
+            mini_stream = read_chain(root_start, root_size)
+            minifat = []
+            for fat_sid in chain(first_minifat, fat)[:num_minifat]:
+                minifat.extend(struct.unpack(f'<{sector_size // 4}I', sector(fat_sid)))
+            return b''.join(
+                mini_stream[sid * mini_size:(sid + 1) * mini_size] for sid in chain(start, minifat)
+            )[:size]
+    raise XlsFormatError("找不到 Workbook 数据流")
+
+
+def _iter_records(stream, pos=0):
+    """依次返回 (记录类型, 记录数据起始位置, 记录长度)"""
+    end = len(stream)
+    while pos + 4 <= end:
+        rec_type, length = struct.unpack_from('<HH', stream, pos)
+        yield rec_type, pos + 4, length
+        pos += 4 + length
+
+
+def _unpack_unicode(data, pos, lenlen=2):
+    """解析 BIFF8 Unicode 字符串"""
+    if lenlen == 1:
+        nchars = data[pos]
+    else:
+        nchars, = struct.unpack_from('<H', data, pos)
+    if not nchars:
+        return ''
+    pos += lenlen
+    options = data[pos]
+    pos += 1
+    if options & 0x08:
+        pos += 2
+    if options & 0x04:
+        pos += 4
+    if options & 0x01:
+        return data[pos:pos + 2 * nchars].decode('utf-16-le')
+    return data[pos:pos + nchars].decode('latin_1')
+
+
+def _decode_rk(rk):
+    """解析 RK 压缩数值"""
+    if rk & 0x02:
+        value = rk >> 2
+        if value & 0x20000000:
+            value -= 0x40000000
+    else:
+        value, = struct.unpack('<d', struct.pack('<Q', (rk & 0xFFFFFFFC) << 32))
+    if rk & 0x01:
+        value /= 100.0
+    return value
+
+
+def is_date_format_string(fmt):
+    """根据格式字符串判断是否为日期/时间格式（沿用 xlrd 的启发式规则）"""
+    reduced = ''
+    state = 0
+    for c in fmt:
+        if state == 0:
+            if c == '"':
+                state = 1
+            elif c in '\\_*':
+                state = 2
+            elif c in '$-+/(): ':
+                pass
+            else:
+                reduced += c
+        elif state == 1:
+            if c == '"':
+                state = 0
+        else:
+            state = 0
+    reduced = _bracketed_sub('', reduced)
+    if reduced in NON_DATE_FORMAT_STRINGS:
+        return False
+    date_count = sum(5 for c in reduced if c in 'ymdhsYMDHS')
+    num_count = sum(5 for c in reduced if c in '0#?')
+    if date_count and not num_count:
+        return True
+    if num_count and not date_count:
+        return False
+    return date_count > num_count
+
+
+def _number_to_value(number, is_date, datemode):
+    """按 pandas 的规则把数值单元格转换为 Python 对象"""
+    if is_date:
+        if datemode:
+            epoch = EPOCH_1904
+        elif number < 60:
+            epoch = EPOCH_1900
+        else:
+            epoch = EPOCH_1900_MINUS_1
+        days = int(number)
+        millis = int(round((number - days) * 86400000.0))
+        seconds, millis = divmod(millis, 1000)
+        try:
+            value = epoch + timedelta(days, seconds, 0, millis)
+        except OverflowError:
+            return number
+        # Excel 不区分日期和时间，落在纪元当天的视为纯时间
+        if value.date() == (EPOCH_1904 if datemode else EPOCH_1900).date():
+            return time(value.hour, value.minute, value.second, value.microsecond)
+        return value
+    if math.isfinite(number) and int(number) == number:
+        return int(number)
+    return number
+
+
+class _Workbook:
+    """工作簿全局信息：日期模式、XF 对应的日期格式、工作表位置和共享字符串"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.datemode = 0
+        self.sheet_offsets = []
+        self._formats = {}
+        self._xf_formats = []
+        self._sst_chunks = None
+        self._sst = None
+        self._parse_globals()
+        self.xf_is_date = [self._format_is_date(key) for key in self._xf_formats]
+
+    def _parse_globals(self):
+        stream = self.stream
+        last_type = None
+        for rec_type, pos, length in _iter_records(stream):
+            if rec_type == REC_EOF:
+                break
+            if rec_type == REC_CONTINUE:
+                if last_type == REC_SST:
+                    self._sst_chunks.append(stream[pos:pos + length])
+                continue
+            last_type = rec_type
+            if rec_type == REC_BOF:
+                version, = struct.unpack_from('<H', stream, pos)
+                if version != 0x0600:
+                    raise XlsFormatError("仅支持 BIFF8 格式")
+            elif rec_type == REC_FILEPASS:
+                raise XlsFormatError("工作簿已加密")
+            elif rec_type == REC_DATEMODE:
+                self.datemode, = struct.unpack_from('<H', stream, pos)
+            elif rec_type == REC_FORMAT:
+                key, = struct.unpack_from('<H', stream, pos)
+                data = stream[pos:pos + length]
+                self._formats[key] = is_date_format_string(_unpack_unicode(data, 2))
+            elif rec_type == REC_XF:
+                key, = struct.unpack_from('<H', stream, pos + 2)
+                self._xf_formats.append(key)
+            elif rec_type == REC_BOUNDSHEET:
+                offset, = struct.unpack_from('<I', stream, pos)
+                sheet_type = stream[pos + 5]
+                # 只保留普通工作表（与 pandas 的 sheet_name=0 一致）
+                if sheet_type == 0:
+                    self.sheet_offsets.append(offset)
+            elif rec_type == REC_SST:
+                # 共享字符串表只在真正读取到文本单元格时才解析
+                self._sst_chunks = [stream[pos:pos + length]]
+
+    def _format_is_date(self, key):
+        if key in self._formats:
+            return self._formats[key]
+        return key in BUILTIN_DATE_FORMATS
+
+    def shared_string(self, index):
+        if self._sst is None:
+            self._sst = _unpack_sst(self._sst_chunks or [])
+        if index < len(self._sst):
+            return self._sst[index]
+        return ''
+
+
+def _unpack_sst(chunks):
+    """解析共享字符串表（含跨 CONTINUE 记录的字符串）"""
+    if not chunks:
+        return []
+    total, = struct.unpack_from('<I', chunks[0], 4)
+    chunk_index = 0
+    data = chunks[0]
+    pos = 8
+    strings = []
+    for _ in range(total):
+        if pos >= len(data):
+            chunk_index += 1
+            if chunk_index >= len(chunks):
+                break
+            data = chunks[chunk_index]
+            pos = 0
+        nchars, = struct.unpack_from('<H', data, pos)
+        options = data[pos + 2]
+        pos += 3
+        rich_runs = 0
+        phonetic_size = 0
+        if options & 0x08:
+            rich_runs, = struct.unpack_from('<H', data, pos)
+            pos += 2
+        if options & 0x04:
+            phonetic_size, = struct.unpack_from('<i', data, pos)
+            pos += 4
+        parts = []
+        got = 0
+        while True:
+            need = nchars - got
+            if options & 0x01:
+                avail = min((len(data) - pos) >> 1, need)
+                parts.append(data[pos:pos + 2 * avail].decode('utf-16-le'))
+                pos += 2 * avail
+            else:
+                avail = min(len(data) - pos, need)
+                parts.append(data[pos:pos + avail].decode('latin_1'))
+                pos += avail
+            got += avail
+            if got == nchars:
+                break
+            # 字符串被拆到下一个 CONTINUE 记录，首字节为新的编码选项
+            chunk_index += 1
+            data = chunks[chunk_index]
+            options = data[0]
+            pos = 1
+        pos += 4 * rich_runs + phonetic_size
+        while pos > len(data) and chunk_index + 1 < len(chunks):
+            pos -= len(data)
+            chunk_index += 1
+            data = chunks[chunk_index]
+        strings.append(''.join(parts))
+    return strings
+
+
+def _to_pandas_value(value):
+    """把字符串单元格按 pandas 的缺失值规则处理"""
+    if isinstance(value, str) and value in PANDAS_NA_STRINGS:
+        return None
+    return value
+
+
+def read_cells(file_path, cells, sheet_index=0):
+    """
+    读取 .xls 工作表中的指定单元格
+
+    参数:
+        file_path: .xls 文件路径
+        cells: 可迭代的 (行索引, 列索引)，均从0开始
+        sheet_index: 工作表序号，默认第一个工作表
+
+    返回:
+        dict: {(行, 列): 值}，空单元格或不存在的单元格值为 None
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return read_cells_from_bytes(data, cells, sheet_index)
+
+
+def read_cells_from_bytes(data, cells, sheet_index=0):
+    """与 read_cells 相同，但直接接收文件内容"""
+    wanted = set(cells)
+    result = dict.fromkeys(wanted)
+    if not wanted:
+        return result
+
+    stream = _read_ole_stream(data)
+    book = _Workbook(stream)
+    if sheet_index >= len(book.sheet_offsets):
+        raise XlsFormatError(f"工作表序号 {sheet_index} 超出范围")
+
+    max_row = max(r for r, _ in wanted)
+    remaining = len(wanted)
+    pending_formula = None
+
+    def put(row, col, xf, number):
+        is_date = xf < len(book.xf_is_date) and book.xf_is_date[xf]
+        result[(row, col)] = _number_to_value(number, is_date, book.datemode)
+
+    for rec_type, pos, length in _iter_records(stream, book.sheet_offsets[sheet_index]):
+        if rec_type == REC_EOF:
+            break
+
+        if rec_type == REC_STRING and pending_formula is not None:
+            # 文本型公式的结果紧跟在 FORMULA 记录之后
+            result[pending_formula] = _to_pandas_value(_unpack_unicode(stream[pos:pos + length], 0))
+            pending_formula = None
+            remaining -= 1
+            if remaining == 0:
+                break
+            continue
+
+        if rec_type == REC_MULRK:
+            row, first_col = struct.unpack_from('<HH', stream, pos)
+            last_col, = struct.unpack_from('<H', stream, pos + length - 2)
+            for i, col in enumerate(range(first_col, last_col + 1)):
+                if (row, col) in wanted:
+                    xf, rk = struct.unpack_from('<HI', stream, pos + 4 + 6 * i)
+                    put(row, col, xf, _decode_rk(rk))
+                    remaining -= 1
+        elif rec_type in (REC_NUMBER, REC_RK, REC_LABELSST, REC_LABEL, REC_RSTRING,
+                          REC_FORMULA, REC_BOOLERR):
+            row, col, xf = struct.unpack_from('<HHH', stream, pos)
+            if (row, col) not in wanted:
+                # 记录按行排列，越过最后一个需要的行即可提前结束
+                if row > max_row:
+                    break
+                continue
+            if rec_type == REC_NUMBER:
+                put(row, col, xf, struct.unpack_from('<d', stream, pos + 6)[0])
+            elif rec_type == REC_RK:
+                put(row, col, xf, _decode_rk(struct.unpack_from('<I', stream, pos + 6)[0]))
+            elif rec_type == REC_LABELSST:
+                index, = struct.unpack_from('<I', stream, pos + 6)
+                result[(row, col)] = _to_pandas_value(book.shared_string(index))
+            elif rec_type in (REC_LABEL, REC_RSTRING):
+                result[(row, col)] = _to_pandas_value(_unpack_unicode(stream[pos:pos + length], 6))
+            elif rec_type == REC_BOOLERR:
+                value, is_error = stream[pos + 6], stream[pos + 7]
+                result[(row, col)] = None if is_error else bool(value)
+            else:
+                raw = stream[pos + 6:pos + 14]
+                if raw[6:8] != b'\xff\xff':
+                    put(row, col, xf, struct.unpack('<d', raw)[0])
+                elif raw[0] == 0:
+                    pending_formula = (row, col)
+                    continue
+                elif raw[0] == 1:
+                    result[(row, col)] = bool(raw[2])
+                else:
+                    # 错误值或空字符串，pandas 中均为缺失值
+                    result[(row, col)] = None
+            remaining -= 1
+
+        if remaining <= 0:
+            break
+
+    return result
+
+
+def read_study_cells(file_path, row, col):
+    """
+    定点读取学习时长单元格，返回格式与 study_cell_reader.read_study_cells 相同。
+    """
+    from study_cell_reader import DEFAULT_TIME, get_cell_positions
+
+    positions = get_cell_positions(row, col)
+    values = read_cells(file_path, positions)
+    formatted = [DEFAULT_TIME if values[pos] is None else str(values[pos]) for pos in positions]
+    return formatted[0], formatted[1:]
+
+
+def compare_with_pandas(file_path):
+    """
+    在主循环一周七天用到的全部单元格上对比本模块与 pandas 的读取结果
+
+    返回:
+        list: 不一致的 (星期几, 坐标, 本模块结果, pandas 结果)，全部一致时为空列表
+    """
+    import pandas as pd
+    from study_cell_reader import STUDY_CELL_BY_WEEKDAY, get_cell_positions, get_study_cell
+
+    df = pd.read_excel(file_path, header=None)
+    mismatches = []
+    for weekday in STUDY_CELL_BY_WEEKDAY:
+        positions = get_cell_positions(*get_study_cell(weekday))
+        values = read_cells(file_path, positions)
+        for r, c in positions:
+            try:
+                expected = df.iloc[r, c]
+                expected = None if pd.isna(expected) else str(expected)
+            except IndexError:
+                expected = None
+            actual = None if values[(r, c)] is None else str(values[(r, c)])
+            if actual != expected:
+                mismatches.append((weekday, (r, c), actual, expected))
+    return mismatches
+
+
+if __name__ == '__main__':
+    import sys
+    import timeit
+
+    if len(sys.argv) < 2:
+        print("用法: python xls_cell_reader.py <昼夜表.xls> [...]")
+        sys.exit(1)
+
+    failed = False
+    for path in sys.argv[1:]:
+        mismatches = compare_with_pandas(path)
+        if mismatches:
+            failed = True
+            print(f"[不一致] {path}")
+            for weekday, pos, actual, expected in mismatches:
+                print(f"  星期{weekday} {pos}: 定点读取={actual!r} pandas={expected!r}")
+        else:
+            print(f"[一致] {path}")
+
+        from study_cell_reader import get_study_cell, read_study_cells as read_with_pandas
+        row, col = get_study_cell(0)
+        biff_ms = timeit.timeit(lambda: read_study_cells(path, row, col), number=20) * 1000 / 20
+        pandas_ms = timeit.timeit(lambda: read_with_pandas(path, row, col), number=5) * 1000 / 5
+        print(f"  定点读取: {biff_ms:.2f} ms/次, pandas: {pandas_ms:.2f} ms/次")
+
+    sys.exit(1 if failed else 0)